@@ -6,6 +6,59 @@ and outputs a JSON summary of detected objects to stdout.
 
 Usage:
     python analyze_video.py <video_path> [--model yolov8n.pt] [--interval 30] [--conf 0.45]
+                            [--backend torch|onnxruntime|openvino]
+                            [--sample-fps 1.0] [--sampler grab|seek|read] [--batch-size 8]
+                            [--output-format json|ndjson] [--progress-every 1.0]
+                            [--detections-format records|columnar] [--workers 4]
+                            [--motion-threshold 0.005] [--motion-refresh 10] [--motion-method diff|mog2]
+                            [--adaptive] [--min-interval 6] [--max-interval 120]
+                            [--track] [--track-iou 0.3] [--track-min-hits 1] [--track-max-gap 90]
+                            [--no-cache] [--cache-dir DIR] [--cache-max-mb 1024]
+                            [--checkpoint FILE] [--checkpoint-every 30] [--resume] [--time-limit 600]
+                            [--camera CAM-01] [--roi-config FILE]
+                            [--tile 640] [--tile-overlap 0.2] [--tile-full-frame] [--decode-size 640]
+                            [--profile-startup] [--timings] [--profile FILE] [--profiler cprofile|pyinstrument]
+    python analyze_video.py --worker [--concurrency 2] [--port 8765]
+
+Results are cached on disk (see result_cache.py); re-analyzing the same file
+with the same model and options returns the stored result with "cached": true.
+
+--camera restricts the analysis to that camera's ROI polygons from the ROI
+config (see roi.py): frames are cropped to the region before inference and
+detections centred outside it are dropped. --tile runs each frame (or its
+ROI) as overlapping tiles so distant objects in 4K video keep enough pixels
+(see tiling.py). --decode-size does the opposite for ordinary footage: frames
+are shrunk to about the model's input size as they are decoded (by the
+decoder's own scaler when PyAV is installed), into reused buffers, instead of
+carrying full 1080p/4K arrays to the detector (see fast_decode.py); boxes are
+still reported in original frame coordinates.
+
+Long runs save their partial state to a checkpoint sidecar every
+--checkpoint-every seconds; --resume continues an interrupted run from it.
+With --time-limit the run stops after that long and reports
+{"partial": true, "resumeFrame": N, ...} (an "event": "partial" record in
+ndjson), so a long recording can be processed in slices by repeating the
+same command with --resume until the full result comes back.
+
+The inference backend's libraries (ultralytics/torch, onnxruntime or
+openvino) are only imported once a model is actually loaded, so --help,
+argument errors and cache hits start in well under a second.
+--profile-startup reports the import, model-load and warm-up (first
+inference) times on stderr and adds them to the result as "startup".
+
+--timings adds a "timings" block (see stage_timings.py) with the cumulative
+time and a per-frame histogram of each stage, inference calls and frames
+decoded / inferred / skipped:
+    "timings": { "stages": { "decode": { "totalMs": 812.4, "calls": 10, "frames": 10,
+                                         "msPerFrame": 81.2, "histogram": [0, 0, ...] },
+                             "preprocess": {...}, "forward": {...}, "postprocess": {...},
+                             "boxes": {...}, "serialize": {...} },
+                 "histogramEdgesMs": [0.1, 0.25, ...], "inferenceCalls": 10,
+                 "framesDecoded": 10, "framesInferred": 10, "framesSkipped": 0,
+                 "wallMs": 4210.7, "otherMs": 120.3 }
+In ndjson mode records are encoded as they are produced, so "serialize" is
+also part of "boxes". --profile FILE additionally writes a cProfile (or
+pyinstrument HTML) profile of the whole analysis.
 
 Output (JSON):
     {
@@ -19,15 +72,43 @@ Output (JSON):
       "alerts": [
         { "type": "intrusion", "severity": "high", "message": "Person detected at 3.2s (conf 0.87)" },
         ...
-      ]
+      ],
+      "inferredFrames": 4,          (with --motion-threshold)
+      "skippedFrames": 6
     }
+
+With --track, "detections" is replaced by one record per track (see tracker.py),
+"summary" counts tracks per class and each threat track raises its own alert:
+    "tracks": [ { "id": 1, "class": "person", "firstFrame": 0, "lastFrame": 270, "firstTime": 0.0,
+                  "lastTime": 9.0, "detections": 10, "bestConfidence": 0.91, "bestFrame": 90,
+                  "path": [[0, x1, y1, x2, y2], ...] } ]
+
+With --detections-format columnar, "detections" holds parallel arrays instead:
+    { "frame": [0, 0, ...], "time": [...], "class": [...], "confidence": [...], "bbox": [[x1,y1,x2,y2], ...] }
+
+Output (--output-format ndjson), one record per line as they happen:
+    { "event": "detection", "frame": 0, "time": 0.0, "class": "person", "confidence": 0.87, "bbox": [...] }
+    { "event": "alert", "type": "intrusion", "severity": "high", "message": "..." }
+    { "event": "resume", "frame": 900, "emitted": 42 }   (with --resume: keep the first 42
+                                                          records of the interrupted run)
+    { "event": "progress", "frame": 900, "analyzedFrames": 31, "framesPerSec": 12.4, "speed": 11.8, ... }
+    { "event": "summary", "totalFrames": 300, "analyzedFrames": 10, "summary": {...},
+      "detectionCount": 7, "alertCount": 1, ... }
 """
 
+import time
+_IMPORT_START = time.perf_counter()
+
 import sys
 import os
 import json
+import inspect
 import argparse
-from collections import defaultdict
+import threading
+import socketserver
+from collections import defaultdict, deque
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # Suppress all ultralytics / YOLO console output
 os.environ['YOLO_VERBOSE'] = 'False'
@@ -35,7 +116,20 @@ import logging
 logging.getLogger('ultralytics').setLevel(logging.CRITICAL)
 
 import cv2
-from ultralytics import YOLO
+
+from result_cache import DEFAULT_CACHE_DIR, ResultCache, video_fingerprint, weights_fingerprint
+from checkpoint import DEFAULT_EVERY as DEFAULT_CHECKPOINT_EVERY, Checkpointer
+from inference_backends import BACKENDS, load_detector
+from motion_gate import MOTION_METHODS, MotionGate
+from tracker import IoUTracker
+from frame_sampler import SAMPLING_STRATEGIES, interval_for_sample_fps, iter_sampled_frames
+from startup_profile import StartupProfile
+from stage_timings import StageTimings, TimedDetector
+from roi import DEFAULT_ROI_CONFIG, RegionOfInterest, RoiDetector, camera_roi
+from tiling import TiledDetector
+from fast_decode import Downscaler, DownscaledDetector, iter_downscaled_frames
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 # Classes that should trigger monument-protection alerts
 THREAT_CLASSES = {
@@ -57,97 +151,1418 @@ THREAT_CLASSES = {
 }
 
 
-def analyze_video(video_path, model_path='yolov8n.pt', frame_interval=30, confidence=0.45):
-    """Analyze video and return detection results."""
-    model = YOLO(model_path)
+class DetectionCollector:
+    """Turns per-frame detections into detection records, class counts and alerts.
+
+    Alerts are raised once per alert type/class. With on_event set, detection
+    and alert records are passed to the callback as they are produced instead
+    of being kept, so memory stays flat however long the video is.
+
+    detections_format 'records' gives one dict per box; 'columnar' gives
+    parallel arrays (frame, time, class, confidence, bbox), and in streaming
+    mode one 'detections' record per frame instead of one per box.
+
+    With a tracker (see tracker.IoUTracker) boxes are not recorded at all:
+    each confirmed track yields one 'tracks' record, summary counts tracks
+    per class and alerts are raised once per track.
+
+    Set timings to a StageTimings to time add() as the 'boxes' stage (and,
+    through analyze_range(), decoding and inference).
+
+    After set_state(), frames up to the checkpoint's last frame are ignored:
+    their records are already in the state or were already streamed.
+    """
+
+    def __init__(self, fps, names, on_event=None, detections_format='records', tracker=None):
+        self.fps = fps
+        self.names = names
+        self.on_event = on_event
+        self.tracker = tracker
+        self.tracks = []
+        self.columnar = detections_format == 'columnar'
+        if self.columnar:
+            self.detections = {'frame': [], 'time': [], 'class': [], 'confidence': [], 'bbox': []}
+        else:
+            self.detections = []
+        self.summary = defaultdict(int)
+        self.alerts = []
+        self.alert_keys = []  # parallel to alerts; used when merging segments
+        self.alert_positions = []  # detections emitted before each alert
+        self.seen_alerts = set()  # avoid duplicate alert messages
+        self.analyzed = 0
+        self.skipped = None  # frames the motion gate kept from the model, if gated
+        self.detection_count = 0
+        self.alert_count = 0
+        self.emitted = 0  # records passed to on_event
+        self.last_frame = -1  # highest frame added
+        self.resumed_after = None
+        self.timings = None
+
+    def add(self, frame_idx, dets):
+        """Record the Detections arrays (see detection_utils) of one frame."""
+        if self.resumed_after is not None and frame_idx <= self.resumed_after:
+            return
+        self.last_frame = max(self.last_frame, frame_idx)
+        if self.timings is None:
+            self._add_frame(frame_idx, dets)
+            return
+        start = time.perf_counter()
+        self._add_frame(frame_idx, dets)
+        self.timings.add('boxes', time.perf_counter() - start)
+
+    def _add_frame(self, frame_idx, dets):
+        count = len(dets.conf)
+        if count == 0:
+            return
+        if self.tracker is not None:
+            self.detection_count += count
+            self._add_tracked(frame_idx, dets)
+            return
+        time_sec = round(frame_idx / self.fps, 1)
+        classes = [self.names[c] for c in dets.cls.tolist()]
+        confs = dets.conf.tolist()
+        boxes = dets.xyxy.astype(int).tolist()
+        rounded = [round(c, 2) for c in confs]
+
+        self.detection_count += count
+        if self.columnar:
+            self._add_columns(frame_idx, time_sec, classes, rounded, boxes)
+        else:
+            for cls_name, conf, bbox in zip(classes, rounded, boxes):
+                self._add_detection({
+                    'frame': frame_idx,
+                    'time': time_sec,
+                    'class': cls_name,
+                    'confidence': conf,
+                    'bbox': bbox,
+                })
+
+        for cls_name, conf in zip(classes, confs):
+            self.summary[cls_name] += 1
+
+            # Generate alert if this is a threat class
+            if cls_name in THREAT_CLASSES:
+                info = THREAT_CLASSES[cls_name]
+                alert_key = f"{info['type']}_{cls_name}"
+                self._add_alert(alert_key, {
+                    'type': info['type'],
+                    'severity': info['severity'],
+                    'message': f"{cls_name.capitalize()} detected at {time_sec}s (confidence {conf:.0%})",
+                })
+
+    def _add_tracked(self, frame_idx, dets):
+        confirmed, finished = self.tracker.update(frame_idx, dets.xyxy, dets.conf, dets.cls)
+        for track in finished:
+            self._add_track(track)
+        for track in confirmed:
+            cls_name = self.names[track.cls]
+            self.summary[cls_name] += 1
+            if cls_name in THREAT_CLASSES:
+                info = THREAT_CLASSES[cls_name]
+                time_sec = round(track.first_frame / self.fps, 1)
+                self._add_alert(f"{info['type']}_{cls_name}_{track.id}", {
+                    'type': info['type'],
+                    'severity': info['severity'],
+                    'message': f"{cls_name.capitalize()} detected at {time_sec}s (confidence {track.best_conf:.0%})",
+                    'track': track.id,
+                })
+
+    def _add_track(self, track):
+        record = track.to_record(self.names, self.fps)
+        if self.on_event is None:
+            self.tracks.append(record)
+        else:
+            self.emitted += 1
+            self.on_event({'event': 'track', **record})
+
+    def _add_detection(self, detection):
+        if self.on_event is None:
+            self.detections.append(detection)
+        else:
+            self.emitted += 1
+            self.on_event({'event': 'detection', **detection})
+
+    def _add_columns(self, frame_idx, time_sec, classes, confs, boxes):
+        if self.on_event is not None:
+            self.emitted += 1
+            self.on_event({
+                'event': 'detections',
+                'frame': frame_idx,
+                'time': time_sec,
+                'class': classes,
+                'confidence': confs,
+                'bbox': boxes,
+            })
+            return
+        columns = self.detections
+        columns['frame'].extend([frame_idx] * len(classes))
+        columns['time'].extend([time_sec] * len(classes))
+        columns['class'].extend(classes)
+        columns['confidence'].extend(confs)
+        columns['bbox'].extend(boxes)
+
+    def _add_alert(self, alert_key, alert):
+        if alert_key in self.seen_alerts:
+            return
+        self.seen_alerts.add(alert_key)
+        self.alert_count += 1
+        if self.on_event is None:
+            self.alerts.append(alert)
+            self.alert_keys.append(alert_key)
+            self.alert_positions.append(self.detection_count)
+        else:
+            self.emitted += 1
+            self.on_event({'event': 'alert', **alert})
+
+    def export(self):
+        """Return the collected state as a picklable dict (see merge)."""
+        if self.tracker is not None:
+            raise ValueError('Tracked results cannot be split into segments')
+        return {
+            'analyzed': self.analyzed,
+            'skipped': self.skipped,
+            'detections': self.detections,
+            'detectionCount': self.detection_count,
+            'summary': dict(self.summary),
+            'alerts': list(zip(self.alert_keys, self.alert_positions, self.alerts)),
+        }
+
+    def merge(self, part):
+        """Append the export() of a later segment of the same video.
+
+        Segments must be merged in video order; alerts already raised by an
+        earlier segment are dropped, and streamed alert records keep their
+        place between detection records, exactly as a single pass would.
+        """
+        self.analyzed += part['analyzed']
+        if part['skipped'] is not None:
+            self.skipped = (self.skipped or 0) + part['skipped']
+        self.detection_count += part['detectionCount']
+        for cls_name, count in part['summary'].items():
+            self.summary[cls_name] += count
+
+        pending = deque(part['alerts'])
+
+        def flush_alerts(position):
+            while pending and pending[0][1] <= position:
+                alert_key, _, alert = pending.popleft()
+                self._add_alert(alert_key, alert)
+
+        detections = part['detections']
+        if not self.columnar:
+            for i, detection in enumerate(detections):
+                flush_alerts(i)
+                self._add_detection(detection)
+        elif self.on_event is None:
+            for key, values in detections.items():
+                self.detections[key].extend(values)
+        else:
+            # Regroup per-box columns into one streaming record per frame
+            frames = detections['frame']
+            start = 0
+            while start < len(frames):
+                end = start
+                while end < len(frames) and frames[end] == frames[start]:
+                    end += 1
+                flush_alerts(start)
+                self._add_columns(frames[start], detections['time'][start],
+                                  detections['class'][start:end],
+                                  detections['confidence'][start:end],
+                                  detections['bbox'][start:end])
+                start = end
+        flush_alerts(float('inf'))
+
+    def get_state(self):
+        """JSON-serializable state for checkpoints (see set_state).
+
+        In streaming mode records already passed to on_event are not kept, so
+        the state only carries counts.
+        """
+        return {
+            'analyzed': self.analyzed,
+            'skipped': self.skipped,
+            'detections': self.detections,
+            'tracks': self.tracks,
+            'detectionCount': self.detection_count,
+            'alertCount': self.alert_count,
+            'summary': dict(self.summary),
+            'alerts': self.alerts,
+            'alertKeys': self.alert_keys,
+            'alertPositions': self.alert_positions,
+            'seenAlerts': sorted(self.seen_alerts),
+            'tracker': self.tracker.get_state() if self.tracker is not None else None,
+            'lastFrame': self.last_frame,
+            'emitted': self.emitted,
+        }
+
+    def set_state(self, state):
+        self.analyzed = state['analyzed']
+        self.skipped = state['skipped']
+        self.detections = state['detections']
+        self.tracks = state['tracks']
+        self.detection_count = state['detectionCount']
+        self.alert_count = state['alertCount']
+        self.summary = defaultdict(int, state['summary'])
+        self.alerts = state['alerts']
+        self.alert_keys = state['alertKeys']
+        self.alert_positions = state['alertPositions']
+        self.seen_alerts = set(state['seenAlerts'])
+        if self.tracker is not None:
+            self.tracker.set_state(state['tracker'])
+        self.last_frame = self.resumed_after = state.get('lastFrame', -1)
+        self.emitted = state.get('emitted', 0)
+
+    def result(self, total_frames, fps, elapsed):
+        """Build the analyze_video() return value."""
+        if self.tracker is not None:
+            for track in self.tracker.finish():
+                self._add_track(track)
+        if self.on_event is not None:
+            result = {
+                'totalFrames': total_frames,
+                'analyzedFrames': self.analyzed,
+                'fps': round(fps, 2),
+                'summary': dict(self.summary),
+                'detectionCount': self.detection_count,
+                'alertCount': self.alert_count,
+                'elapsed': round(elapsed, 2),
+            }
+            if self.tracker is not None:
+                result['trackCount'] = sum(self.summary.values())
+        elif self.tracker is not None:
+            result = {
+                'totalFrames': total_frames,
+                'analyzedFrames': self.analyzed,
+                'fps': round(fps, 2),
+                'tracks': sorted(self.tracks, key=lambda t: t['id']),
+                'summary': dict(self.summary),
+                'alerts': self.alerts,
+                'detectionCount': self.detection_count,
+            }
+        else:
+            result = {
+                'totalFrames': total_frames,
+                'analyzedFrames': self.analyzed,
+                'fps': round(fps, 2),
+                'detections': self.detections,
+                'summary': dict(self.summary),
+                'alerts': self.alerts,
+            }
+        if self.skipped is not None:
+            result['inferredFrames'] = self.analyzed - self.skipped
+            result['skippedFrames'] = self.skipped
+        return result
+
+
+def infer_batch(model, batch, confidence):
+    """Run one inference call over [(frame_idx, frame), ...] and yield (frame_idx, Detections).
+
+    model is a detector from inference_backends.load_detector().
+    """
+    detections = model.predict([frame for _, frame in batch], confidence)
+    for (frame_idx, _), dets in zip(batch, detections):
+        yield frame_idx, dets
+
+
+class ProgressReporter:
+    """Emits at most one 'progress' record per `every` seconds."""
+
+    def __init__(self, on_event, every, fps, total_frames, collector):
+        self.on_event = on_event
+        self.every = every
+        self.fps = fps
+        self.total_frames = total_frames
+        self.collector = collector
+        self.started = time.perf_counter()
+        self.last = self.started
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
 
+    def update(self, frame_idx, force=False):
+        if self.on_event is None:
+            return
+        now = time.perf_counter()
+        if not force and now - self.last < self.every:
+            return
+        self.last = now
+        elapsed = max(now - self.started, 1e-9)
+        self.on_event({
+            'event': 'progress',
+            'frame': frame_idx,
+            'totalFrames': self.total_frames,
+            'analyzedFrames': self.collector.analyzed,
+            'detections': self.collector.detection_count,
+            'elapsed': round(elapsed, 2),
+            'framesPerSec': round(self.collector.analyzed / elapsed, 2),
+            'speed': round((frame_idx + 1) / self.fps / elapsed, 2),  # seconds of video per second
+        })
+
+
+def run_frames(model, frames, collector, confidence, batch_size, on_batch=None, gate=None):
+    """Infer (frame_idx, frame) pairs batch_size at a time into collector.
+
+    With a MotionGate, frames it rejects are counted but never reach the model.
+    on_batch(frame_idx) is called once all frames up to frame_idx are
+    recorded: after every batch and every rejected frame, so progress and
+    time limits keep running when the gate rejects everything. A rejected
+    frame also runs the pending batch, which is never held across it.
+    """
+    if gate is not None and collector.skipped is None:
+        collector.skipped = 0
+    batch = []
+
+    def flush():
+        for idx, dets in infer_batch(model, batch, confidence):
+            collector.add(idx, dets)
+        last = batch[-1][0]
+        batch.clear()
+        return last
+
+    for frame_idx, frame in frames:
+        collector.analyzed += 1
+        if gate is not None and not gate.check(frame):
+            collector.skipped += 1
+            if batch:
+                flush()
+            if on_batch is not None:
+                on_batch(frame_idx)
+            continue
+        batch.append((frame_idx, frame))
+        if len(batch) >= batch_size:
+            last = flush()
+            if on_batch is not None:
+                on_batch(last)
+    if batch:
+        last = flush()
+        if on_batch is not None:
+            on_batch(last)
+
+
+def make_gate(motion_threshold, motion_refresh=10, motion_method='diff'):
+    """Return a MotionGate, or None when motion_threshold is None."""
+    if motion_threshold is None:
+        return None
+    return MotionGate(motion_threshold, motion_refresh, motion_method)
+
+
+def threat_classes(dets, names):
+    """Sorted THREAT_CLASSES names among the detections."""
+    return sorted({names[c] for c in dets.cls.tolist()} & THREAT_CLASSES.keys())
+
+
+def run_adaptive(model, frames, collector, confidence, batch_size, min_interval, max_interval,
+                 base_interval, on_batch=None, gate=None, state=None):
+    """Infer with a stride that adapts to what the model sees.
+
+    frames must be sampled on the min_interval grid. The stride doubles (up to
+    max_interval) after every inference without a THREAT_CLASSES detection
+    and is base_interval while threats stay in view. A new hit (threats after
+    none, or a different set of threat classes) is sampled densely: grid
+    frames skipped since the previous inference (at most
+    max_interval / min_interval of them) are inferred first, so the lead-up
+    is not missed, and the stride stays at min_interval for one
+    base_interval after the hit. A threat that stays in view therefore costs
+    about as many inferences as fixed sampling at base_interval.
+
+    state, if given, is a dict kept up to date with the current 'stride',
+    the 'next' frame to infer, the 'threats' of the last inference and the
+    end of the 'dense' window; passing back a saved copy resumes from it.
+    """
+    if gate is not None and collector.skipped is None:
+        collector.skipped = 0
+    if state is None:
+        state = {}
+    base_interval = min(max(base_interval, min_interval), max_interval)
+    stride = state.get('stride', base_interval)
+    next_idx = state.get('next', 0)
+    threats = state.get('threats', [])
+    dense_until = state.get('dense', -1)
+    skipped = []  # (frame_idx, frame) on the min grid since the last inference
+
+    for frame_idx, frame in frames:
+        if frame_idx < next_idx:
+            skipped.append((frame_idx, frame))
+            continue
+
+        collector.analyzed += 1
+        seen = []
+        if gate is not None and not gate.check(frame):
+            collector.skipped += 1
+        else:
+            ((_, dets),) = infer_batch(model, [(frame_idx, frame)], confidence)
+            seen = threat_classes(dets, collector.names)
+            if seen and seen != threats:
+                dense_until = frame_idx + base_interval
+                if skipped:
+                    # Back-fill the gap before recording the new hit, keeping frame order
+                    collector.analyzed += len(skipped)
+                    for i in range(0, len(skipped), batch_size):
+                        for idx, fill_dets in infer_batch(model, skipped[i:i + batch_size], confidence):
+                            collector.add(idx, fill_dets)
+            collector.add(frame_idx, dets)
+
+        skipped.clear()
+        threats = seen
+        if not seen:
+            stride = min(stride * 2, max_interval)
+        elif frame_idx + min_interval <= dense_until:
+            stride = min_interval
+        else:
+            stride = base_interval
+        next_idx = frame_idx + stride
+        state.update(stride=stride, next=next_idx, threats=threats, dense=dense_until)
+        if on_batch is not None:
+            on_batch(frame_idx)
+
+
+def analyze_range(model, cap, collector, settings, start=0, end=None, on_batch=None,
+                  adaptive_state=None, path=None):
+    """Sample and infer frames [start, end) of cap into collector.
+
+    settings is the dict built by analyze_video(); it is passed as-is to
+    segment worker processes, so it holds only picklable values.
+    adaptive_state is passed to run_adaptive(). If collector.timings is set,
+    decoding and the detector's stages are timed into it as well. path is
+    the file cap reads; with decode_size it lets fast_decode scale frames
+    while decoding.
+    """
+    gate = make_gate(*settings['motion'])
+    roi = RegionOfInterest.from_config(settings['roi']) if settings['roi'] else None
+    downscaler = None
+    if settings['decode_size']:
+        downscaler = Downscaler(settings['decode_size'], _frames_held(settings))
+        if roi is not None:
+            # the ROI is applied to the downscaled frames
+            roi = roi.normalized((cap.get(cv2.CAP_PROP_FRAME_HEIGHT), cap.get(cv2.CAP_PROP_FRAME_WIDTH)))
+    if settings['tiling']:
+        tile_size, overlap, full_frame = settings['tiling']
+        model = TiledDetector(model, tile_size, overlap, full_frame, roi)
+    elif roi is not None:
+        model = RoiDetector(model, roi)
+    if downscaler is not None:
+        model = DownscaledDetector(model, settings['decode_size'], downscaler)
+    timings = collector.timings
+    if timings is not None:
+        model = TimedDetector(model, timings)
+    if settings['adaptive']:
+        min_interval, max_interval = settings['adaptive']
+        frames = _sample(cap, min_interval, settings['sampler'], start, end, downscaler, path)
+        if timings is not None:
+            frames = timings.timed_iter(frames, 'decode')
+        run_adaptive(model, frames, collector, settings['confidence'], settings['batch_size'],
+                     min_interval, max_interval, settings['frame_interval'], on_batch, gate,
+                     adaptive_state)
+    else:
+        frames = _sample(cap, settings['frame_interval'], settings['sampler'], start, end, downscaler, path)
+        if timings is not None:
+            frames = timings.timed_iter(frames, 'decode')
+        run_frames(model, frames, collector, settings['confidence'], settings['batch_size'],
+                   on_batch, gate)
+
+
+def _frames_held(settings):
+    """Most sampled frames alive at once: a batch, or the adaptive back-fill gap."""
+    if settings['adaptive']:
+        min_interval, max_interval = settings['adaptive']
+        return max_interval // min_interval + 2
+    return settings['batch_size'] + 1
+
+
+def _sample(cap, frame_interval, sampler, start, end, downscaler, path):
+    if downscaler is None:
+        return iter_sampled_frames(cap, frame_interval, sampler, start, end)
+    return iter_downscaled_frames(cap, frame_interval, downscaler, sampler, start, end, path)
+
+
+def analyze_video(video_path, model_path='yolov8n.pt', frame_interval=30, confidence=0.45,
+                  sampler='grab', sample_fps=None, batch_size=1, model=None,
+                  on_event=None, progress_every=1.0, detections_format='records', workers=1,
+                  motion_threshold=None, motion_refresh=10, motion_method='diff',
+                  adaptive=False, min_interval=None, max_interval=None,
+                  track=False, track_iou=0.3, track_min_hits=1, track_max_gap=None,
+                  checkpoint=None, checkpoint_every=None, resume=False, time_limit=None,
+                  backend='torch', timings=False, roi=None,
+                  tile_size=None, tile_overlap=0.2, tile_full_frame=False, decode_size=None):
+    """Analyze video and return detection results.
+
+    Only every frame_interval-th frame is decoded to BGR and run through the
+    model (see frame_sampler). If sample_fps is given it overrides
+    frame_interval using the video's own frame rate. Sampled frames are sent
+    to the model batch_size at a time, so at most batch_size decoded frames
+    are held in memory. backend selects how model_path is run (see
+    inference_backends: torch for .pt, onnxruntime / openvino for exported
+    models). Pass an already loaded detector as model to skip loading
+    model_path (worker mode).
+
+    If on_event is given, detection, alert and progress records (at most one
+    progress record per progress_every seconds) are passed to it as they
+    happen and the returned summary carries counts instead of lists.
+    detections_format='columnar' returns detections as parallel arrays
+    (see DetectionCollector).
+
+    With workers > 1 the video is split into that many frame ranges that are
+    analyzed in a process pool and merged in order; the output is the same
+    as a single pass.
+
+    motion_threshold enables the motion gate (see motion_gate): sampled frames
+    whose changed-pixel fraction is below it are skipped unless motion_refresh
+    frames in a row were skipped. The result then reports inferredFrames and
+    skippedFrames. With workers > 1 each segment starts a fresh gate, so the
+    first sampled frame of every segment is always inferred.
+
+    adaptive=True replaces the fixed interval with run_adaptive(): the stride
+    widens up to max_interval (default frame_interval * 4) while no threats
+    are detected, stays at frame_interval while they are, and drops to
+    min_interval (default frame_interval // 5) for one frame_interval around
+    each new hit, whose lead-up is back-filled. Like the gate, the
+    stride restarts at each segment boundary when workers > 1.
+
+    track=True collapses detections into tracks (see tracker) and returns
+    "tracks" instead of "detections", with one alert per threat track. A
+    track ends after track_max_gap frames without a match (default: three
+    sampling strides). Tracking needs one pass, so it ignores workers.
+
+    checkpoint_every (seconds) saves the partial state to the checkpoint
+    sidecar file (default: <video_path>.checkpoint.json, see checkpoint.py)
+    after the batch in progress; the file is removed once the video is done.
+    resume=True continues from a matching checkpoint instead of frame 0 (the
+    motion gate starts fresh there). time_limit (seconds) checkpoints and
+    stops after the batch in progress once exceeded, returning
+    {"partial": true, "resumeFrame": N, ...}; call again with resume=True to
+    continue. A resumed stream starts with a 'resume' record giving the
+    number of records emitted up to the checkpoint; the records after those
+    (at most checkpoint_every seconds' worth) are emitted again, so a
+    consumer that stored the interrupted stream keeps its first 'emitted'
+    records and appends the new ones. The time
+    limit is checked after every batch and every frame the motion gate
+    rejects (see run_frames). Checkpointing needs one pass: resume and
+    time_limit ignore workers, and periodic checkpoints only apply with
+    workers=1.
+
+    timings=True adds a "timings" block with cumulative and per-frame times
+    of each stage (decode, preprocess, forward, postprocess, boxes; see
+    stage_timings), the number of inference calls and the frames decoded,
+    inferred and skipped. With workers > 1 stage times are summed over the
+    segment processes; a resumed run only covers its own slice.
+
+    roi is a camera's ROI config entry (see roi.py, e.g. from camera_roi()):
+    frames are cropped to the polygons' bounding box before inference and
+    detections whose centre lies outside the polygons are dropped.
+
+    tile_size enables tiled inference (see tiling): each sampled frame (or
+    its ROI box) is cut into tiles of that size overlapping by tile_overlap,
+    all tiles run as one batch and are merged with a cross-tile NMS.
+    tile_full_frame adds a low-resolution pass over the whole frame.
+
+    decode_size shrinks every sampled frame to that many pixels on its long
+    side as it is decoded (see fast_decode), into a few reused buffers, so
+    batches and the detector never hold full-size frames; detections are
+    mapped back to original coordinates. With PyAV installed the decoder's
+    scaler does this and sampler is not used. An ROI then crops the small
+    frame. It cannot be combined with tile_size, which needs the full
+    resolution.
+    """
+    if decode_size and tile_size:
+        return {'error': 'decode_size and tile_size cannot be combined'}
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         return {'error': f'Cannot open video: {video_path}'}
 
     fps = cap.get(cv2.CAP_PROP_FPS) or 30
     total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if roi:
+        try:
+            RegionOfInterest.from_config(roi).resolve((int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                                                       int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))))
+        except (ValueError, KeyError, TypeError) as exc:
+            cap.release()
+            return {'error': f'Invalid ROI: {exc}'}
+    if sample_fps:
+        frame_interval = interval_for_sample_fps(fps, sample_fps)
+
+    settings = {
+        'frame_interval': frame_interval,
+        'confidence': confidence,
+        'sampler': sampler,
+        'batch_size': batch_size,
+        'motion': (motion_threshold, motion_refresh, motion_method),
+        'adaptive': None,
+        'roi': roi,
+        'tiling': (tile_size, tile_overlap, tile_full_frame) if tile_size else None,
+        'decode_size': decode_size,
+    }
+    grid = frame_interval
+    if adaptive:
+        min_interval = min_interval or max(1, frame_interval // 5)
+        max_interval = max(max_interval or frame_interval * 4, min_interval)
+        settings['adaptive'] = (min_interval, max_interval)
+        grid = min_interval
+
+    tracker = None
+    if track:
+        stride = settings['adaptive'][1] if adaptive else frame_interval
+        tracker = IoUTracker(track_iou, track_max_gap or 3 * stride, track_min_hits)
+        workers = 1
+    if resume or time_limit:
+        workers = 1
+
+    segments = segment_ranges(total_frames, grid, workers)
+    if len(segments) > 1:
+        cap.release()
+        return _analyze_parallel(video_path, model_path, backend, settings, on_event,
+                                 progress_every, detections_format, fps, total_frames, segments,
+                                 timings)
 
-    detections = []
-    summary = defaultdict(int)
-    alerts = []
-    seen_alerts = set()  # avoid duplicate alert messages
-    analyzed = 0
-    frame_idx = 0
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        if frame_idx % frame_interval == 0:
-            analyzed += 1
-            results = model(frame, verbose=False, conf=confidence)
-
-            for result in results:
-                if result.boxes is None:
-                    continue
-                for box in result.boxes:
-                    cls_id = int(box.cls[0])
-                    cls_name = result.names[cls_id]
-                    conf = float(box.conf[0])
-                    x1, y1, x2, y2 = [int(v) for v in box.xyxy[0]]
-                    time_sec = round(frame_idx / fps, 1)
-
-                    detections.append({
-                        'frame': frame_idx,
-                        'time': time_sec,
-                        'class': cls_name,
-                        'confidence': round(conf, 2),
-                        'bbox': [x1, y1, x2, y2],
-                    })
-                    summary[cls_name] += 1
-
-                    # Generate alert if this is a threat class
-                    if cls_name in THREAT_CLASSES:
-                        info = THREAT_CLASSES[cls_name]
-                        alert_key = f"{info['type']}_{cls_name}"
-                        if alert_key not in seen_alerts:
-                            seen_alerts.add(alert_key)
-                            alerts.append({
-                                'type': info['type'],
-                                'severity': info['severity'],
-                                'message': f"{cls_name.capitalize()} detected at {time_sec}s (confidence {conf:.0%})",
-                            })
-
-        frame_idx += 1
+    if model is None:
+        model = load_detector(model_path, backend)
 
+    collector = DetectionCollector(fps, model.names, on_event, detections_format, tracker)
+    if timings:
+        collector.timings = StageTimings()
+    progress = ProgressReporter(on_event, progress_every, fps, total_frames, collector)
+    if not (checkpoint_every or resume or time_limit):
+        analyze_range(model, cap, collector, settings, on_batch=progress.update, path=video_path)
+        cap.release()
+        return _with_timings(collector.result(total_frames, fps, progress.elapsed()),
+                             collector.timings, progress.elapsed())
+
+    checkpointer = Checkpointer(
+        checkpoint or video_path + '.checkpoint.json',
+        {
+            'video': video_fingerprint(video_path),
+            'model': weights_fingerprint(model_path),
+            'backend': backend,
+            'settings': settings,
+            'track': [track, track_iou, track_min_hits, track_max_gap],
+            'detectionsFormat': detections_format,
+            'stream': on_event is not None,
+        },
+        checkpoint_every, time_limit)
+    start = 0
+    adaptive_state = {}
+    saved = checkpointer.load() if resume else None
+    if saved is not None:
+        start = saved['resumeFrame']
+        adaptive_state = saved['adaptive']
+        collector.set_state(saved['collector'])
+        progress.started -= saved['elapsed']  # elapsed covers all slices
+
+        if on_event is not None:
+            # the stream goes on from the checkpoint: records emitted after it come again
+            on_event({'event': 'resume', 'frame': start, 'emitted': collector.emitted})
+
+    def on_batch(frame_idx):
+        progress.update(frame_idx)
+        stop = checkpointer.expired()
+        if stop or checkpointer.due():
+            resume_frame = frame_idx + (settings['adaptive'][0] if adaptive else frame_interval)
+            checkpointer.save({
+                'resumeFrame': resume_frame,
+                'adaptive': adaptive_state,
+                'collector': collector.get_state(),
+                'elapsed': progress.elapsed(),
+            })
+            if stop:
+                raise _TimeLimitReached(resume_frame)
+
+    try:
+        analyze_range(model, cap, collector, settings, start, on_batch=on_batch,
+                      adaptive_state=adaptive_state, path=video_path)
+    except _TimeLimitReached as stop:
+        return {
+            'partial': True,
+            'resumeFrame': stop.resume_frame,
+            'checkpoint': checkpointer.path,
+            'totalFrames': total_frames,
+            'analyzedFrames': collector.analyzed,
+            'fps': round(fps, 2),
+            'elapsed': round(progress.elapsed(), 2),
+        }
+    finally:
+        cap.release()
+
+    checkpointer.remove()
+    result = collector.result(total_frames, fps, progress.elapsed())
+    if saved is not None:
+        result['resumedFrom'] = start
+    return _with_timings(result, collector.timings, progress.elapsed())
+
+
+def _with_timings(result, timings, elapsed):
+    if timings is not None:
+        result['timings'] = timings.to_dict(elapsed)
+    return result
+
+
+class _TimeLimitReached(Exception):
+    def __init__(self, resume_frame):
+        super().__init__(resume_frame)
+        self.resume_frame = resume_frame
+
+
+# ─── Parallel segments ───────────────────────────────────────────────────────
+# Each pool process loads its own model once and analyzes whole frame ranges;
+# the parent merges the per-segment results in video order.
+
+_segment_model = None
+
+
+def segment_ranges(total_frames, frame_interval, workers):
+    """Split [0, total_frames) into up to `workers` (start, end) frame ranges.
+
+    Starts fall on the sampling grid so every segment samples the same frames
+    a single pass would. The last range is open-ended (end=None) in case the
+    container's frame count is short.
+    """
+    samples = -(-total_frames // frame_interval)  # ceil
+    if workers <= 1 or samples < 2:
+        return [(0, None)]
+    per_segment = -(-samples // min(workers, samples)) * frame_interval
+    starts = list(range(0, total_frames, per_segment))
+    return [(start, end) for start, end in zip(starts, starts[1:] + [None])]
+
+
+def _init_segment_worker(model_path, backend, threads):
+    global _segment_model
+    sys.stdout = open(os.devnull, 'w')  # keep library prints out of the parent's output
+    _segment_model = load_detector(model_path, backend, threads)
+
+
+def _analyze_segment(video_path, start, end, settings, detections_format, fps, timings=False):
+    cap = cv2.VideoCapture(video_path)
+    collector = DetectionCollector(fps, _segment_model.names, None, detections_format)
+    if timings:
+        collector.timings = StageTimings()
+    analyze_range(_segment_model, cap, collector, settings, start, end, path=video_path)
     cap.release()
+    return collector.export(), _segment_model.names, timings and collector.timings.export()
 
-    return {
-        'totalFrames': total_frames,
-        'analyzedFrames': analyzed,
-        'fps': round(fps, 2),
-        'detections': detections,
-        'summary': dict(summary),
-        'alerts': alerts,
-    }
+
+def _analyze_parallel(video_path, model_path, backend, settings, on_event, progress_every,
+                      detections_format, fps, total_frames, segments, timings=False):
+    workers = len(segments)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    # spawn, not fork: torch thread pools do not survive fork reliably
+    context = multiprocessing.get_context('spawn')
+    collector = progress = None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_segment_worker,
+                             initargs=(model_path, backend, threads)) as pool:
+        futures = [
+            pool.submit(_analyze_segment, video_path, start, end, settings, detections_format, fps, timings)
+            for start, end in segments
+        ]
+        for (start, end), future in zip(segments, futures):
+            part, names, part_timings = future.result()
+            if collector is None:
+                collector = DetectionCollector(fps, names, on_event, detections_format)
+                progress = ProgressReporter(on_event, progress_every, fps, total_frames, collector)
+                if timings:
+                    collector.timings = StageTimings()
+            collector.merge(part)
+            if part_timings:
+                collector.timings.merge(part_timings)
+            progress.update((end or total_frames) - 1, force=True)
+
+    return _with_timings(collector.result(total_frames, fps, progress.elapsed()),
+                         collector.timings, progress.elapsed())
+
+
+# ─── Result cache ────────────────────────────────────────────────────────────
+# Results are keyed by video content, model weights and every analysis option
+# that can change the output (see result_cache). Streamed runs are stored as
+# their NDJSON records and replayed on a hit; progress records are not stored.
+
+# Options that only change how a run is carried out or reported, not its result
+UNCACHED_OPTIONS = ('model', 'model_path', 'on_event', 'progress_every',
+                    'checkpoint', 'checkpoint_every', 'resume', 'time_limit', 'timings')
+ANALYSIS_DEFAULTS = {
+    name: param.default
+    for name, param in inspect.signature(analyze_video).parameters.items()
+    if param.default is not inspect.Parameter.empty and name not in UNCACHED_OPTIONS
+}
+
+
+def cached_analyze_video(cache, video_path, run=None, on_event=None, **kwargs):
+    """analyze_video() through a ResultCache.
+
+    kwargs are analyze_video() keyword arguments. run(on_event) performs the
+    analysis on a miss (default: analyze_video with the same arguments), so
+    callers can defer model loading until it is actually needed. Hits carry
+    "cached": true. Runs with timings always execute and are not stored, as
+    their timings describe that run only.
+    """
+    if run is None:
+        def run(events):
+            return analyze_video(video_path, on_event=events, **kwargs)
+    if not os.path.isfile(video_path) or kwargs.get('timings'):
+        return run(on_event)  # nothing to key on (analyze_video reports the error) / must run
+
+    options = {**ANALYSIS_DEFAULTS,
+               **{k: v for k, v in kwargs.items() if k not in UNCACHED_OPTIONS},
+               'stream': on_event is not None}
+    key = cache.key(video_path, kwargs.get('model_path', 'yolov8n.pt'), options)
+
+    if on_event is None:
+        result = cache.get(key)
+        if result is not None:
+            return {**result, 'cached': True}
+        result = run(None)
+        if 'error' not in result and not result.get('partial'):
+            cache.put(key, result)
+        return result
+
+    records = cache.get_records(key)
+    if records is not None:
+        result = None
+        for record in records:
+            if record['event'] == 'summary':
+                result = {k: v for k, v in record.items() if k != 'event'}
+            else:
+                on_event(record)
+        if result is not None:
+            return {**result, 'cached': True}
+
+    writer = cache.record_writer(key)
+
+    def tee(record):
+        if record['event'] != 'progress':
+            writer.write(record)
+        on_event(record)
+
+    try:
+        result = run(tee)
+    except BaseException:
+        writer.abort()
+        raise
+    # A resumed stream only holds the records of its last slice
+    if 'error' in result or result.get('partial') or 'resumedFrom' in result:
+        writer.abort()
+    else:
+        writer.write({'event': 'summary', **result})
+        writer.commit()
+    return result
+
+
+# ─── Worker mode ─────────────────────────────────────────────────────────────
+# Keeps models loaded between jobs so the ultralytics/torch import and weight
+# loading are paid once per process instead of once per video. Jobs arrive as
+# JSON lines on stdin (or a localhost TCP port) and replies are JSON lines:
+#
+#   {"op": "health"}
+#     -> {"op": "health", "status": "ok", "active": 0, "queued": 0, ...}
+#   {"op": "analyze", "id": "abc", "video": "/path.mp4", "interval": 30, "conf": 0.45}
+#     -> {"id": "abc", "type": "accepted"}
+#     -> {"id": "abc", "type": "result", "result": {...}}   (or "type": "error")
+#   With "stream": true, NDJSON records are forwarded while the job runs as
+#     {"id": "abc", "type": "event", "record": {"event": "detection", ...}}
+#   and the final result is the summary record.
+#   "cache": false bypasses the result cache for one job.
+#   "camera": "CAM-01" applies that camera's ROI from the ROI config (see roi.py).
+#   {"op": "cancel", "id": "abc"}
+#     -> the job (queued or running) ends with {"id": "abc", "type": "error", "error": "Cancelled"};
+#        a running job stops at its next inference call or streamed record
+#   {"op": "shutdown"}
+
+# Job fields accepted by the worker and the analyze_video() argument they map to
+JOB_OPTIONS = {
+    'model': 'model_path',
+    'interval': 'frame_interval',
+    'conf': 'confidence',
+    'sampler': 'sampler',
+    'sample_fps': 'sample_fps',
+    'batch_size': 'batch_size',
+    'progress_every': 'progress_every',
+    'detections_format': 'detections_format',
+    'motion_threshold': 'motion_threshold',
+    'motion_refresh': 'motion_refresh',
+    'motion_method': 'motion_method',
+    'adaptive': 'adaptive',
+    'min_interval': 'min_interval',
+    'max_interval': 'max_interval',
+    'track': 'track',
+    'track_iou': 'track_iou',
+    'track_min_hits': 'track_min_hits',
+    'track_max_gap': 'track_max_gap',
+    'checkpoint': 'checkpoint',
+    'checkpoint_every': 'checkpoint_every',
+    'resume': 'resume',
+    'time_limit': 'time_limit',
+    'backend': 'backend',
+    'timings': 'timings',
+    'roi': 'roi',
+    'tile': 'tile_size',
+    'tile_overlap': 'tile_overlap',
+    'tile_full_frame': 'tile_full_frame',
+    'decode_size': 'decode_size',
+}
+
+
+class ModelPool:
+    """Loaded models keyed by model path, reused across jobs.
+
+    A model instance is handed to one job at a time; concurrent jobs on the
+    same weights get their own instance, so the pool never holds more than
+    the worker's concurrency limit per path and backend.
+    """
+
+    def __init__(self):
+        self._idle = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def acquire(self, model_path, backend='torch'):
+        with self._lock:
+            if self._idle[model_path, backend]:
+                return self._idle[model_path, backend].pop()
+        return load_detector(model_path, backend)
+
+    def release(self, model_path, model, backend='torch'):
+        with self._lock:
+            self._idle[model_path, backend].append(model)
+
+    def loaded(self):
+        with self._lock:
+            return sorted(f'{path} ({backend})' for (path, backend), models in self._idle.items() if models)
+
+
+class JobCancelled(Exception):
+    def __init__(self):
+        super().__init__('Cancelled')
+
+
+class _CancellableDetector:
+    """Detector of one worker job: raises JobCancelled once the job is cancelled."""
+
+    def __init__(self, detector, cancelled):
+        self.detector = detector
+        self.names = detector.names
+        self.cancelled = cancelled
+
+    def predict(self, frames, conf=0.25, timings=None):
+        if self.cancelled.is_set():
+            raise JobCancelled()
+        return self.detector.predict(frames, conf, timings)
+
+
+class AnalysisWorker:
+    """Runs analyze jobs from JSON messages with a bounded number in flight."""
+
+    def __init__(self, max_concurrency=1, cache=None):
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.pool = ModelPool()
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.started = time.time()
+        self._active = 0
+        self._queued = 0
+        self._jobs = {}  # job id -> threading.Event set on cancel
+        self._lock = threading.Lock()
+
+    def health(self):
+        with self._lock:
+            active, queued = self._active, self._queued
+        return {
+            'op': 'health',
+            'status': 'ok',
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started, 1),
+            'active': active,
+            'queued': queued,
+            'maxConcurrency': self.max_concurrency,
+            'models': self.pool.loaded(),
+        }
+
+    def handle(self, message, send):
+        """Dispatch one decoded message; replies go through send(dict)."""
+        op = message.get('op', 'analyze')
+        if op == 'health':
+            reply = self.health()
+            if 'id' in message:
+                reply['id'] = message['id']
+            send(reply)
+        elif op == 'analyze':
+            job_id = message.get('id')
+            if not message.get('video'):
+                send({'id': job_id, 'type': 'error', 'error': 'Missing "video"'})
+                return
+            if not os.path.isfile(message['video']):
+                send({'id': job_id, 'type': 'error', 'error': f"Cannot open video: {message['video']}"})
+                return
+            cancelled = threading.Event()
+            with self._lock:
+                self._queued += 1
+                self._jobs[job_id] = cancelled
+            send({'id': job_id, 'type': 'accepted'})
+            self.executor.submit(self._run_job, message, send, cancelled)
+        elif op == 'cancel':
+            with self._lock:
+                cancelled = self._jobs.get(message.get('id'))
+            if cancelled is not None:
+                cancelled.set()
+        else:
+            send({'id': message.get('id'), 'type': 'error', 'error': f'Unknown op: {op}'})
+
+    def _run_job(self, message, send, cancelled):
+        job_id = message.get('id')
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        kwargs = {arg: message[key] for key, arg in JOB_OPTIONS.items() if key in message}
+        on_event = None
+        if message.get('stream'):
+            def on_event(record):
+                if cancelled.is_set():
+                    raise JobCancelled()
+                send({'id': job_id, 'type': 'event', 'record': record})
+        model_path = kwargs.get('model_path', 'yolov8n.pt')
+        backend = kwargs.get('backend', 'torch')
+
+        def run(events):
+            model = self.pool.acquire(model_path, backend)
+            try:
+                return analyze_video(message['video'], model=_CancellableDetector(model, cancelled),
+                                     on_event=events, **kwargs)
+            finally:
+                self.pool.release(model_path, model, backend)
+
+        try:
+            if cancelled.is_set():
+                raise JobCancelled()
+            if message.get('camera') and 'roi' not in kwargs:
+                kwargs['roi'] = camera_roi(message['camera'])
+            if self.cache is not None and message.get('cache', True):
+                result = cached_analyze_video(self.cache, message['video'], run, on_event, **kwargs)
+            else:
+                result = run(on_event)
+            if 'error' in result:
+                send({'id': job_id, 'type': 'error', 'error': result['error']})
+            else:
+                send({'id': job_id, 'type': 'result', 'result': result})
+        except Exception as exc:
+            send({'id': job_id, 'type': 'error', 'error': str(exc)})
+        finally:
+            with self._lock:
+                self._active -= 1
+                if self._jobs.get(job_id) is cancelled:
+                    del self._jobs[job_id]
+
+    def serve_lines(self, lines, send):
+        """Handle JSON lines until EOF or a shutdown message. Returns True on shutdown."""
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                send({'type': 'error', 'error': 'Invalid JSON'})
+                continue
+            if message.get('op') == 'shutdown':
+                return True
+            self.handle(message, send)
+        return False
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+
+def _line_writer(stream):
+    """Return a thread-safe send(dict) that writes one JSON line to stream."""
+    lock = threading.Lock()
+
+    def send(message):
+        data = json.dumps(message) + '\n'
+        with lock:
+            try:
+                stream.write(data)
+                stream.flush()
+            except (OSError, ValueError):
+                pass  # client went away
+
+    return send
+
+
+def run_worker(max_concurrency=1, port=None, cache=None):
+    """Serve analysis jobs on stdin/stdout, or on 127.0.0.1:port if given.
+
+    Jobs go through cache (a ResultCache) unless it is None or the job
+    sets "cache": false.
+    """
+    # Library prints must never reach the protocol stream
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    worker = AnalysisWorker(max_concurrency, cache)
+
+    if port is None:
+        worker.serve_lines(sys.stdin, _line_writer(out))
+        worker.close()
+        return
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            stream = self.connection.makefile('w', encoding='utf-8')
+            lines = (raw.decode('utf-8') for raw in self.rfile)
+            if worker.serve_lines(lines, _line_writer(stream)):
+                threading.Thread(target=server.shutdown, daemon=True).start()
+
+    socketserver.ThreadingTCPServer.allow_reuse_address = True
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', port), Handler)
+    server.daemon_threads = True
+    print(f'[INFO] Analysis worker listening on 127.0.0.1:{server.server_address[1]}', file=sys.stderr)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        worker.close()
 
 
 def main():
     parser = argparse.ArgumentParser(description='Analyze video with YOLOv8')
-    parser.add_argument('video', help='Path to video file')
+    parser.add_argument('video', nargs='?', help='Path to video file')
     parser.add_argument('--model', default='yolov8n.pt', help='YOLOv8 model path')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch',
+                        help='torch (.pt), or onnxruntime / openvino for an exported model')
     parser.add_argument('--interval', type=int, default=30, help='Analyze every N-th frame')
     parser.add_argument('--conf', type=float, default=0.45, help='Confidence threshold')
+    parser.add_argument('--sample-fps', type=float, default=None,
+                        help='Analyze this many frames per second of video (overrides --interval)')
+    parser.add_argument('--sampler', choices=SAMPLING_STRATEGIES, default='grab',
+                        help='Frame skipping strategy: grab (default), seek (long intervals) or read')
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help='Number of sampled frames per inference call')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Split the video into N segments analyzed in parallel processes')
+    parser.add_argument('--motion-threshold', type=float, default=None,
+                        help='Skip inference on sampled frames with less than this fraction of changed pixels')
+    parser.add_argument('--motion-refresh', type=int, default=10,
+                        help='Motion gate: force inference after N consecutive skipped frames (0 = never)')
+    parser.add_argument('--motion-method', choices=MOTION_METHODS, default='diff',
+                        help='Motion gate: frame differencing or MOG2 background subtraction')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adapt the sampling stride to detections (starts at --interval)')
+    parser.add_argument('--min-interval', type=int, default=None,
+                        help='Adaptive: stride around new detections (default: interval / 5)')
+    parser.add_argument('--max-interval', type=int, default=None,
+                        help='Adaptive: widest stride on quiet stretches (default: interval * 4)')
+    parser.add_argument('--track', action='store_true',
+                        help='Collapse detections into tracks and raise one alert per threat track')
+    parser.add_argument('--track-iou', type=float, default=0.3,
+                        help='Tracking: minimum IoU to continue a track')
+    parser.add_argument('--track-min-hits', type=int, default=1,
+                        help='Tracking: matches before a track is reported')
+    parser.add_argument('--track-max-gap', type=int, default=None,
+                        help='Tracking: frames without a match before a track ends (default: 3 strides)')
+    parser.add_argument('--checkpoint', default=None,
+                        help='Checkpoint the partial results to this file '
+                             f'(every {DEFAULT_CHECKPOINT_EVERY}s unless --checkpoint-every is given)')
+    parser.add_argument('--checkpoint-every', type=float, default=None,
+                        help='Seconds between checkpoints of the partial results (default: off; '
+                             'file: --checkpoint or <video>.checkpoint.json)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint of an interrupted or time-limited run')
+    parser.add_argument('--time-limit', type=float, default=None,
+                        help='Checkpoint and stop after this many seconds (resume with --resume)')
+    parser.add_argument('--camera', default=None,
+                        help="Only analyze this camera's ROI polygons (see roi.py)")
+    parser.add_argument('--roi-config', default=DEFAULT_ROI_CONFIG,
+                        help='ROI config file with per-camera polygons')
+    parser.add_argument('--tile', type=int, default=None, metavar='SIZE',
+                        help='Tiled inference with SIZE-pixel tiles, for small objects in high-res video')
+    parser.add_argument('--tile-overlap', type=float, default=0.2,
+                        help='Fraction of a tile shared with its neighbour (default: 0.2)')
+    parser.add_argument('--tile-full-frame', action='store_true',
+                        help='Also run a low-resolution pass over the whole frame (or ROI) with the tiles')
+    parser.add_argument('--decode-size', type=int, default=None, metavar='SIZE',
+                        help="Shrink frames to SIZE pixels on the long side while decoding, e.g. the "
+                             "model's input size (boxes stay in original coordinates)")
+    parser.add_argument('--output-format', choices=('json', 'ndjson'), default='json',
+                        help='json: one document at the end; ndjson: stream records as they happen')
+    parser.add_argument('--detections-format', choices=('records', 'columnar'), default='records',
+                        help='records: one object per box; columnar: parallel arrays per field')
+    parser.add_argument('--progress-every', type=float, default=1.0,
+                        help='ndjson: seconds between progress records')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always run the analysis instead of reusing a cached result')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help='Directory of the result cache')
+    parser.add_argument('--cache-max-mb', type=float, default=1024,
+                        help='Evict least recently used results beyond this size')
+    parser.add_argument('--worker', action='store_true',
+                        help='Run as a long-lived worker reading JSON-line jobs from stdin')
+    parser.add_argument('--port', type=int, default=None,
+                        help='Worker mode: listen on 127.0.0.1:PORT instead of stdin')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Worker mode: maximum number of videos analyzed at once')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Report import, model-load and warm-up times on stderr and as "startup" '
+                             'in the result')
+    parser.add_argument('--timings', action='store_true',
+                        help='Add per-stage timings and histograms to the result as "timings" '
+                             '(always runs; bypasses the cache)')
+    parser.add_argument('--profile', metavar='FILE', default=None,
+                        help='Profile the analysis and write the profile to FILE')
+    parser.add_argument('--profiler', choices=('cprofile', 'pyinstrument'), default='cprofile',
+                        help='cProfile stats file (view with pstats/snakeviz) or pyinstrument HTML')
     args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error('--batch-size must be >= 1')
+    if args.workers < 1:
+        parser.error('--workers must be >= 1')
+    if args.time_limit is not None and args.time_limit <= 0:
+        parser.error('--time-limit must be positive')
+    if args.checkpoint and args.checkpoint_every is None:
+        args.checkpoint_every = DEFAULT_CHECKPOINT_EVERY
+    if args.tile is not None and args.tile < 32:
+        parser.error('--tile must be >= 32')
+    if not 0 <= args.tile_overlap < 1:
+        parser.error('--tile-overlap must be in [0, 1)')
+    if args.decode_size is not None and args.decode_size < 32:
+        parser.error('--decode-size must be >= 32')
+    if args.decode_size and args.tile:
+        parser.error('--decode-size cannot be combined with --tile')
+    for name in ('min_interval', 'max_interval'):
+        if getattr(args, name) is not None and getattr(args, name) < 1:
+            parser.error(f"--{name.replace('_', '-')} must be >= 1")
+
+    if args.worker:
+        if args.concurrency < 1:
+            parser.error('--concurrency must be >= 1')
+        cache = None if args.no_cache else ResultCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+        run_worker(args.concurrency, args.port, cache)
+        return
+    if not args.video:
+        parser.error('the following arguments are required: video')
+    if args.profile and args.profiler == 'pyinstrument':
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            parser.error('--profiler pyinstrument needs pyinstrument (pip install pyinstrument)')
+    roi = None
+    if args.camera:
+        try:
+            roi = camera_roi(args.camera, args.roi_config)
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            parser.error(f'--camera: {exc}')
 
     # Redirect stdout to devnull during analysis to suppress any library prints
     real_stdout = sys.stdout
     sys.stdout = open(os.devnull, 'w')
+
+    # JSON encoding is the one stage analyze_video() cannot see
+    serialize_timings = StageTimings() if args.timings else None
+
+    def encode(record):
+        if serialize_timings is None:
+            return json.dumps(record)
+        with serialize_timings.stage('serialize'):
+            return json.dumps(record)
+
+    def emit(record):
+        real_stdout.write(encode(record) + '\n')
+        real_stdout.flush()
+
+    streaming = args.output_format == 'ndjson'
+    options = {
+        'model_path': args.model,
+        'backend': args.backend,
+        'frame_interval': args.interval,
+        'confidence': args.conf,
+        'sampler': args.sampler,
+        'sample_fps': args.sample_fps,
+        'batch_size': args.batch_size,
+        'progress_every': args.progress_every,
+        'detections_format': args.detections_format,
+        'workers': args.workers,
+        'motion_threshold': args.motion_threshold,
+        'motion_refresh': args.motion_refresh,
+        'motion_method': args.motion_method,
+        'adaptive': args.adaptive,
+        'min_interval': args.min_interval,
+        'max_interval': args.max_interval,
+        'track': args.track,
+        'track_iou': args.track_iou,
+        'track_min_hits': args.track_min_hits,
+        'track_max_gap': args.track_max_gap,
+        'checkpoint': args.checkpoint,
+        'checkpoint_every': args.checkpoint_every,
+        'resume': args.resume,
+        'time_limit': args.time_limit,
+        'timings': args.timings,
+        'roi': roi,
+        'tile_size': args.tile,
+        'tile_overlap': args.tile_overlap,
+        'tile_full_frame': args.tile_full_frame,
+        'decode_size': args.decode_size,
+    }
+    on_event = emit if streaming else None
+    profile = StartupProfile(imports=IMPORT_SECONDS) if args.profile_startup else None
+
+    def run(events):
+        model = None
+        if profile is not None and args.workers == 1 and os.path.isfile(args.video):
+            # Load up front so it can be timed; segment workers load their own copies
+            model = profile.load_detector(args.model, args.backend)
+        return analyze_video(args.video, model=model, on_event=events, **options)
+
+    def analyze():
+        if args.no_cache:
+            return run(on_event)
+        cache = ResultCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+        return cached_analyze_video(cache, args.video, run=run, on_event=on_event, **options)
+
     try:
-        result = analyze_video(args.video, args.model, args.interval, args.conf)
+        if args.profile:
+            result = _run_profiled(analyze, args.profiler, args.profile)
+        else:
+            result = analyze()
     finally:
         sys.stdout.close()
         sys.stdout = real_stdout
 
-    # Only this final print goes to real stdout
-    print(json.dumps(result))
+    if profile is not None:
+        profile.report()
+        result['startup'] = profile.to_dict()
+
+    if 'timings' in result:
+        if not streaming:
+            encode(result)  # measure the final encoding, then report it with the rest
+        serialize = serialize_timings.to_dict()['stages'].get('serialize')
+        if serialize is not None:
+            result['timings']['stages']['serialize'] = serialize
+
+    # Only these prints go to real stdout
+    if not streaming:
+        print(json.dumps(result))
+    elif 'error' in result:
+        emit({'event': 'error', **result})
+    elif result.get('partial'):
+        emit({'event': 'partial', **result})
+    else:
+        emit({'event': 'summary', **result})
+
+
+def _run_profiled(func, profiler, path):
+    """Run func() under cProfile or pyinstrument and write the profile to path."""
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        session = Profiler()
+        session.start()
+        try:
+            return func()
+        finally:
+            session.stop()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(session.output_html())
+            print(f'Profile written to {path}', file=sys.stderr)
+
+    import cProfile
+    session = cProfile.Profile()
+    try:
+        return session.runcall(func)
+    finally:
+        session.dump_stats(path)
+        print(f'Profile written to {path} (python -m pstats {path})', file=sys.stderr)
 
 
 if __name__ == '__main__':
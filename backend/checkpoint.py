@@ -0,0 +1,87 @@
+"""
+Analysis Checkpoints
+====================
+Sidecar file holding the partial state of a long analysis, so a run that
+crashes, times out or is deliberately time-boxed can resume where it stopped
+instead of starting over.
+
+The file is JSON, replaced atomically on every save so a crash mid-write
+leaves the previous checkpoint intact:
+    { "signature": {...}, "state": {...} }
+
+The signature identifies the video content, weights and options the state
+belongs to; a checkpoint whose signature does not match the current run is
+ignored.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+DEFAULT_EVERY = 30  # seconds between checkpoints when only a checkpoint file is given
+
+
+class Checkpointer:
+    """Decides when to checkpoint and reads/writes the sidecar file.
+
+    Args:
+        path:       Sidecar file path.
+        signature:  JSON-serializable dict identifying the run.
+        every:      Seconds between periodic checkpoints (None/0 = only on stop).
+        time_limit: Seconds after which the run should checkpoint and stop (None = no limit).
+    """
+
+    def __init__(self, path, signature, every=None, time_limit=None):
+        self.path = path
+        self.signature = json.loads(json.dumps(signature))  # normalize tuples etc.
+        self.every = every
+        self.time_limit = time_limit
+        self.started = time.perf_counter()
+        self.last_save = self.started
+
+    def load(self):
+        """Return the saved state, or None if there is no usable checkpoint."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            print(f'[WARN] Ignoring unreadable checkpoint {self.path}: {exc}', file=sys.stderr)
+            return None
+        if data.get('signature') != self.signature:
+            print(f'[WARN] Ignoring checkpoint {self.path}: it belongs to a different video or options',
+                  file=sys.stderr)
+            return None
+        return data['state']
+
+    def due(self):
+        return bool(self.every) and time.perf_counter() - self.last_save >= self.every
+
+    def expired(self):
+        return self.time_limit is not None and time.perf_counter() - self.started >= self.time_limit
+
+    def save(self, state):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.checkpoint-', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'signature': self.signature, 'state': state}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        self.last_save = time.perf_counter()
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
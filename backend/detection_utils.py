@@ -0,0 +1,50 @@
+"""
+Detection Helpers
+=================
+Converts an Ultralytics `Results` object into plain NumPy arrays in one
+step, instead of indexing `box.cls[0]`, `box.conf[0]` and `box.xyxy[0]`
+(one tensor index and host copy each) for every box.
+
+Usage:
+    from detection_utils import result_to_arrays
+
+    dets = result_to_arrays(result)
+    for (x1, y1, x2, y2), conf, cls_id in zip(dets.xyxy.astype(int).tolist(),
+                                             dets.conf.tolist(), dets.cls.tolist()):
+        ...
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+# xyxy: (N, 4) float32, conf: (N,) float32, cls: (N,) int64
+Detections = namedtuple('Detections', ['xyxy', 'conf', 'cls'])
+
+
+def empty_detections():
+    """Return a Detections tuple with no boxes."""
+    return Detections(
+        np.zeros((0, 4), dtype=np.float32),
+        np.zeros((0,), dtype=np.float32),
+        np.zeros((0,), dtype=np.int64),
+    )
+
+
+def result_to_arrays(result):
+    """Return the boxes of one Results object as a Detections tuple of arrays."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+
+    # boxes.data is (N, 6) [x1, y1, x2, y2, conf, cls], or (N, 7) with a
+    # track id before conf; a single transfer covers all three fields
+    data = boxes.data
+    if hasattr(data, 'cpu'):
+        data = data.cpu().numpy()
+    data = np.asarray(data)
+    return Detections(
+        data[:, :4].astype(np.float32, copy=False),
+        data[:, -2].astype(np.float32, copy=False),
+        data[:, -1].astype(np.int64),
+    )
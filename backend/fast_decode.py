@@ -0,0 +1,208 @@
+"""
+Resolution-Aware Decode
+=======================
+Hands the detector frames that are already close to its input size instead
+of full 1080p / 4K frames, which it would only letterbox down to 640 anyway.
+
+With PyAV installed (optional, `pip install av`), sampled frames of a video
+file are scaled as part of the decode: the decoder's YUV output goes
+through one swscale pass (bilinear) that converts it to BGR at inference
+size, so no full-size BGR frame is ever produced, and unsampled frames are
+decoded but never converted. Without PyAV (or for cameras) OpenCV decodes
+every sampled frame into one reused full-size BGR array (see
+frame_sampler's reuse=True) and it is shrunk right away (INTER_LINEAR, as
+the letterbox would). Either way the small frames land in a ring of
+preallocated buffers (a frame already small enough is copied there), so
+batches, the motion gate and the detector only ever touch the small copy.
+Its long side equals the model's input size, so the detector's letterbox
+only pads it. DownscaledDetector maps the boxes back to the coordinates of
+the original frame. The two decoders scale slightly differently, so
+confidences can differ in the last digits between them.
+
+Usage:
+    from fast_decode import Downscaler, DownscaledDetector, iter_downscaled_frames
+
+    downscaler = Downscaler(640, buffers=batch_size + 1)
+    detector = DownscaledDetector(load_detector('yolov8n.pt'), 640, downscaler)
+    for frame_idx, small in iter_downscaled_frames(cap, 30, downscaler, path=video_path):
+        detector.predict([small])   # boxes in original frame coordinates
+
+    # or let the wrapper shrink full-size frames itself (webcam loop)
+    detector = DownscaledDetector(load_detector('yolov8n.pt'), 640)
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from detection_utils import Detections
+from frame_sampler import iter_sampled_frames
+
+DEFAULT_SIZE = 640
+
+
+def scaled_decode_available():
+    """True if PyAV is installed, so video files can be scaled while decoding."""
+    try:
+        import av  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def inference_shape(shape, size):
+    """(h, w) of a frame of shape (h, w, ...) scaled so its long side is size; never upscales."""
+    h, w = shape[:2]
+    ratio = min(size / max(h, w), 1.0)
+    return max(1, int(round(h * ratio))), max(1, int(round(w * ratio)))
+
+
+def rescale(dets, scale):
+    """Detections with boxes multiplied by scale = (sx, sy)."""
+    if scale is None or not len(dets.conf):
+        return dets
+    sx, sy = scale
+    return Detections(dets.xyxy * np.array([sx, sy, sx, sy], dtype=dets.xyxy.dtype), dets.conf, dets.cls)
+
+
+class Downscaler:
+    """Shrinks the frames of one source into a ring of reused buffers.
+
+    A buffer is overwritten `buffers` frames later, so the ring must be at
+    least as large as the number of frames the caller holds at once (e.g.
+    the batch size plus one). The buffers are (re)allocated from the first
+    frame, and again if the source's frame size changes.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE, buffers=2):
+        self.size = size
+        self.count = max(1, buffers)
+        self.source_shape = None
+        self.shape = None
+        self.scale = None    # (sx, sy) from the small frame back to the source, None if unscaled
+        self.buffers = []
+        self._next = 0
+
+    def _prepare(self, shape):
+        self.source_shape = shape
+        self.shape = inference_shape(shape, self.size)
+        h, w = shape
+        sh, sw = self.shape
+        self.scale = (w / sw, h / sh) if self.shape != shape else None
+        self.buffers = [np.empty((sh, sw, 3), np.uint8) for _ in range(self.count)]
+        self._next = 0
+
+    def next_buffer(self, source_shape):
+        """The next ring buffer for a frame of source_shape (h, w), at inference size."""
+        if source_shape != self.source_shape:
+            self._prepare(source_shape)
+        out = self.buffers[self._next]
+        self._next = (self._next + 1) % self.count
+        return out
+
+    def __call__(self, frame):
+        """The frame at inference size, in the next ring buffer.
+
+        A frame that is already small is copied as it is: the decoder
+        overwrites its array with the next frame while this one may still
+        be waiting in a batch.
+        """
+        out = self.next_buffer(frame.shape[:2])
+        if self.scale is None:
+            np.copyto(out, frame)
+            return out
+        return cv2.resize(frame, (self.shape[1], self.shape[0]), dst=out, interpolation=cv2.INTER_LINEAR)
+
+    def owns(self, frame):
+        """True if frame is one of this downscaler's buffers."""
+        return any(frame is buffer for buffer in self.buffers)
+
+
+def iter_downscaled_frames(cap, frame_interval, downscaler, strategy='grab', start=0, end=None, path=None):
+    """iter_sampled_frames() yielding (frame_idx, small frame) in downscaler's buffers.
+
+    With path (the file cap reads) and PyAV installed the frames are scaled
+    while decoding (see iter_scaled_decode) and strategy is not used;
+    otherwise OpenCV decodes into a reused array that is shrunk afterwards.
+    """
+    if path is not None and scaled_decode_available():
+        yield from iter_scaled_decode(path, frame_interval, downscaler, start, end)
+        return
+    for frame_idx, frame in iter_sampled_frames(cap, frame_interval, strategy, start, end, reuse=True):
+        yield frame_idx, downscaler(frame)
+
+
+def iter_scaled_decode(path, frame_interval, downscaler, start=0, end=None):
+    """(frame_idx, small frame) of every frame_interval-th frame of a video file, via PyAV.
+
+    Only sampled frames are converted, each by one swscale pass straight
+    from the decoder's pixel format to BGR at downscaler's size. A start
+    frame is reached by seeking to the keyframe before it; frame indices
+    then come from the frames' timestamps.
+    """
+    import av
+
+    with av.open(path) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = 'AUTO'
+        rate = stream.average_rate
+        origin = stream.start_time or 0
+        frame_idx = 0
+        if start > 0 and rate:
+            container.seek(origin + int(start / rate / stream.time_base), stream=stream)
+            frame_idx = None
+        for frame in container.decode(stream):
+            if frame_idx is None:
+                frame_idx = int(round((frame.pts - origin) * stream.time_base * rate))
+            if end is not None and frame_idx >= end:
+                break
+            if frame_idx >= start and frame_idx % frame_interval == 0:
+                out = downscaler.next_buffer((frame.height, frame.width))
+                out[...] = frame.to_ndarray(width=out.shape[1], height=out.shape[0], format='bgr24',
+                                            interpolation='BILINEAR')
+                yield frame_idx, out
+            frame_idx += 1
+
+
+class DownscaledDetector:
+    """Detector wrapper that infers at about size pixels and returns full-frame boxes.
+
+    Frames that come from downscaler (the decode path) are passed through
+    as they are; any other frame is shrunk here, into buffers reused from
+    call to call, and that resize is recorded as preprocessing.
+    """
+
+    def __init__(self, detector, size=DEFAULT_SIZE, downscaler=None):
+        self.detector = detector
+        self.names = detector.names
+        self.size = size
+        self.downscaler = downscaler
+        self._buffers = {}  # (batch position, h, w) -> buffer
+
+    def predict(self, frames, conf=0.25, timings=None):
+        start = time.perf_counter()
+        small, scales = [], []
+        for i, frame in enumerate(frames):
+            if self.downscaler is not None and self.downscaler.owns(frame):
+                small.append(frame)
+                scales.append(self.downscaler.scale)
+                continue
+            h, w = frame.shape[:2]
+            sh, sw = inference_shape(frame.shape, self.size)
+            if (sh, sw) == (h, w):
+                small.append(frame)
+                scales.append(None)
+                continue
+            key = (i, sh, sw)
+            if key not in self._buffers:
+                self._buffers[key] = np.empty((sh, sw, 3), np.uint8)
+            small.append(cv2.resize(frame, (sw, sh), dst=self._buffers[key], interpolation=cv2.INTER_LINEAR))
+            scales.append((w / sw, h / sh))
+        if timings is None:
+            detections = self.detector.predict(small, conf)
+        else:
+            # the resize is preprocessing; its frames are counted by the detector
+            timings.add('preprocess', time.perf_counter() - start, 0)
+            detections = self.detector.predict(small, conf, timings=timings)
+        return [rescale(dets, scale) for dets, scale in zip(detections, scales)]
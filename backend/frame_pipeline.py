@@ -0,0 +1,109 @@
+"""
+Frame Pipeline Helpers
+======================
+Small thread-safe building blocks for live capture -> inference -> display
+pipelines, where only the newest frame matters and anything older is stale.
+
+    LatestValue - single-slot buffer: put() replaces an unread item instead
+                  of blocking or queueing, and counts the replaced items
+    RateMeter   - events per second over a sliding window
+    prefetch    - ordered read-ahead of files (or anything else slow to load)
+                  on a thread pool, for batch jobs
+"""
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class LatestValue:
+    """Single-slot buffer that always holds the newest item.
+
+    put() never blocks; an item nobody read yet is replaced and counted in
+    `dropped`. get() blocks until an item is available, the timeout expires
+    (returns None) or close() is called (returns None).
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._full = False
+        self.closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._full:
+                self.dropped += 1
+            self._item = item
+            self._full = True
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._full or self.closed, timeout)
+            if not self._full:
+                return None
+            item, self._item, self._full = self._item, None, False
+            return item
+
+    def get_nowait(self):
+        return self.get(timeout=0)
+
+    def close(self):
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class RateMeter:
+    """Events per second over the last `window` seconds."""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self._times = deque()
+        self._lock = threading.Lock()
+
+    def tick(self, now=None):
+        now = time.perf_counter() if now is None else now
+        with self._lock:
+            self._times.append(now)
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+
+    @property
+    def rate(self):
+        now = time.perf_counter()
+        with self._lock:
+            while self._times and now - self._times[0] > self.window:
+                self._times.popleft()
+            if len(self._times) < 2:
+                return 0.0
+            span = self._times[-1] - self._times[0]
+            return (len(self._times) - 1) / span if span > 0 else 0.0
+
+
+_EXHAUSTED = object()
+
+
+def prefetch(items, load, workers, lookahead):
+    """Yield (item, load(item)) in order while up to `lookahead` loads run in a thread pool.
+
+    Exceptions raised by load() are re-raised when their item is reached.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        remaining = iter(items)
+        for item in remaining:
+            pending.append((item, pool.submit(load, item)))
+            if len(pending) >= lookahead:
+                break
+        while pending:
+            item, future = pending.popleft()
+            next_item = next(remaining, _EXHAUSTED)
+            if next_item is not _EXHAUSTED:
+                pending.append((next_item, pool.submit(load, next_item)))
+            yield item, future.result()
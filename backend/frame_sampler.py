@@ -0,0 +1,86 @@
+"""
+Frame Sampling for Video Analysis
+=================================
+Yields only the frames that will be run through the detector, without
+paying the BGR conversion (or, with seeking, the decode) for the frames
+in between.
+
+Strategies:
+    read  - cap.read() every frame and drop the unsampled ones (original loop)
+    grab  - cap.grab() every frame, cap.retrieve() only the sampled ones
+    seek  - jump straight to each sampled frame with CAP_PROP_POS_FRAMES;
+            only pays off when the interval is longer than the keyframe
+            distance (GOP) of the file
+
+All strategies yield the same (frame_idx, frame) pairs as the original
+`frame_idx % frame_interval == 0` loop. A start/end frame range restricts
+sampling to one segment of the video (used for parallel analysis); start
+should be a multiple of frame_interval to keep the same sampling grid.
+
+With reuse=True every frame is decoded into the array of the previous one
+instead of a newly allocated one (see fast_decode), so the caller must be
+done with a frame before asking for the next.
+"""
+
+import cv2
+
+SAMPLING_STRATEGIES = ('read', 'grab', 'seek')
+
+
+def interval_for_sample_fps(fps, sample_fps):
+    """Convert a target sampling rate (frames/s) to a frame interval."""
+    if sample_fps <= 0:
+        raise ValueError('sample_fps must be positive')
+    return max(1, int(round(fps / sample_fps)))
+
+
+def iter_sampled_frames(cap, frame_interval, strategy='grab', start=0, end=None, reuse=False):
+    """Yield (frame_idx, frame) for every frame_interval-th frame of cap.
+
+    Frames before start are skipped with a seek; iteration stops before
+    frame end (or at the end of the video when end is None).
+    """
+    if frame_interval < 1:
+        raise ValueError('frame_interval must be >= 1')
+    if strategy not in SAMPLING_STRATEGIES:
+        raise ValueError(f'Unknown sampling strategy: {strategy}')
+
+    if start > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    if strategy == 'seek':
+        yield from _iter_seek(cap, frame_interval, start, end, reuse)
+        return
+
+    frame_idx = start
+    frame = None
+    while end is None or frame_idx < end:
+        if strategy == 'read':
+            ret, frame = cap.read(frame if reuse else None)
+            if not ret:
+                break
+            if frame_idx % frame_interval == 0:
+                yield frame_idx, frame
+        else:
+            if not cap.grab():
+                break
+            if frame_idx % frame_interval == 0:
+                ret, frame = cap.retrieve(frame if reuse else None)
+                if not ret:
+                    break
+                yield frame_idx, frame
+        frame_idx += 1
+
+
+def _iter_seek(cap, frame_interval, start, end, reuse):
+    frame_idx = start
+    frame = None
+    while end is None or frame_idx < end:
+        # Consecutive frames need no seek; only jump over real gaps
+        if frame_interval > 1 and frame_idx > start:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+        ret, frame = cap.read(frame if reuse else None)
+        if not ret:
+            break
+        yield frame_idx, frame
+        frame_idx += frame_interval
@@ -0,0 +1,238 @@
+"""
+Preprocessed Image Store
+========================
+Training on the CPU re-decodes and resizes the same JPEGs every epoch. This
+store does that once: every dataset image is decoded and resized exactly as
+ultralytics' load_image() would (long side to imgsz, INTER_LINEAR), and the
+results are packed back to back into one uint8 file that training reads
+through np.memmap, so an epoch only pays for a memory copy per image.
+
+Layout of the store directory:
+    images-<n>.u8   all images (HWC, BGR, uint8) back to back
+    index.json      { "version": 1, "imgsz": 640, "data": "images-<n>.u8",
+                      "entries": { "<image path>": { "sha256": ..., "size": ..., "mtime": ...,
+                                                     "offset": ..., "shape": [h, w, 3], "hw0": [h0, w0] } } }
+
+build() keeps an entry while its file's size and mtime are unchanged,
+re-hashes the file when they changed, and only decodes it again when the
+SHA-256 differs (or imgsz changed). Any change writes a new data file
+(reused images are copied over from the old one, new ones decoded on a
+thread pool) and then swaps the index atomically, so readers never see a
+half-written store.
+
+use_image_store() plugs a store into an ultralytics dataset built by a
+trainer or validator: its load_image() is wrapped to read from the store,
+keeping the mosaic buffer bookkeeping of the original, and falls back to
+the original for images the store does not hold or other resize modes.
+
+Usage:
+    store = ImageStore('dataset/image_store', imgsz=640)
+    store.build(image_paths)          # cheap when nothing changed
+    image, hw0 = store.get(path)      # writable copy, or None if not stored
+
+    dataset = use_image_store(trainer_dataset, store)
+"""
+
+import os
+import json
+import math
+import hashlib
+
+import cv2
+import numpy as np
+
+from frame_pipeline import prefetch
+
+INDEX_NAME = 'index.json'
+INDEX_VERSION = 1
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+
+def image_files(directory):
+    """Sorted image paths below directory (recursive, like ultralytics)."""
+    found = []
+    for root, _, files in os.walk(directory):
+        found.extend(os.path.join(root, name) for name in files if name.lower().endswith(IMAGE_EXTENSIONS))
+    return sorted(found)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_resized(path, imgsz):
+    """(image, (h0, w0)) resized like ultralytics' load_image(rect_mode=True), or None."""
+    image = cv2.imdecode(np.fromfile(path, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None
+    h0, w0 = image.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz)
+        image = cv2.resize(image, (w, h), interpolation=cv2.INTER_LINEAR)
+    return image, (h0, w0)
+
+
+class ImageStore:
+    """Memory-mapped store of resized dataset images (see module docstring)."""
+
+    def __init__(self, directory, imgsz=640):
+        self.directory = directory
+        self.imgsz = imgsz
+        self.index = self._load_index()
+        self._data = None  # np.memmap, opened lazily in every process
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_NAME), encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if index.get('version') != INDEX_VERSION or index.get('imgsz') != self.imgsz:
+            return None
+        return index
+
+    def __getstate__(self):
+        # dataloader workers open their own mapping instead of pickling its contents
+        state = self.__dict__.copy()
+        state['_data'] = None
+        return state
+
+    def __len__(self):
+        return len(self.index['entries']) if self.index else 0
+
+    def _mapped(self):
+        if self._data is None:
+            path = os.path.join(self.directory, self.index['data'])
+            self._data = np.memmap(path, dtype=np.uint8, mode='r') if os.path.getsize(path) else np.zeros(0, np.uint8)
+        return self._data
+
+    def get(self, path):
+        """(writable copy of the resized image, (h0, w0)) for path, or None if it is not stored."""
+        entry = self.index['entries'].get(os.path.abspath(path)) if self.index else None
+        if entry is None:
+            return None
+        size = int(np.prod(entry['shape']))
+        view = self._mapped()[entry['offset']:entry['offset'] + size]
+        return view.reshape(entry['shape']).copy(), tuple(entry['hw0'])
+
+    def build(self, paths, workers=None):
+        """Bring the store up to date with paths; returns counts of reused/decoded/removed images."""
+        paths = [os.path.abspath(path) for path in paths]
+        old = self.index['entries'] if self.index else {}
+        workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+        # Reuse entries whose file is unchanged (stat first, hash only when that differs)
+        stats = {path: os.stat(path) for path in paths}
+        reused, suspects = {}, []
+        for path in paths:
+            entry, stat = old.get(path), stats[path]
+            if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+                reused[path] = entry
+            else:
+                suspects.append(path)
+        hashes = {path: sha for path, sha in prefetch(suspects, file_sha256, workers, workers * 2)}
+        for path in suspects:
+            entry = old.get(path)
+            if entry is not None and entry['sha256'] == hashes[path]:
+                reused[path] = entry  # touched, same content
+        removed = len(set(old) - set(paths))
+        decode = [path for path in paths if path not in reused]
+        result = {'reused': len(reused), 'decoded': 0, 'unreadable': 0, 'removed': removed}
+        if self.index is not None and not decode and not removed and len(reused) == len(old):
+            if suspects:  # only timestamps changed: refresh them
+                for path in suspects:
+                    self.index['entries'][path].update(size=stats[path].st_size, mtime=stats[path].st_mtime)
+                self._write_index(self.index)
+            return result
+
+        # Write a new data file: reused images copied from the old mapping, new ones decoded in parallel
+        os.makedirs(self.directory, exist_ok=True)
+        generation = int(self.index['data'][len('images-'):-len('.u8')]) + 1 if self.index else 0
+        data_name = f'images-{generation}.u8'
+        old_data = self._mapped() if self.index else None
+        entries = {}
+        offset = 0
+        decoded = dict.fromkeys(decode)
+        loaded = prefetch(decode, lambda path: load_resized(path, self.imgsz), workers, workers * 2)
+        with open(os.path.join(self.directory, data_name), 'wb') as out:
+            for path in paths:
+                stat = stats[path]
+                if path in decoded:
+                    _, item = next(loaded)
+                    if item is None:
+                        result['unreadable'] += 1
+                        continue
+                    image, hw0 = item
+                    block = np.ascontiguousarray(image).reshape(-1)
+                    entry = {'sha256': hashes.get(path) or file_sha256(path), 'hw0': list(hw0),
+                             'shape': list(image.shape)}
+                    result['decoded'] += 1
+                else:
+                    entry = dict(reused[path])
+                    block = old_data[entry['offset']:entry['offset'] + int(np.prod(entry['shape']))]
+                out.write(block.tobytes())
+                entry.update(offset=offset, size=stat.st_size, mtime=stat.st_mtime)
+                entries[path] = entry
+                offset += block.size
+
+        self._data = None
+        self.index = {'version': INDEX_VERSION, 'imgsz': self.imgsz, 'data': data_name, 'entries': entries}
+        self._write_index(self.index)
+        for name in os.listdir(self.directory):  # the previous generation (or one of another imgsz)
+            if name.startswith('images-') and name.endswith('.u8') and name != data_name:
+                os.remove(os.path.join(self.directory, name))
+        return result
+
+    def _write_index(self, index):
+        path = os.path.join(self.directory, INDEX_NAME)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp, path)
+
+
+# ─── ultralytics datasets ───
+
+class StoredImageLoader:
+    """load_image() for an ultralytics dataset that reads its images from an ImageStore.
+
+    Only the plain load_image(i) call (long side to imgsz, the one the
+    detection datasets make) is served from the store, and only for images
+    it holds; every other call goes to the dataset's own load_image() with
+    the same arguments.
+    """
+
+    def __init__(self, dataset, store):
+        self.dataset = dataset
+        self.store = store
+
+    def __call__(self, i, *args, **kwargs):
+        dataset = self.dataset
+        stored = None
+        if (not args and not kwargs and dataset.ims[i] is None and dataset.imgsz == self.store.imgsz
+                and getattr(dataset, 'channels', 3) == 3):
+            stored = self.store.get(dataset.im_files[i])
+        if stored is None:
+            return type(dataset).load_image(dataset, i, *args, **kwargs)
+
+        image, hw0 = stored
+        buffer = getattr(dataset, 'buffer', None)
+        if dataset.augment and buffer is not None and dataset.cache != 'ram':
+            # same buffer as the original: mosaic draws its extra images from it
+            dataset.ims[i], dataset.im_hw0[i], dataset.im_hw[i] = image, hw0, image.shape[:2]
+            buffer.append(i)
+            if 1 < len(buffer) >= dataset.max_buffer_length:
+                j = buffer.pop(0)
+                dataset.ims[j], dataset.im_hw0[j], dataset.im_hw[j] = None, None, None
+        return image, hw0, image.shape[:2]
+
+
+def use_image_store(dataset, store):
+    """Make an ultralytics dataset read its images from store; returns the dataset."""
+    dataset.load_image = StoredImageLoader(dataset, store)
+    return dataset
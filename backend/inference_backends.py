@@ -0,0 +1,278 @@
+"""
+Inference Backends
+==================
+One detector interface over the ways a YOLOv8 model can run on the CPU:
+
+    torch        - a .pt checkpoint through ultralytics (original behaviour)
+    onnxruntime  - an exported .onnx file through onnxruntime
+    openvino     - an exported OpenVINO model (<name>_openvino_model/ or .xml)
+
+Models for the last two come from train_yolo.py's export_model(). They do
+not import ultralytics or torch at all: frames are letterboxed, run and
+post-processed (confidence filter, class-aware NMS, box rescaling) with
+NumPy and OpenCV here, which also makes start-up much cheaper.
+
+Usage:
+    from inference_backends import load_detector
+
+    detector = load_detector('yolov8n.onnx', backend='onnxruntime')
+    for dets in detector.predict([frame1, frame2], conf=0.45):
+        ...   # detection_utils.Detections (xyxy, conf, cls) per frame
+    detector.predict(frames, conf, timings=StageTimings())   # also record stage times
+    detector.names   # {0: 'person', ...}
+"""
+
+import os
+import ast
+import time
+
+import cv2
+import numpy as np
+
+from detection_utils import Detections, empty_detections, result_to_arrays
+
+BACKENDS = ('torch', 'onnxruntime', 'openvino')
+
+IOU_THRESHOLD = 0.7   # ultralytics predict() default
+MAX_DETECTIONS = 300
+MAX_NMS_BOXES = 30000
+MAX_WH = 7680         # class offset that keeps NMS class-aware
+PAD_VALUE = 114
+
+
+def letterbox(image, size):
+    """Resize image to fit size=(h, w) keeping its aspect ratio, pad the rest.
+
+    Returns the padded image and (ratio, pad_x, pad_y) to map boxes back.
+    """
+    h, w = image.shape[:2]
+    ratio = min(size[0] / h, size[1] / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    pad_x, pad_y = (size[1] - new_w) / 2, (size[0] - new_h) / 2
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    image = cv2.copyMakeBorder(image, top, bottom, left, right, cv2.BORDER_CONSTANT,
+                               value=(PAD_VALUE, PAD_VALUE, PAD_VALUE))
+    return image, (ratio, left, top)
+
+
+def nms(boxes, scores, iou_threshold=IOU_THRESHOLD, max_det=MAX_DETECTIONS):
+    """Greedy non-maximum suppression; returns kept indices, best score first.
+
+    Each round compares the best remaining box against all others at once,
+    so the loop runs once per kept box rather than once per pair.
+    """
+    order = np.argsort(-scores, kind='stable')
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while order.size and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def postprocess(pred, conf, scale, shape, iou_threshold=IOU_THRESHOLD):
+    """Turn one raw YOLOv8 output (4 + classes, anchors) into Detections.
+
+    scale is the letterbox() mapping and shape the original (h, w).
+    """
+    scores_all = pred[4:]
+    cls = scores_all.argmax(axis=0)
+    scores = scores_all[cls, np.arange(scores_all.shape[1])]
+    mask = scores > conf
+    if not mask.any():
+        return empty_detections()
+    cls, scores = cls[mask], scores[mask]
+    cx, cy, w, h = pred[:4, mask]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    if len(scores) > MAX_NMS_BOXES:
+        top = np.argsort(-scores)[:MAX_NMS_BOXES]
+        boxes, scores, cls = boxes[top], scores[top], cls[top]
+
+    keep = nms(boxes + (cls * MAX_WH)[:, None], scores, iou_threshold)
+    boxes, scores, cls = boxes[keep], scores[keep], cls[keep]
+
+    ratio, pad_x, pad_y = scale
+    boxes -= (pad_x, pad_y, pad_x, pad_y)
+    boxes /= ratio
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+    return Detections(boxes.astype(np.float32), scores.astype(np.float32), cls.astype(np.int64))
+
+
+class TorchDetector:
+    """A .pt checkpoint (or anything else YOLO() loads) through ultralytics."""
+
+    backend = 'torch'
+
+    def __init__(self, model_path, threads=None):
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.names = self.model.names
+
+    def predict(self, frames, conf=0.25, timings=None):
+        results = self.model(frames, verbose=False, conf=conf)
+        if timings is None:
+            return [result_to_arrays(result) for result in results]
+        start = time.perf_counter()
+        detections = [result_to_arrays(result) for result in results]
+        count = len(frames)
+        speed = results[0].speed  # ultralytics' ms per image, averaged over the batch
+        timings.add('preprocess', speed['preprocess'] * count / 1000, count)
+        timings.add('forward', speed['inference'] * count / 1000, count)
+        timings.add('postprocess', speed['postprocess'] * count / 1000 + time.perf_counter() - start, count)
+        return detections
+
+
+class ExportedDetector:
+    """Shared letterbox / NMS pipeline for exported models (see subclasses)."""
+
+    def __init__(self, names, imgsz, batch):
+        self.names = names
+        self.imgsz = imgsz  # (h, w) the model was exported with
+        self.batch = batch  # fixed batch size of the model, None if dynamic
+
+    def _run(self, blob):
+        """Run a (B, 3, H, W) float32 blob, return (B, 4 + classes, anchors)."""
+        raise NotImplementedError
+
+    def predict(self, frames, conf=0.25, timings=None):
+        """Detections per frame; timings (see stage_timings) gets the stage split."""
+        start = time.perf_counter()
+        padded, scales = [], []
+        for frame in frames:
+            image, scale = letterbox(frame, self.imgsz)
+            padded.append(image)
+            scales.append(scale)
+        # BGR HWC uint8 -> RGB CHW float32 in [0, 1], one pass for the batch
+        blob = cv2.dnn.blobFromImages(padded, 1 / 255.0, swapRB=True)
+        preprocessed = time.perf_counter()
+
+        step = self.batch or len(frames)
+        outputs = []
+        for i in range(0, len(frames), step):
+            chunk = blob[i:i + step]
+            if len(chunk) < step:
+                # a fixed-batch model only takes full batches: pad the last one, drop its extra outputs
+                padding = np.zeros((step - len(chunk),) + chunk.shape[1:], chunk.dtype)
+                outputs.append(self._run(np.concatenate([chunk, padding]))[:len(chunk)])
+            else:
+                outputs.append(self._run(chunk))
+        preds = np.concatenate(outputs) if len(outputs) > 1 else outputs[0]
+        forwarded = time.perf_counter()
+
+        detections = [postprocess(pred, conf, scale, frame.shape[:2])
+                      for pred, scale, frame in zip(preds, scales, frames)]
+        if timings is not None:
+            count = len(frames)
+            timings.add('preprocess', preprocessed - start, count)
+            timings.add('forward', forwarded - preprocessed, count)
+            timings.add('postprocess', time.perf_counter() - forwarded, count)
+        return detections
+
+
+def _fixed(dim):
+    return dim if isinstance(dim, int) and dim > 0 else None
+
+
+class OnnxDetector(ExportedDetector):
+    """An exported .onnx model through onnxruntime on the CPU."""
+
+    backend = 'onnxruntime'
+
+    def __init__(self, model_path, threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        meta = self.session.get_modelmeta().custom_metadata_map
+        imgsz = ast.literal_eval(meta['imgsz']) if 'imgsz' in meta else model_input.shape[2:]
+        super().__init__(_parse_names(meta.get('names')), tuple(imgsz), _fixed(model_input.shape[0]))
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVINODetector(ExportedDetector):
+    """An exported OpenVINO model on the CPU device."""
+
+    backend = 'openvino'
+
+    def __init__(self, model_path, threads=None):
+        import openvino as ov
+        if os.path.isdir(model_path):
+            xml = [f for f in os.listdir(model_path) if f.endswith('.xml')]
+            if not xml:
+                raise FileNotFoundError(f'No .xml model in {model_path}')
+            model_path = os.path.join(model_path, xml[0])
+        core = ov.Core()
+        model = core.read_model(model_path)
+        config = {'INFERENCE_NUM_THREADS': threads} if threads else {}
+        self.compiled = core.compile_model(model, 'CPU', config)
+        self.output = self.compiled.output(0)
+
+        meta = _read_openvino_metadata(os.path.dirname(model_path))
+        shape = self.compiled.input(0).get_partial_shape()
+        static = [d.get_length() if d.is_static else None for d in shape]
+        imgsz = meta.get('imgsz') or static[2:]
+        super().__init__(_parse_names(meta.get('names')), tuple(imgsz), static[0])
+
+    def _run(self, blob):
+        return self.compiled([blob])[self.output]
+
+
+def _parse_names(names):
+    if names is None:
+        return {}
+    if isinstance(names, str):
+        names = ast.literal_eval(names)
+    return {int(k): v for k, v in names.items()}
+
+
+def _read_openvino_metadata(directory):
+    """Ultralytics writes metadata.yaml (names, imgsz, ...) next to the .xml."""
+    path = os.path.join(directory, 'metadata.yaml')
+    if not os.path.isfile(path):
+        return {}
+    import yaml
+    with open(path, encoding='utf-8') as f:
+        return yaml.safe_load(f) or {}
+
+
+_DETECTORS = {
+    'torch': TorchDetector,
+    'onnxruntime': OnnxDetector,
+    'openvino': OpenVINODetector,
+}
+
+
+def load_detector(model_path, backend='torch', threads=None):
+    """Load model_path with the given backend (see BACKENDS).
+
+    threads limits the backend's intra-op CPU threads (None = its default).
+    """
+    if backend not in _DETECTORS:
+        raise ValueError(f'Unknown inference backend: {backend}')
+    if backend == 'onnxruntime' and not model_path.endswith('.onnx'):
+        raise ValueError(f'onnxruntime needs an exported .onnx model, got {model_path} '
+                         '(see export_model() in train_yolo.py)')
+    if backend == 'openvino' and not (os.path.isdir(model_path) or model_path.endswith('.xml')):
+        raise ValueError(f'openvino needs an exported OpenVINO model directory or .xml, got {model_path} '
+                         '(see export_model() in train_yolo.py)')
+    return _DETECTORS[backend](model_path, threads)
@@ -6,6 +6,8 @@ const videoSchema = new mongoose.Schema({
   size:         { type: Number, required: true },
   mimetype:     { type: String, required: true },
   status:       { type: String, default: 'uploaded' },
+  // Per-stage timings of the last analysis run with ?timings=1 (see backend/stage_timings.py)
+  timings:      { type: mongoose.Schema.Types.Mixed, default: null },
 }, { timestamps: true });
 
 module.exports = mongoose.model('Video', videoSchema);
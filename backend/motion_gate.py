@@ -0,0 +1,80 @@
+"""
+Motion Gate
+===========
+Cheap check run before YOLO on fixed cameras: a frame is only sent to the
+model when it differs enough from the last frame that was, or when too many
+frames in a row have been skipped (periodic refresh).
+
+Frames are compared as small blurred grayscale images, so the gate costs
+well under a millisecond per frame even for 4K input.
+
+Methods:
+    diff  - absolute difference against the last inferred frame
+    mog2  - OpenCV MOG2 background subtraction (adapts to lighting changes)
+"""
+
+import cv2
+import numpy as np
+
+MOTION_METHODS = ('diff', 'mog2')
+
+
+class MotionGate:
+    """Decides per frame whether inference is needed.
+
+    Args:
+        threshold:       Fraction of changed pixels (0-1) that counts as motion.
+        refresh_every:   Force inference after this many consecutive skips (0 = never).
+        method:          'diff' or 'mog2'.
+        width:           Width of the downscaled comparison image.
+        pixel_threshold: Per-pixel gray-level change that counts as changed (diff only).
+    """
+
+    def __init__(self, threshold=0.005, refresh_every=10, method='diff', width=160,
+                 pixel_threshold=25):
+        if method not in MOTION_METHODS:
+            raise ValueError(f'Unknown motion method: {method}')
+        self.threshold = threshold
+        self.refresh_every = refresh_every
+        self.method = method
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.reference = None
+        self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False) if method == 'mog2' else None
+        self.since_inference = 0
+        self.inferred = 0
+        self.skipped = 0
+        self.last_score = 0.0
+
+    def _small_gray(self, frame):
+        h, w = frame.shape[:2]
+        height = max(1, round(h * self.width / w))
+        small = cv2.resize(frame, (self.width, height), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def _score(self, gray):
+        if self.subtractor is not None:
+            mask = self.subtractor.apply(gray)
+            return float(np.count_nonzero(mask)) / mask.size
+        if self.reference is None or self.reference.shape != gray.shape:
+            return 1.0
+        diff = cv2.absdiff(gray, self.reference)
+        return float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+
+    def check(self, frame):
+        """Return True if the frame should be run through the model."""
+        gray = self._small_gray(frame)
+        self.last_score = self._score(gray)
+        forced = self.refresh_every and self.since_inference >= self.refresh_every
+        if self.inferred == 0 or forced or self.last_score >= self.threshold:
+            self.reference = gray
+            self.since_inference = 0
+            self.inferred += 1
+            return True
+        self.since_inference += 1
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        return {'inferredFrames': self.inferred, 'skippedFrames': self.skipped}
@@ -0,0 +1,229 @@
+"""
+Multi-Stream Monitor
+====================
+Watches many cameras with one shared model: every source (device index,
+video file, RTSP URL) is decoded on its own thread into a newest-frame slot
+(see frame_pipeline), and each inference step batches the newest unseen
+frame of every stream into a single model call.
+
+A stream whose consumer is behind simply has its older frames replaced, so
+a slow model lowers the per-stream inference rate instead of building up
+latency. When more streams are ready than max_batch allows, streams are
+picked round-robin so none is starved.
+
+Per-stream counters (VideoStream.stats()):
+    captured - frames decoded
+    inferred - frames run through the model
+    gated    - frames the motion gate kept from the model (if enabled)
+    dropped  - frames replaced by a newer one before inference picked them up
+    share    - (inferred + gated) / captured, the fraction of frames handled
+and MultiStreamMonitor.fairness() is Jain's index over the shares
+(1.0 = every stream gets the same fraction of its frames handled).
+"""
+
+import time
+import threading
+from collections import deque
+
+import cv2
+
+from detection_utils import empty_detections
+from frame_pipeline import LatestValue, RateMeter
+
+
+def parse_source(source):
+    """'0' -> device index 0; anything else is a file path or stream URL."""
+    return int(source) if str(source).isdigit() else source
+
+
+class VideoStream:
+    """One source decoded on a background thread into a newest-frame slot.
+
+    Video files are paced at their own frame rate so they behave like live
+    cameras; with loop=True they restart at the end instead of finishing.
+    """
+
+    def __init__(self, source, name=None, loop=False, on_frame=None):
+        self.source = parse_source(source)
+        self.name = name or str(source)
+        self.loop = loop
+        self.on_frame = on_frame  # called after every decoded frame (wakes the monitor)
+        self.is_file = isinstance(self.source, str) and '://' not in self.source
+        self.latest = LatestValue()  # (frame, capture_time)
+        self.capture_rate = RateMeter()
+        self.inference_rate = RateMeter()
+        self.latencies = deque(maxlen=30)
+        self.inferred = 0
+        self.gated = 0
+        self.gate = None
+        self.last_dets = empty_detections()
+        self.finished = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._cap = cv2.VideoCapture(self.source)
+        if not self._cap.isOpened():
+            raise RuntimeError(f'Cannot open source: {self.source}')
+        self._thread = threading.Thread(target=self._run, name=f'decode-{self.name}', daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        fps = (self._cap.get(cv2.CAP_PROP_FPS) or 30) if self.is_file else None
+        next_time = time.perf_counter()
+        while not self._stop.is_set():
+            ret, frame = self._cap.read()
+            if not ret:
+                if self.is_file and self.loop:
+                    self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+                if self.is_file:
+                    break
+                time.sleep(0.01)  # camera hiccup: retry
+                continue
+            if fps:
+                next_time += 1 / fps
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.perf_counter()  # fell behind; do not try to catch up
+            self.latest.put((frame, time.perf_counter()))
+            self.capture_rate.tick()
+            if self.on_frame is not None:
+                self.on_frame()
+        self._cap.release()
+        self.finished = True
+        if self.on_frame is not None:
+            self.on_frame()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    @property
+    def handled(self):
+        return self.inferred + self.gated
+
+    def stats(self):
+        captured = self.latest.put_count
+        return {
+            'captured': captured,
+            'inferred': self.inferred,
+            'gated': self.gated,
+            'dropped': self.latest.dropped,
+            'share': round(self.handled / captured, 3) if captured else 0.0,
+            'captureFps': round(self.capture_rate.rate, 1),
+            'inferenceFps': round(self.inference_rate.rate, 1),
+            'latencyMs': round(sum(self.latencies) / len(self.latencies), 1) if self.latencies else None,
+        }
+
+
+class MultiStreamMonitor:
+    """Runs one shared detector over the newest frames of many VideoStreams.
+
+    Args:
+        model:     Detector from inference_backends.load_detector().
+        sources:   Device indices, file paths or stream URLs.
+        conf:      Confidence threshold.
+        max_batch: Most frames per model call (None = one per stream).
+        loop:      Restart video files at the end.
+        gate_factory: Optional callable returning a MotionGate per stream;
+                   gated frames reuse the stream's previous detections.
+    """
+
+    def __init__(self, model, sources, conf=0.5, max_batch=None, loop=False, gate_factory=None):
+        self.model = model
+        self.conf = conf
+        self._wake = threading.Event()
+        self.streams = [
+            VideoStream(source, name=f'[{i}] {source}', loop=loop, on_frame=self._wake.set)
+            for i, source in enumerate(sources)
+        ]
+        self.max_batch = max_batch or len(self.streams)
+        if gate_factory is not None:
+            for stream in self.streams:
+                stream.gate = gate_factory()
+        self._next = 0  # round-robin start for fair batch selection
+        self.steps = 0
+
+    def start(self):
+        """Start every stream; if one fails to open, the ones already started are stopped."""
+        started = []
+        try:
+            for stream in self.streams:
+                stream.start()
+                started.append(stream)
+        except BaseException:
+            for stream in started:
+                stream.stop()
+            raise
+        return self
+
+    def stop(self):
+        for stream in self.streams:
+            stream.stop()
+
+    @property
+    def finished(self):
+        return all(stream.finished for stream in self.streams)
+
+    def step(self, timeout=0.1):
+        """Run one inference step.
+
+        Returns [(stream, frame, dets, capture_time), ...] for every stream
+        that had a new frame (empty if none arrived within timeout).
+        """
+        if not self._wake.wait(timeout):
+            return []
+        self._wake.clear()
+
+        # Newest frame of each stream, starting at the round-robin position
+        count = len(self.streams)
+        ready = []
+        for offset in range(count):
+            stream = self.streams[(self._next + offset) % count]
+            if len(ready) >= self.max_batch:
+                self._wake.set()  # leftovers are picked up next step
+                break
+            item = stream.latest.get_nowait()
+            if item is not None:
+                ready.append((stream, *item))
+        if not ready:
+            return []
+        self._next = (self.streams.index(ready[-1][0]) + 1) % count
+
+        to_infer = []
+        for stream, frame, captured in ready:
+            if stream.gate is not None and not stream.gate.check(frame):
+                stream.gated += 1
+            else:
+                to_infer.append((stream, frame))
+        if to_infer:
+            detections = self.model.predict([frame for _, frame in to_infer], self.conf)
+            for (stream, _), dets in zip(to_infer, detections):
+                stream.last_dets = dets
+                stream.inferred += 1
+                stream.inference_rate.tick()
+        self.steps += 1
+
+        now = time.perf_counter()
+        for stream, _, captured in ready:
+            stream.latencies.append((now - captured) * 1000)
+        return [(stream, frame, stream.last_dets, captured) for stream, frame, captured in ready]
+
+    def fairness(self):
+        """Jain's fairness index over the per-stream handled/captured shares."""
+        shares = [s.handled / s.latest.put_count for s in self.streams if s.latest.put_count]
+        if not shares or not any(shares):
+            return 1.0
+        return sum(shares) ** 2 / (len(shares) * sum(x * x for x in shares))
+
+    def stats(self):
+        return {
+            'steps': self.steps,
+            'fairness': round(self.fairness(), 3),
+            'streams': {stream.name: stream.stats() for stream in self.streams},
+        }
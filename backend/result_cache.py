@@ -0,0 +1,190 @@
+"""
+Analysis Result Cache
+=====================
+Disk-backed cache of analyze_video() results, so re-analyzing the same
+upload (retry after an error, re-upload, a reviewer clicking analyze again)
+returns the stored result instead of rerunning the pipeline.
+
+Keys combine:
+    - a fingerprint of the video content: file size plus SHA-256 of the
+      first and last chunk and a few evenly spaced chunks in between, so a
+      multi-GB upload is keyed by reading a few MB (small files are hashed
+      in full)
+    - a SHA-256 of the model weights (memoized by path, size and mtime)
+    - every analysis option that affects the output
+
+Entries are single files (<key>.json for a JSON result, <key>.ndjson for a
+streamed run) written atomically. The directory is kept under max_bytes by
+evicting the least recently used entries; a hit refreshes the entry's mtime.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+CHUNK_SIZE = 1 << 20   # 1 MiB per sampled chunk
+SAMPLE_CHUNKS = 8      # chunks between the first and last one
+DEFAULT_MAX_BYTES = 1 << 30
+DEFAULT_CACHE_DIR = os.environ.get(
+    'HERITAGESHIELD_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'analysis'),
+)
+
+
+def video_fingerprint(path, chunk_size=CHUNK_SIZE, samples=SAMPLE_CHUNKS):
+    """Content fingerprint of a (possibly huge) file from sampled chunks."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, 'rb') as f:
+        if size <= chunk_size * (samples + 2):
+            for block in iter(lambda: f.read(chunk_size), b''):
+                digest.update(block)
+        else:
+            step = (size - chunk_size) // (samples + 1)
+            for i in range(samples + 2):
+                f.seek(min(i * step, size - chunk_size))
+                digest.update(f.read(chunk_size))
+    return digest.hexdigest()
+
+
+_weights_memo = {}
+_weights_lock = threading.Lock()
+
+
+def weights_fingerprint(path):
+    """SHA-256 of a weights file, or the name itself if it is not on disk
+    (e.g. 'yolov8n.pt' before ultralytics downloads it)."""
+    if not os.path.isfile(path):
+        return f'name:{path}'
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _weights_lock:
+        if memo_key in _weights_memo:
+            return _weights_memo[memo_key]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+    with _weights_lock:
+        _weights_memo[memo_key] = digest.hexdigest()
+    return _weights_memo[memo_key]
+
+
+class ResultCache:
+    """Size-bounded LRU cache of analysis results in one directory."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, video_path, model_path, options):
+        """Cache key for one analysis; options must be JSON-serializable."""
+        payload = json.dumps({
+            'video': video_fingerprint(video_path),
+            'model': weights_fingerprint(model_path),
+            'options': options,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        """Return a cached JSON result, or None."""
+        path = self._path(key, '.json')
+        try:
+            with open(path, encoding='utf-8') as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(path)
+        return result
+
+    def put(self, key, result):
+        """Store a JSON result."""
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self._commit(tmp, self._path(key, '.json'))
+
+    def get_records(self, key):
+        """Return an iterator over cached NDJSON records, or None."""
+        path = self._path(key, '.ndjson')
+        try:
+            f = open(path, encoding='utf-8')
+        except OSError:
+            return None
+        self._touch(path)
+
+        def records():
+            with f:
+                for line in f:
+                    yield json.loads(line)
+        return records()
+
+    def record_writer(self, key):
+        """Return a RecordWriter that streams NDJSON records into an entry."""
+        return RecordWriter(self, key)
+
+    def _commit(self, tmp, path):
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(('.json', '.ndjson')):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue  # removed by a concurrent eviction
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+
+class RecordWriter:
+    """Writes NDJSON records to a temporary file; commit() publishes it."""
+
+    def __init__(self, cache, key):
+        self.cache = cache
+        self.key = key
+        fd, self.tmp = tempfile.mkstemp(dir=cache.directory, suffix='.tmp')
+        self.file = os.fdopen(fd, 'w', encoding='utf-8')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+
+    def commit(self):
+        self.file.close()
+        self.cache._commit(self.tmp, self.cache._path(self.key, '.ndjson'))
+
+    def abort(self):
+        self.file.close()
+        try:
+            os.unlink(self.tmp)
+        except OSError:
+            pass
@@ -0,0 +1,166 @@
+"""
+Regions of Interest
+===================
+Per-camera ROI polygons (e.g. the monument perimeter) so the model only
+looks at the part of the frame that matters. Each frame is cropped to the
+union bounding box of the camera's polygons (plus a small margin) before
+inference, boxes are mapped back to full-frame coordinates, and detections
+whose centre falls outside every polygon are dropped, so they never reach
+detections or alerts.
+
+Config (backend/config/roi.json by default, or HERITAGESHIELD_ROI_CONFIG):
+    {
+      "cameras": {
+        "CAM-01": { "polygons": [[[0.10, 0.45], [0.90, 0.45], [0.95, 1.0], [0.05, 1.0]]] },
+        "CAM-02": { "polygons": [[[200, 300], [1700, 300], [1700, 1080], [200, 1080]]],
+                    "units": "pixels", "margin": 0.1 }
+      }
+    }
+
+Points are [x, y], in fractions of the frame size ("units": "normalized",
+the default) or in pixels ("units": "pixels"). "margin" widens the crop box
+by that fraction of its size on each side (default 0.05) so objects standing
+on the edge of the region are not cut off.
+
+Usage:
+    from roi import RegionOfInterest, RoiDetector, camera_roi
+
+    roi = RegionOfInterest.from_config(camera_roi('CAM-01'))
+    detector = RoiDetector(load_detector('yolov8n.pt'), roi)
+    detector.predict([frame])   # full-frame boxes, centres inside the polygons only
+"""
+
+import os
+import json
+
+import numpy as np
+
+from detection_utils import Detections
+
+DEFAULT_ROI_CONFIG = os.environ.get(
+    'HERITAGESHIELD_ROI_CONFIG',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'roi.json'),
+)
+ROI_UNITS = ('normalized', 'pixels')
+DEFAULT_MARGIN = 0.05
+
+
+def load_roi_config(path=DEFAULT_ROI_CONFIG):
+    """Return {camera: ROI entry} from a config file."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f).get('cameras', {})
+
+
+def camera_roi(camera, path=DEFAULT_ROI_CONFIG):
+    """The ROI entry of one camera, validated (see RegionOfInterest.from_config)."""
+    cameras = load_roi_config(path)
+    if camera not in cameras:
+        raise ValueError(f'No ROI configured for camera {camera!r} in {path}')
+    entry = cameras[camera]
+    RegionOfInterest.from_config(entry)  # fail early on a malformed entry
+    return entry
+
+
+def points_in_polygon(points, polygon):
+    """Boolean mask of the (N, 2) points that lie inside polygon (even-odd rule)."""
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    xj, yj = polygon[-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for xi, yi in polygon:
+            crosses = ((yi > y) != (yj > y)) & (x < (xj - xi) * (y - yi) / (yj - yi) + xi)
+            inside ^= crosses
+            xj, yj = xi, yi
+    return inside
+
+
+class RegionOfInterest:
+    """One camera's ROI polygons, resolved to pixels per frame size."""
+
+    def __init__(self, polygons, units='normalized', margin=DEFAULT_MARGIN):
+        if units not in ROI_UNITS:
+            raise ValueError(f'Unknown ROI units: {units}')
+        if not polygons or any(len(polygon) < 3 for polygon in polygons):
+            raise ValueError('An ROI needs at least one polygon of three or more points')
+        self.polygons = [np.asarray(polygon, dtype=np.float64).reshape(-1, 2) for polygon in polygons]
+        self.units = units
+        self.margin = margin
+        self._resolved = {}  # (h, w) -> (pixel polygons, crop box)
+
+    @classmethod
+    def from_config(cls, entry):
+        """Build from a config entry: {"polygons": [...], "units": ..., "margin": ...}."""
+        return cls(entry['polygons'], entry.get('units', 'normalized'), entry.get('margin', DEFAULT_MARGIN))
+
+    def resolve(self, shape):
+        """Pixel polygons and crop box (x1, y1, x2, y2) for a frame of shape (h, w, ...)."""
+        key = shape[:2]
+        if key not in self._resolved:
+            h, w = key
+            scale = (w, h) if self.units == 'normalized' else (1, 1)
+            polygons = [polygon * scale for polygon in self.polygons]
+            points = np.concatenate(polygons)
+            x1, y1 = points.min(axis=0)
+            x2, y2 = points.max(axis=0)
+            pad_x, pad_y = (x2 - x1) * self.margin, (y2 - y1) * self.margin
+            box = (
+                int(max(0, np.floor(x1 - pad_x))),
+                int(max(0, np.floor(y1 - pad_y))),
+                int(min(w, np.ceil(x2 + pad_x))),
+                int(min(h, np.ceil(y2 + pad_y))),
+            )
+            if box[2] <= box[0] or box[3] <= box[1]:
+                raise ValueError(f'ROI lies outside the {w}x{h} frame')
+            self._resolved[key] = (polygons, box)
+        return self._resolved[key]
+
+    def normalized(self, shape):
+        """The same ROI in normalized units, given the frame shape its pixel polygons refer to.
+
+        Lets a pixel ROI follow frames that are resized before inference.
+        """
+        if self.units == 'normalized':
+            return self
+        h, w = shape[:2]
+        return RegionOfInterest([polygon / (w, h) for polygon in self.polygons], 'normalized', self.margin)
+
+    def crop(self, frame):
+        """View of the frame inside the crop box (no copy) and its (x, y) offset."""
+        _, (x1, y1, x2, y2) = self.resolve(frame.shape)
+        return frame[y1:y2, x1:x2], (x1, y1)
+
+    def contains(self, dets, shape):
+        """Mask of the detections whose box centre lies inside any polygon."""
+        polygons, _ = self.resolve(shape)
+        centres = np.stack([(dets.xyxy[:, 0] + dets.xyxy[:, 2]) / 2,
+                            (dets.xyxy[:, 1] + dets.xyxy[:, 3]) / 2], axis=1)
+        mask = np.zeros(len(centres), dtype=bool)
+        for polygon in polygons:
+            mask |= points_in_polygon(centres, polygon)
+        return mask
+
+
+class RoiDetector:
+    """Detector wrapper that runs on the ROI crop and keeps ROI detections only."""
+
+    def __init__(self, detector, roi):
+        self.detector = detector
+        self.names = detector.names
+        self.roi = roi
+
+    def predict(self, frames, conf=0.25, timings=None):
+        crops, offsets = zip(*(self.roi.crop(frame) for frame in frames))
+        if timings is None:
+            detections = self.detector.predict(list(crops), conf)
+        else:
+            detections = self.detector.predict(list(crops), conf, timings=timings)
+        results = []
+        for dets, (x, y), frame in zip(detections, offsets, frames):
+            if len(dets.conf) == 0:
+                results.append(dets)
+                continue
+            xyxy = dets.xyxy + np.array([x, y, x, y], dtype=dets.xyxy.dtype)
+            mapped = Detections(xyxy, dets.conf, dets.cls)
+            keep = self.roi.contains(mapped, frame.shape)
+            results.append(Detections(xyxy[keep], dets.conf[keep], dets.cls[keep]))
+        return results
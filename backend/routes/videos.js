@@ -3,9 +3,13 @@ const router = express.Router();
 const multer = require('multer');
 const path = require('path');
 const fs = require('fs');
-const { execFile } = require('child_process');
 const Video = require('../models/Video');
 const Alert = require('../models/Alert');
+const analysisWorker = require('../services/analysisWorker');
+const { RecordLog, readPage, SAMPLE_SIZE } = require('../services/recordLog');
+
+// Streamed records of the last analysis of an upload (see services/recordLog.js)
+function recordsPath(filename) { return path.join(__dirname, '..', 'uploads', `${filename}.records.ndjson`); }
 
 function uid() { return Date.now().toString(36) + Math.random().toString(36).slice(2, 9); }
 
@@ -41,17 +45,35 @@ router.post('/', upload.single('video'), async (req, res) => {
   res.status(201).json(vid);
 });
 
+// GET /api/videos/worker/health — status of the persistent analysis worker
+router.get('/worker/health', async (_req, res) => {
+  try {
+    res.json(await analysisWorker.health());
+  } catch (err) {
+    res.status(503).json({ status: 'unavailable', error: err.message });
+  }
+});
+
 // DELETE /api/videos/:id
 router.delete('/:id', async (req, res) => {
   const row = await Video.findById(req.params.id);
   if (!row) return res.status(404).json({ error: 'Video not found' });
   const filePath = path.join(__dirname, '..', 'uploads', row.filename);
   if (fs.existsSync(filePath)) fs.unlinkSync(filePath);
+  for (const sidecar of [`${filePath}.checkpoint.json`, recordsPath(row.filename)]) {
+    if (fs.existsSync(sidecar)) fs.unlinkSync(sidecar);
+  }
   await Video.findByIdAndDelete(req.params.id);
   res.json({ message: 'Deleted' });
 });
 
 // POST /api/videos/analyze/:id — run YOLOv8 analysis on uploaded video
+// ?timings=1 also records per-stage timings on the video (always re-runs the analysis)
+// ?track=1 returns tracks instead of per-box detections, with one alert per tracked object
+// ?resume=1 continues from the checkpoint of an interrupted run (see resumedFrom)
+// Detections, tracks and alerts are written to a record log as they stream in;
+// the response carries their counts and the first few of each (from this
+// request), and GET /api/videos/:id/records pages through the whole log.
 router.post('/analyze/:id', async (req, res) => {
   try {
     const video = await Video.findById(req.params.id);
@@ -60,69 +82,87 @@ router.post('/analyze/:id', async (req, res) => {
     const videoPath = path.join(__dirname, '..', 'uploads', video.filename);
     if (!fs.existsSync(videoPath)) return res.status(404).json({ error: 'Video file missing from disk' });
 
-    // Find the Python executable (prefer venv)
-    const venvPython = path.join(__dirname, '..', '..', '.venv', 'Scripts', 'python.exe');
-    const pythonCmd = fs.existsSync(venvPython) ? venvPython : 'python';
-    const scriptPath = path.join(__dirname, '..', 'analyze_video.py');
-
-    // Run the analysis script
+    // Run the analysis on the persistent worker
     await Video.findByIdAndUpdate(req.params.id, { status: 'analyzing' });
 
-    execFile(
-      pythonCmd,
-      [scriptPath, videoPath, '--interval', '30', '--conf', '0.45'],
-      { maxBuffer: 50 * 1024 * 1024, timeout: 300000 },
-      async (error, stdout, stderr) => {
-        if (error) {
-          await Video.findByIdAndUpdate(req.params.id, { status: 'error' });
-          console.error('Analysis error:', stderr || error.message);
-          return res.status(500).json({ error: 'Analysis failed', details: stderr || error.message });
-        }
-
-        try {
-          // Extract the JSON portion — ultralytics may print extra text before it
-          let jsonStr = stdout.trim();
-          const jsonStart = jsonStr.indexOf('{');
-          if (jsonStart > 0) jsonStr = jsonStr.slice(jsonStart);
-          const result = JSON.parse(jsonStr);
-
-          if (result.error) {
-            await Video.findByIdAndUpdate(req.params.id, { status: 'error' });
-            return res.status(500).json({ error: result.error });
-          }
-
-          // Save alerts to database
-          const savedAlerts = [];
-          for (const a of (result.alerts || [])) {
-            const alert = await Alert.create({
-              type: a.type,
-              message: a.message,
-              camera: `Video: ${video.originalName}`,
-              severity: a.severity,
-              resolved: false,
-            });
-            savedAlerts.push(alert);
-          }
-
-          await Video.findByIdAndUpdate(req.params.id, { status: 'analyzed' });
-
-          res.json({
-            videoId: video._id,
-            totalFrames: result.totalFrames,
-            analyzedFrames: result.analyzedFrames,
-            fps: result.fps,
-            summary: result.summary,
-            detections: result.detections,
-            alerts: savedAlerts,
-          });
-        } catch (parseErr) {
-          console.error('Parse error. stdout:', stdout.slice(0, 500));
-          console.error('stderr:', stderr);
-          await Video.findByIdAndUpdate(req.params.id, { status: 'error' });
-          res.status(500).json({ error: 'Failed to parse analysis output', details: stdout.slice(0, 300) });
-        }
-      }
-    );
+    // Records go to the log and alerts to the database as they stream in
+    const log = new RecordLog(recordsPath(video.filename));
+    const savedAlerts = [];
+    let saving = Promise.resolve();
+    const onRecord = (record) => {
+      if (record.event === 'resume') return log.keep(record.emitted);
+      if (record.event === 'progress') return;
+      log.write(record);
+      if (record.event !== 'alert') return;
+      saving = saving.then(async () => {
+        const alert = await Alert.create({
+          type: record.type,
+          message: record.message,
+          camera: `Video: ${video.originalName}`,
+          severity: record.severity,
+          resolved: false,
+        });
+        if (savedAlerts.length < SAMPLE_SIZE) savedAlerts.push(alert);
+      });
+    };
+
+    let result;
+    try {
+      // Partial results are checkpointed next to the upload, so ?resume=1
+      // after a crash or timeout picks up where the last run stopped.
+      result = await analysisWorker.analyze(videoPath, {
+        interval: 30, conf: 0.45, checkpoint_every: 30,
+        track: req.query.track === '1',
+        resume: req.query.resume === '1',
+        timings: req.query.timings === '1',
+      }, onRecord);
+      await saving;
+    } catch (err) {
+      await log.close().catch(() => {});
+      await Video.findByIdAndUpdate(req.params.id, { status: 'error' });
+      console.error('Analysis error:', err.message);
+      return res.status(500).json({ error: 'Analysis failed', details: err.message });
+    }
+
+    await log.close();
+    const update = { status: 'analyzed' };
+    if (result.timings) update.timings = result.timings;
+    await Video.findByIdAndUpdate(req.params.id, update);
+
+    res.json({
+      videoId: video._id,
+      totalFrames: result.totalFrames,
+      analyzedFrames: result.analyzedFrames,
+      fps: result.fps,
+      summary: result.summary,
+      detections: log.sample('detection'),
+      detectionCount: result.detectionCount,
+      tracks: result.trackCount === undefined ? undefined : log.sample('track'),
+      trackCount: result.trackCount,
+      resumedFrom: result.resumedFrom,
+      timings: result.timings,
+      alerts: savedAlerts,
+      alertCount: result.alertCount,
+      records: `/api/videos/${video._id}/records`,
+    });
+  } catch (err) {
+    res.status(500).json({ error: err.message });
+  }
+});
+
+// GET /api/videos/:id/records?event=detection&offset=0&limit=1000
+// Pages through the record log of the video's last analysis; nextOffset is null on the last page
+router.get('/:id/records', async (req, res) => {
+  try {
+    const video = await Video.findById(req.params.id);
+    if (!video) return res.status(404).json({ error: 'Video not found' });
+    const filePath = recordsPath(video.filename);
+    if (!fs.existsSync(filePath)) return res.status(404).json({ error: 'Video has not been analyzed' });
+    res.json(await readPage(filePath, {
+      event: req.query.event || null,
+      offset: parseInt(req.query.offset || '0', 10) || 0,
+      limit: parseInt(req.query.limit || '1000', 10) || 1000,
+    }));
   } catch (err) {
     res.status(500).json({ error: err.message });
   }
@@ -0,0 +1,143 @@
+const path = require('path');
+const fs = require('fs');
+const readline = require('readline');
+const { spawn } = require('child_process');
+
+// Long-lived analyze_video.py --worker process shared by all requests, so the
+// ultralytics/torch import and model load happen once instead of per video.
+
+// A job fails only if the worker goes this long without sending anything for it
+const JOB_TIMEOUT_MS = 300000;
+// A timed-out job is cancelled; if the worker has not ended it this much later
+// it is stuck, and the worker is killed so the jobs queued behind it can run
+const CANCEL_GRACE_MS = 30000;
+const CONCURRENCY = parseInt(process.env.ANALYSIS_CONCURRENCY || '1', 10);
+
+let child = null;
+let pending = new Map(); // job id -> { resolve, reject, timer, onRecord, timeoutMs, op }
+let cancelling = new Map(); // job id -> kill timer of a cancelled job
+let nextId = 0;
+
+function pythonCommand() {
+  // Find the Python executable (prefer venv)
+  const venvPython = path.join(__dirname, '..', '..', '.venv', 'Scripts', 'python.exe');
+  return fs.existsSync(venvPython) ? venvPython : 'python';
+}
+
+function failAll(message) {
+  for (const job of pending.values()) {
+    clearTimeout(job.timer);
+    job.reject(new Error(message));
+  }
+  pending = new Map();
+}
+
+function handleLine(line) {
+  let msg;
+  try {
+    msg = JSON.parse(line);
+  } catch (_err) {
+    return; // not a protocol line
+  }
+  if (cancelling.has(msg.id) && (msg.type === 'result' || msg.type === 'error')) {
+    clearTimeout(cancelling.get(msg.id));
+    cancelling.delete(msg.id);
+  }
+  const job = pending.get(msg.id);
+  if (!job) return;
+
+  if (msg.type === 'event') {
+    clearTimeout(job.timer);
+    job.timer = setTimeout(() => timeOut(msg.id), job.timeoutMs);
+    if (job.onRecord) job.onRecord(msg.record);
+  } else if (msg.op === 'health' || msg.type === 'result') {
+    clearTimeout(job.timer);
+    pending.delete(msg.id);
+    job.resolve(msg.op === 'health' ? msg : msg.result);
+  } else if (msg.type === 'error') {
+    clearTimeout(job.timer);
+    pending.delete(msg.id);
+    job.reject(new Error(msg.error));
+  }
+}
+
+// Drop a dead or broken worker: fail its jobs and let the next request start a new one
+function resetWorker(proc, message) {
+  if (child !== proc) return; // already reset (exit, error and stdin errors can all fire)
+  child = null;
+  for (const timer of cancelling.values()) clearTimeout(timer);
+  cancelling = new Map();
+  failAll(message);
+  proc.kill();
+}
+
+function ensureWorker() {
+  if (child) return child;
+
+  const scriptPath = path.join(__dirname, '..', 'analyze_video.py');
+  const proc = spawn(pythonCommand(), [scriptPath, '--worker', '--concurrency', String(CONCURRENCY)], {
+    stdio: ['pipe', 'pipe', 'pipe'],
+  });
+  child = proc;
+
+  readline.createInterface({ input: proc.stdout }).on('line', handleLine);
+  proc.stderr.on('data', (chunk) => console.error('[analysis worker]', chunk.toString().trim()));
+
+  proc.on('exit', (code, signal) => {
+    console.error(`Analysis worker exited (${signal || code})`);
+    resetWorker(proc, 'Analysis worker exited');
+  });
+  proc.on('error', (err) => {
+    console.error('Analysis worker error:', err.message);
+    resetWorker(proc, err.message);
+  });
+  // Writing to a worker that died (or never started) fails with EPIPE on stdin;
+  // unhandled, that stream error would crash the server
+  proc.stdin.on('error', (err) => {
+    console.error('Analysis worker stdin error:', err.message);
+    resetWorker(proc, `Analysis worker unavailable: ${err.message}`);
+  });
+
+  return proc;
+}
+
+function timeOut(id) {
+  const job = pending.get(id);
+  if (!job) return;
+  pending.delete(id);
+  job.reject(new Error('Analysis timed out'));
+
+  const proc = child;
+  if (!proc || job.op !== 'analyze') return;
+  proc.stdin.write(JSON.stringify({ op: 'cancel', id }) + '\n');
+  cancelling.set(id, setTimeout(() => {
+    cancelling.delete(id);
+    console.error(`Analysis job ${id} did not stop after cancel; restarting the worker`);
+    resetWorker(proc, 'Analysis worker restarted after a job hung');
+  }, CANCEL_GRACE_MS));
+}
+
+function send(message, timeoutMs, onRecord = null) {
+  const worker = ensureWorker();
+  const id = `job-${++nextId}`;
+  return new Promise((resolve, reject) => {
+    const timer = setTimeout(() => timeOut(id), timeoutMs);
+    pending.set(id, { resolve, reject, timer, onRecord, timeoutMs, op: message.op });
+    worker.stdin.write(JSON.stringify({ ...message, id }) + '\n');
+  });
+}
+
+// Analyze a video; options are worker job fields (interval, conf, model, ...).
+// With onRecord, the job streams NDJSON records (detection, alert, progress)
+// to the callback as they happen and resolves with the summary record.
+function analyze(videoPath, options = {}, onRecord = null) {
+  const message = { op: 'analyze', video: videoPath, ...options };
+  if (onRecord) message.stream = true;
+  return send(message, JOB_TIMEOUT_MS, onRecord);
+}
+
+function health() {
+  return send({ op: 'health' }, 10000);
+}
+
+module.exports = { analyze, health };
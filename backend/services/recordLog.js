@@ -0,0 +1,100 @@
+const fs = require('fs');
+const readline = require('readline');
+
+// Streamed analysis records (detection, track, alert, ...) written to an NDJSON
+// file as they arrive, so the server's memory stays flat however long the
+// video is. Only the first SAMPLE_SIZE records of each event are kept in
+// memory for the analyze response; clients page through the rest
+// with readPage().
+
+const SAMPLE_SIZE = 100;
+const MAX_PAGE = 1000;
+
+class RecordLog {
+  constructor(filePath) {
+    this.filePath = filePath;
+    this.stream = null;
+    this.kept = false;
+    this.samples = {};
+  }
+
+  // Resumed run: keep the first `count` records of the interrupted run's log
+  // (the worker's 'resume' record) and append the new ones after them
+  keep(count) {
+    if (fs.existsSync(this.filePath)) fs.truncateSync(this.filePath, lineOffset(this.filePath, count));
+    this.kept = true;
+  }
+
+  write(record) {
+    if (!this.stream) this.stream = fs.createWriteStream(this.filePath, { flags: this.kept ? 'a' : 'w' });
+    this.stream.write(JSON.stringify(record) + '\n');
+    const sample = this.samples[record.event] || (this.samples[record.event] = []);
+    if (sample.length < SAMPLE_SIZE) sample.push(record);
+  }
+
+  // First SAMPLE_SIZE records of one event written by this run, without the event field
+  sample(event) {
+    return (this.samples[event] || []).map(({ event: _event, ...fields }) => fields);
+  }
+
+  close() {
+    if (!this.stream) {
+      if (!this.kept) fs.writeFileSync(this.filePath, '');
+      return Promise.resolve();
+    }
+    return new Promise((resolve, reject) => {
+      this.stream.on('error', reject);
+      this.stream.end(resolve);
+    });
+  }
+}
+
+// Byte offset just past the first `lines` lines of a file, read in chunks
+function lineOffset(filePath, lines) {
+  if (lines <= 0) return 0;
+  const fd = fs.openSync(filePath, 'r');
+  const chunk = Buffer.alloc(1 << 16);
+  let offset = 0;
+  let seen = 0;
+  try {
+    for (;;) {
+      const read = fs.readSync(fd, chunk, 0, chunk.length, offset);
+      if (read === 0) return offset;
+      for (let i = 0; i < read; i++) {
+        if (chunk[i] === 10 && ++seen === lines) return offset + i + 1;
+      }
+      offset += read;
+    }
+  } finally {
+    fs.closeSync(fd);
+  }
+}
+
+// One page of a log: records of `event` (all when null) numbered from `offset`
+async function readPage(filePath, { event = null, offset = 0, limit = MAX_PAGE } = {}) {
+  limit = Math.max(1, Math.min(limit, MAX_PAGE));
+  const records = [];
+  let index = 0;
+  let more = false;
+  const input = fs.createReadStream(filePath, { encoding: 'utf-8' });
+  const lines = readline.createInterface({ input, crlfDelay: Infinity });
+  try {
+    for await (const line of lines) {
+      if (!line) continue;
+      const record = JSON.parse(line);
+      if (event && record.event !== event) continue;
+      if (index++ < offset) continue;
+      if (records.length === limit) {
+        more = true;
+        break;
+      }
+      records.push(record);
+    }
+  } finally {
+    lines.close();
+    input.destroy();
+  }
+  return { records, nextOffset: more ? offset + limit : null };
+}
+
+module.exports = { RecordLog, readPage, SAMPLE_SIZE, MAX_PAGE };
@@ -0,0 +1,149 @@
+"""
+Stage Timings
+=============
+Opt-in hot-path instrumentation for analyze_video --timings. Records where
+an analysis spends its time, per stage:
+
+    decode       - pulling each sampled frame out of the video (grab/retrieve/seek)
+    preprocess   - letterbox + tensor conversion
+    forward      - the model's forward pass
+    postprocess  - confidence filter, NMS, box rescaling, conversion to arrays
+    boxes        - Python-side handling of each frame's boxes (records,
+                   summary, alerts, tracking)
+    serialize    - JSON encoding of the output
+
+For every stage the cumulative time is kept together with a histogram of
+per-frame times (a batched call is split evenly over its frames) on fixed
+millisecond buckets, so runs are comparable. Nothing is recorded unless a
+StageTimings object is passed in; detectors only check for it once per call.
+
+Usage:
+    timings = StageTimings()
+    with timings.stage('serialize'):
+        text = json.dumps(result)
+    for frame_idx, frame in timings.timed_iter(frames, 'decode'):
+        ...
+    timings.to_dict(wall)   # the "timings" block of the result
+"""
+
+import time
+from contextlib import contextmanager
+
+STAGES = ('decode', 'preprocess', 'forward', 'postprocess', 'boxes', 'serialize')
+
+# Upper bucket edges in ms; the last bucket counts everything slower
+HISTOGRAM_EDGES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class StageTimings:
+    """Cumulative time, call/frame counts and per-frame histograms per stage."""
+
+    def __init__(self):
+        self.total = {}       # stage -> seconds
+        self.calls = {}       # stage -> number of add() calls
+        self.frames = {}      # stage -> frames covered
+        self.histograms = {}  # stage -> counts per HISTOGRAM_EDGES_MS bucket
+        self.inference_calls = 0
+
+    def _ensure(self, stage):
+        if stage not in self.total:
+            self.total[stage] = 0.0
+            self.calls[stage] = 0
+            self.frames[stage] = 0
+            self.histograms[stage] = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+
+    def add(self, stage, seconds, frames=1):
+        """Record one call of `stage` that took `seconds` for `frames` frames."""
+        self._ensure(stage)
+        self.total[stage] += seconds
+        self.calls[stage] += 1
+        self.frames[stage] += frames
+        if frames:
+            per_frame_ms = seconds * 1000 / frames
+            bucket = len(HISTOGRAM_EDGES_MS)
+            for i, edge in enumerate(HISTOGRAM_EDGES_MS):
+                if per_frame_ms <= edge:
+                    bucket = i
+                    break
+            self.histograms[stage][bucket] += frames
+
+    @contextmanager
+    def stage(self, name, frames=1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, frames)
+
+    def timed_iter(self, iterable, stage):
+        """Yield from iterable, recording the time each item took to produce."""
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.add(stage, time.perf_counter() - start)
+            yield item
+
+    def export(self):
+        """Picklable state, for merging segment timings (see merge)."""
+        return {
+            'total': self.total,
+            'calls': self.calls,
+            'frames': self.frames,
+            'histograms': self.histograms,
+            'inferenceCalls': self.inference_calls,
+        }
+
+    def merge(self, part):
+        """Add the export() of another StageTimings (e.g. a worker process)."""
+        for stage, seconds in part['total'].items():
+            self._ensure(stage)
+            self.total[stage] += seconds
+            self.calls[stage] += part['calls'][stage]
+            self.frames[stage] += part['frames'][stage]
+            self.histograms[stage] = [a + b for a, b in zip(self.histograms[stage], part['histograms'][stage])]
+        self.inference_calls += part['inferenceCalls']
+
+    def to_dict(self, wall=None):
+        """The "timings" result block; wall (seconds) adds the unaccounted remainder."""
+        stages = {}
+        for stage in sorted(self.total, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES)):
+            total_ms = self.total[stage] * 1000
+            stages[stage] = {
+                'totalMs': round(total_ms, 2),
+                'calls': self.calls[stage],
+                'frames': self.frames[stage],
+                'msPerFrame': round(total_ms / self.frames[stage], 3) if self.frames[stage] else None,
+                'histogram': self.histograms[stage],
+            }
+        decoded = self.frames.get('decode', 0)
+        # one 'boxes' call per inferred frame; 'forward' may count tiles (see tiling)
+        inferred = self.frames.get('boxes', self.frames.get('forward', 0))
+        result = {
+            'stages': stages,
+            'histogramEdgesMs': list(HISTOGRAM_EDGES_MS),
+            'inferenceCalls': self.inference_calls,
+            'framesDecoded': decoded,
+            'framesInferred': inferred,
+            'framesSkipped': max(decoded - inferred, 0),
+        }
+        if wall is not None:
+            result['wallMs'] = round(wall * 1000, 2)
+            result['otherMs'] = round(max(wall - sum(self.total.values()), 0) * 1000, 2)
+        return result
+
+
+class TimedDetector:
+    """Detector wrapper that passes StageTimings into every predict() call."""
+
+    def __init__(self, detector, timings):
+        self.detector = detector
+        self.names = detector.names
+        self.timings = timings
+
+    def predict(self, frames, conf=0.25):
+        self.timings.inference_calls += 1
+        return self.detector.predict(frames, conf, timings=self.timings)
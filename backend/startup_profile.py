@@ -0,0 +1,81 @@
+"""
+Startup Profiling
+=================
+Breaks a script's cold start into the stages behind --profile-startup:
+
+    imports        - the script's own module-level imports
+    backend import - the inference backend's libraries (ultralytics + torch,
+                     onnxruntime or openvino), which load_detector() pulls in
+    model load     - reading the weights / compiling the model
+    warm-up        - the first inference call, which pays for lazy
+                     initialisation (predictor setup, kernel selection)
+
+Usage:
+    import time
+    _IMPORT_START = time.perf_counter()
+    ...                                          # module-level imports
+    from startup_profile import StartupProfile
+
+    profile = StartupProfile(imports=time.perf_counter() - _IMPORT_START)
+    detector = profile.load_detector(model_path, backend, warmup_shape=(720, 1280))
+    profile.report()                             # one line per stage on stderr
+"""
+
+import sys
+import time
+import importlib
+from contextlib import contextmanager
+
+import numpy as np
+
+from inference_backends import load_detector
+
+# Library that makes up most of a backend's import cost
+BACKEND_MODULES = {
+    'torch': 'ultralytics',
+    'onnxruntime': 'onnxruntime',
+    'openvino': 'openvino',
+}
+
+
+class StartupProfile:
+    """Named stage durations in seconds, in the order they were measured."""
+
+    def __init__(self, imports=None):
+        self.stages = {}
+        if imports is not None:
+            self.stages['imports'] = imports
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = time.perf_counter() - start
+
+    def load_detector(self, model_path, backend='torch', threads=None, warmup_shape=(640, 640)):
+        """load_detector() with its import, load and first-inference times recorded."""
+        with self.stage('backend import'):
+            importlib.import_module(BACKEND_MODULES[backend])
+        with self.stage('model load'):
+            detector = load_detector(model_path, backend, threads)
+        with self.stage('warm-up'):
+            detector.predict([np.zeros((*warmup_shape, 3), dtype=np.uint8)])
+        return detector
+
+    @property
+    def total(self):
+        return sum(self.stages.values())
+
+    def to_dict(self):
+        """{stage: seconds, ..., 'total': seconds} rounded to the millisecond."""
+        result = {name: round(seconds, 3) for name, seconds in self.stages.items()}
+        result['total'] = round(self.total, 3)
+        return result
+
+    def report(self, stream=None):
+        stream = stream or sys.stderr
+        for name, seconds in self.to_dict().items():
+            print(f'[startup] {name:<15} {seconds * 1000:>9.1f} ms', file=stream)
+        stream.flush()
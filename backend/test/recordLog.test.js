@@ -0,0 +1,83 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const { RecordLog, readPage, SAMPLE_SIZE } = require('../services/recordLog');
+
+function tempLog() {
+  const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'record-log-'));
+  return path.join(dir, 'video.mp4.records.ndjson');
+}
+
+function detection(frame) {
+  return { event: 'detection', frame, time: frame / 30, class: 'person', confidence: 0.9, bbox: [1, 2, 3, 4] };
+}
+
+function heapUsed() {
+  global.gc();
+  return process.memoryUsage().heapUsed;
+}
+
+// Feed records the way the worker's stdout does: a chunk per event-loop turn
+async function stream(log, from, to, chunk = 1000) {
+  for (let frame = from; frame < to; frame += chunk) {
+    for (let i = frame; i < Math.min(frame + chunk, to); i++) log.write(detection(i));
+    await new Promise((resolve) => setImmediate(resolve));
+  }
+}
+
+test('a long run keeps memory bounded', { skip: !global.gc && 'needs node --expose-gc' }, async () => {
+  const log = new RecordLog(tempLog());
+  await stream(log, 0, 20000);
+  const before = heapUsed();
+  await stream(log, 20000, 400000);
+  const growth = heapUsed() - before;
+  await log.close();
+
+  // 380k more records are ~40 MB of JSON; what stays in memory must not grow with them
+  assert.ok(growth < 4 * 1024 * 1024, `heap grew by ${(growth / 1048576).toFixed(1)} MB`);
+  assert.strictEqual(log.sample('detection').length, SAMPLE_SIZE);
+  const last = await readPage(log.filePath, { event: 'detection', offset: 399999 });
+  assert.deepStrictEqual(last, { records: [detection(399999)], nextOffset: null });
+});
+
+test('pages cover every record once', async () => {
+  const log = new RecordLog(tempLog());
+  await stream(log, 0, 2500);
+  log.write({ event: 'alert', type: 'intrusion', message: 'Person detected' });
+  await log.close();
+
+  const frames = [];
+  let offset = 0;
+  while (offset !== null) {
+    const page = await readPage(log.filePath, { event: 'detection', offset, limit: 1000 });
+    frames.push(...page.records.map((record) => record.frame));
+    offset = page.nextOffset;
+  }
+  assert.deepStrictEqual(frames, [...Array(2500).keys()]);
+  const alerts = await readPage(log.filePath, { event: 'alert' });
+  assert.strictEqual(alerts.records.length, 1);
+});
+
+test('a resumed run keeps the records before the checkpoint', async () => {
+  const filePath = tempLog();
+  const first = new RecordLog(filePath);
+  await stream(first, 0, 50);
+  await first.close();
+
+  const resumed = new RecordLog(filePath);
+  resumed.keep(30); // the worker's 'resume' record: 30 records were checkpointed
+  await stream(resumed, 30, 60);
+  await resumed.close();
+
+  const { records } = await readPage(filePath);
+  assert.deepStrictEqual(records.map((record) => record.frame), [...Array(60).keys()]);
+});
+
+test('a new run replaces the previous log', async () => {
+  const filePath = tempLog();
+  fs.writeFileSync(filePath, JSON.stringify(detection(7)) + '\n');
+  await new RecordLog(filePath).close();
+  assert.strictEqual(fs.readFileSync(filePath, 'utf-8'), '');
+});
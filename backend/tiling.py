@@ -0,0 +1,156 @@
+"""
+Tiled Inference
+===============
+Finds small, distant objects in high-resolution frames without raising the
+model's input size: each frame is cut into overlapping tiles of about the
+model's input size, all tiles (of all frames in the batch) go through the
+detector as one batch, boxes are shifted back to frame coordinates and the
+overlapping results are merged with a cross-tile NMS.
+
+The merge suppresses a box when it overlaps a higher-scoring box of the
+same class by IoU > iou_threshold. When the smaller of two boxes lies mostly
+inside the other (intersection over the smaller area > ios_threshold) they
+are merged into their union with the better score: that joins the partial
+box of an object cut by a tile edge with the rest of it, which plain IoU
+misses.
+
+Options:
+    roi         - tile only the ROI crop box and drop detections centred
+                  outside the polygons (see roi.py)
+    full_frame  - also run the whole frame (or ROI box) as one extra image;
+                  the detector letterboxes it to its input size, so this is
+                  a cheap low-resolution pass that catches objects too large
+                  for a single tile
+
+Usage:
+    from tiling import TiledDetector
+
+    detector = TiledDetector(load_detector('yolov8n.pt'), tile_size=640, overlap=0.2, full_frame=True)
+    detector.predict([frame_4k])   # full-frame Detections, merged over the tiles
+"""
+
+import time
+
+import numpy as np
+
+from detection_utils import Detections, empty_detections
+from inference_backends import MAX_DETECTIONS, MAX_WH
+
+DEFAULT_TILE_SIZE = 640
+DEFAULT_OVERLAP = 0.2
+MERGE_IOU = 0.5
+MERGE_IOS = 0.8
+
+
+def tile_grid(region, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP):
+    """(x1, y1, x2, y2) tiles of at most tile_size covering region = (x1, y1, x2, y2).
+
+    Neighbouring tiles overlap by at least `overlap` of a tile; the last
+    tile of each row/column is aligned to the region's edge.
+    """
+    def starts(low, high):
+        if high - low <= tile_size:
+            return [low]
+        step = max(1, int(tile_size * (1 - overlap)))
+        return list(range(low, high - tile_size, step)) + [high - tile_size]
+
+    x1, y1, x2, y2 = region
+    return [(x, y, min(x + tile_size, x2), min(y + tile_size, y2))
+            for y in starts(y1, y2) for x in starts(x1, x2)]
+
+
+def merge_detections(parts, iou_threshold=MERGE_IOU, ios_threshold=MERGE_IOS, max_det=MAX_DETECTIONS):
+    """Merge Detections in the same coordinates (e.g. shifted tiles) into one.
+
+    Greedy, best score first and class-aware; see the module docstring for
+    the suppression rules.
+    """
+    parts = [dets for dets in parts if len(dets.conf)]
+    if not parts:
+        return empty_detections()
+    xyxy = np.concatenate([dets.xyxy for dets in parts])
+    conf = np.concatenate([dets.conf for dets in parts])
+    cls = np.concatenate([dets.cls for dets in parts])
+
+    boxes = xyxy + (cls * MAX_WH)[:, None]  # offset per class: no overlap across classes
+    areas = np.maximum((boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]), 1e-9)
+    merged = xyxy.copy()
+    order = np.argsort(-conf, kind='stable')
+    keep = []
+    while order.size and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(boxes[i, 2], boxes[rest, 2]) - np.maximum(boxes[i, 0], boxes[rest, 0]), 0, None)
+        h = np.clip(np.minimum(boxes[i, 3], boxes[rest, 3]) - np.maximum(boxes[i, 1], boxes[rest, 1]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter)
+        ios = inter / np.minimum(areas[i], areas[rest])
+        contained = ios > ios_threshold
+        if contained.any():
+            # one box is (mostly) part of the other: keep the best score on the union
+            absorbed = rest[contained]
+            merged[i, :2] = np.minimum(merged[i, :2], xyxy[absorbed, :2].min(axis=0))
+            merged[i, 2:] = np.maximum(merged[i, 2:], xyxy[absorbed, 2:].max(axis=0))
+        order = rest[(iou <= iou_threshold) & ~contained]
+    keep = np.array(keep, dtype=np.int64)
+    return Detections(merged[keep], conf[keep], cls[keep])
+
+
+class TiledDetector:
+    """Detector wrapper that runs each frame as overlapping tiles (see module docstring)."""
+
+    def __init__(self, detector, tile_size=DEFAULT_TILE_SIZE, overlap=DEFAULT_OVERLAP,
+                 full_frame=False, roi=None, iou_threshold=MERGE_IOU, ios_threshold=MERGE_IOS):
+        if tile_size < 32:
+            raise ValueError('tile_size must be at least 32 pixels')
+        if not 0 <= overlap < 1:
+            raise ValueError('overlap must be in [0, 1)')
+        self.detector = detector
+        self.names = detector.names
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.full_frame = full_frame
+        self.roi = roi
+        self.iou_threshold = iou_threshold
+        self.ios_threshold = ios_threshold
+
+    def regions(self, shape):
+        """Crop boxes run for a frame of this shape: the tiles, then the full pass if enabled."""
+        h, w = shape[:2]
+        area = self.roi.resolve(shape)[1] if self.roi is not None else (0, 0, w, h)
+        boxes = tile_grid(area, self.tile_size, self.overlap)
+        if self.full_frame and len(boxes) > 1:
+            boxes.append(area)
+        return boxes
+
+    def predict(self, frames, conf=0.25, timings=None):
+        crops, owners, offsets = [], [], []
+        for i, frame in enumerate(frames):
+            for x1, y1, x2, y2 in self.regions(frame.shape):
+                crops.append(frame[y1:y2, x1:x2])
+                owners.append(i)
+                offsets.append((x1, y1))
+
+        if timings is None:
+            detections = self.detector.predict(crops, conf)
+        else:
+            detections = self.detector.predict(crops, conf, timings=timings)
+
+        start = time.perf_counter()
+        parts = [[] for _ in frames]
+        for dets, owner, (x, y) in zip(detections, owners, offsets):
+            if len(dets.conf):
+                shift = np.array([x, y, x, y], dtype=dets.xyxy.dtype)
+                parts[owner].append(Detections(dets.xyxy + shift, dets.conf, dets.cls))
+        results = []
+        for frame, frame_parts in zip(frames, parts):
+            merged = merge_detections(frame_parts, self.iou_threshold, self.ios_threshold)
+            if self.roi is not None and len(merged.conf):
+                keep = self.roi.contains(merged, frame.shape)
+                merged = Detections(merged.xyxy[keep], merged.conf[keep], merged.cls[keep])
+            results.append(merged)
+        if timings is not None:
+            # merging is post-processing, but its frames were already counted per tile
+            timings.add('postprocess', time.perf_counter() - start, 0)
+        return results
@@ -0,0 +1,184 @@
+"""
+Lightweight Multi-Object Tracker
+================================
+Collapses per-frame detections into tracks on the CPU, so one person standing
+in view for an hour becomes one record instead of thousands of rows.
+
+Each track keeps a constant-velocity estimate of its box (an alpha-beta
+filter, a cheap stand-in for a Kalman filter) so it can be predicted across
+the frames skipped between samples. New detections are associated with the
+predicted boxes of same-class tracks by greedy IoU matching. A track ends
+once it has not been matched for more than max_gap frames.
+
+Track records (see Track.to_record):
+    { "id": 3, "class": "person", "firstFrame": 120, "lastFrame": 960,
+      "firstTime": 4.0, "lastTime": 32.0, "detections": 29,
+      "bestConfidence": 0.91, "bestFrame": 450,
+      "path": [[120, x1, y1, x2, y2], [300, ...], ...] }
+
+The path only gets a new point when the box has moved noticeably since the
+last stored point (IoU below path_iou); the last observation is always kept.
+"""
+
+import numpy as np
+
+VELOCITY_GAIN = 0.5  # weight of the newest velocity measurement
+
+
+def iou_matrix(a, b):
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes -> (N, M)."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+class Track:
+    """One tracked object."""
+
+    def __init__(self, track_id, cls_id, frame_idx, box, conf):
+        self.id = track_id
+        self.cls = cls_id
+        self.first_frame = frame_idx
+        self.last_frame = frame_idx
+        self.box = box.astype(np.float64)
+        self.velocity = np.zeros(4)
+        self.hits = 1
+        self.best_conf = conf
+        self.best_frame = frame_idx
+        self.confirmed = False
+        self.path = [[frame_idx, *box.astype(int).tolist()]]
+        self.last_point = None  # latest observation not stored in path
+
+    def predict(self, frame_idx):
+        return self.box + self.velocity * (frame_idx - self.last_frame)
+
+    def update(self, frame_idx, box, conf, path_iou):
+        dt = frame_idx - self.last_frame
+        if dt > 0:
+            measured = (box - self.box) / dt
+            self.velocity = VELOCITY_GAIN * measured + (1 - VELOCITY_GAIN) * self.velocity
+        self.box = box.astype(np.float64)
+        self.last_frame = frame_idx
+        self.hits += 1
+        if conf > self.best_conf:
+            self.best_conf, self.best_frame = conf, frame_idx
+
+        point = [frame_idx, *box.astype(int).tolist()]
+        last = np.array(self.path[-1][1:], dtype=np.float64)
+        if iou_matrix(last[None], self.box[None])[0, 0] < path_iou:
+            self.path.append(point)
+            self.last_point = None
+        else:
+            self.last_point = point
+
+    def get_state(self):
+        """JSON-serializable copy of the track (see from_state)."""
+        state = dict(vars(self))
+        state['box'] = self.box.tolist()
+        state['velocity'] = self.velocity.tolist()
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        track = cls.__new__(cls)
+        vars(track).update(state)
+        track.box = np.array(state['box'], dtype=np.float64)
+        track.velocity = np.array(state['velocity'], dtype=np.float64)
+        return track
+
+    def to_record(self, names, fps):
+        path = self.path if self.last_point is None else self.path + [self.last_point]
+        return {
+            'id': self.id,
+            'class': names[self.cls],
+            'firstFrame': self.first_frame,
+            'lastFrame': self.last_frame,
+            'firstTime': round(self.first_frame / fps, 1),
+            'lastTime': round(self.last_frame / fps, 1),
+            'detections': self.hits,
+            'bestConfidence': round(self.best_conf, 2),
+            'bestFrame': self.best_frame,
+            'path': path,
+        }
+
+
+class IoUTracker:
+    """Greedy IoU tracker over detections given in increasing frame order.
+
+    Args:
+        iou_threshold: Minimum IoU between a predicted track box and a detection.
+        max_gap:       Frames a track may go unmatched before it is finished.
+        min_hits:      Matches needed before a track counts as confirmed.
+        path_iou:      Store a new path point once IoU with the last one drops below this.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_gap=90, min_hits=1, path_iou=0.7):
+        self.iou_threshold = iou_threshold
+        self.max_gap = max_gap
+        self.min_hits = min_hits
+        self.path_iou = path_iou
+        self.active = []
+        self.next_id = 1
+
+    def update(self, frame_idx, xyxy, conf, cls):
+        """Associate one frame's detections.
+
+        Returns (confirmed, finished): tracks confirmed by this frame and
+        tracks that ended before it.
+        """
+        finished = [t for t in self.active if frame_idx - t.last_frame > self.max_gap]
+        if finished:
+            self.active = [t for t in self.active if frame_idx - t.last_frame <= self.max_gap]
+
+        matched_tracks = set()
+        matched_dets = set()
+        if self.active and len(conf):
+            predicted = np.array([t.predict(frame_idx) for t in self.active])
+            track_cls = np.array([t.cls for t in self.active])
+            iou = iou_matrix(predicted, xyxy.astype(np.float64))
+            iou[track_cls[:, None] != cls[None, :]] = 0.0
+            # Greedy assignment, best overlaps first
+            order = np.argsort(-iou, axis=None)
+            for flat in order.tolist():
+                t, d = divmod(flat, iou.shape[1])
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_dets:
+                    continue
+                matched_tracks.add(t)
+                matched_dets.add(d)
+                self.active[t].update(frame_idx, xyxy[d], float(conf[d]), self.path_iou)
+
+        for d in range(len(conf)):
+            if d not in matched_dets:
+                self.active.append(Track(self.next_id, int(cls[d]), frame_idx, xyxy[d], float(conf[d])))
+                self.next_id += 1
+
+        confirmed = []
+        for track in self.active:
+            if not track.confirmed and track.hits >= self.min_hits:
+                track.confirmed = True
+                confirmed.append(track)
+        return confirmed, [t for t in finished if t.confirmed]
+
+    def get_state(self):
+        """JSON-serializable tracker state, for checkpoints (see set_state)."""
+        return {'active': [t.get_state() for t in self.active], 'next_id': self.next_id}
+
+    def set_state(self, state):
+        self.active = [Track.from_state(t) for t in state['active']]
+        self.next_id = state['next_id']
+
+    def finish(self):
+        """End all active tracks (end of video) and return the confirmed ones."""
+        finished = [t for t in self.active if t.confirmed]
+        self.active = []
+        return finished
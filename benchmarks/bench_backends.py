@@ -0,0 +1,125 @@
+"""
+Inference Backend Benchmark
+===========================
+Compares the torch, onnxruntime and openvino backends (see
+backend/inference_backends.py) on the CPU: import time of the backend's
+libraries, model load time, and per-frame latency over frames sampled from
+a video. Each backend runs in a fresh Python process so import and start-up
+costs are measured cold and do not leak between backends.
+
+Export the ONNX / OpenVINO models first (export_model() in train_yolo.py).
+
+Usage:
+    python benchmarks/bench_backends.py <video_path> --pt yolov8n.pt --onnx yolov8n.onnx
+                                        [--openvino yolov8n_openvino_model/]
+                                        [--frames 50] [--interval 10] [--threads 4]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+BACKEND_IMPORTS = {
+    'torch': 'ultralytics',
+    'onnxruntime': 'onnxruntime',
+    'openvino': 'openvino',
+}
+
+
+def run_child(backend, model_path, video, frames, interval, threads, conf):
+    """Measure one backend in this (fresh) process and print a JSON line."""
+    import importlib
+
+    start = time.perf_counter()
+    importlib.import_module(BACKEND_IMPORTS[backend])
+    import_time = time.perf_counter() - start
+
+    sys.path.insert(0, BACKEND_DIR)
+    import cv2
+    from inference_backends import load_detector
+
+    start = time.perf_counter()
+    detector = load_detector(model_path, backend, threads)
+    load_time = time.perf_counter() - start
+
+    cap = cv2.VideoCapture(video)
+    images = []
+    idx = 0
+    while len(images) < frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if idx % interval == 0:
+            images.append(frame)
+        idx += 1
+    cap.release()
+    if not images:
+        raise SystemExit(f'No frames read from {video}')
+
+    detector.predict(images[:1], conf)  # warm-up
+    latencies = []
+    boxes = 0
+    for image in images:
+        start = time.perf_counter()
+        dets = detector.predict([image], conf)[0]
+        latencies.append(time.perf_counter() - start)
+        boxes += len(dets.conf)
+
+    latencies.sort()
+    print(json.dumps({
+        'backend': backend,
+        'import': import_time,
+        'load': load_time,
+        'median': latencies[len(latencies) // 2],
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        'frames': len(images),
+        'boxes': boxes,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CPU inference backends')
+    parser.add_argument('video', help='Video to sample frames from')
+    parser.add_argument('--pt', default='yolov8n.pt', help='PyTorch weights for the torch backend')
+    parser.add_argument('--onnx', default=None, help='Exported .onnx model')
+    parser.add_argument('--openvino', default=None, help='Exported OpenVINO model directory or .xml')
+    parser.add_argument('--frames', type=int, default=50, help='Frames to time per backend')
+    parser.add_argument('--interval', type=int, default=10, help='Take every N-th frame of the video')
+    parser.add_argument('--threads', type=int, default=None, help='CPU threads per backend (default: all)')
+    parser.add_argument('--conf', type=float, default=0.45, help='Confidence threshold')
+    parser.add_argument('--child', nargs=2, metavar=('BACKEND', 'MODEL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child, args.video, args.frames, args.interval, args.threads, args.conf)
+        return
+
+    models = [('torch', args.pt), ('onnxruntime', args.onnx), ('openvino', args.openvino)]
+    print(f'Video: {args.video}  ({args.frames} frames, {os.cpu_count()} CPUs)\n')
+    print(f"{'backend':<12} {'import (s)':>10} {'load (s)':>9} {'median (ms)':>12} "
+          f"{'p95 (ms)':>9} {'boxes':>6}")
+    print('-' * 64)
+
+    for backend, model_path in models:
+        if not model_path:
+            continue
+        cmd = [sys.executable, os.path.abspath(__file__), args.video, '--child', backend, model_path,
+               '--frames', str(args.frames), '--interval', str(args.interval), '--conf', str(args.conf)]
+        if args.threads:
+            cmd += ['--threads', str(args.threads)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            error = (proc.stderr.strip().splitlines() or ['failed'])[-1]
+            print(f'{backend:<12} {error}')
+            continue
+        row = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{backend:<12} {row['import']:>10.2f} {row['load']:>9.2f} {row['median'] * 1000:>12.1f} "
+              f"{row['p95'] * 1000:>9.1f} {row['boxes']:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Decode Benchmark for Frame Sampling
+===================================
+Measures how long it takes to pull the sampled frames out of a video with
+each frame_sampler strategy, for a range of --interval values, and checks
+that every strategy yields the same frame indices.
+
+With --decode-size every strategy is also timed through the resolution-aware
+path (see backend/fast_decode.py: decode into a reused buffer, shrink to
+SIZE on the long side) as "<strategy>@SIZE", and, with PyAV installed, the
+decode that scales inside swscale as "pyav@SIZE".
+
+Usage:
+    python benchmarks/bench_decode.py <video_path> [--intervals 1 5 15 30 60 120]
+                                                   [--strategies read grab seek] [--decode-size 640]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from frame_sampler import SAMPLING_STRATEGIES, iter_sampled_frames  # noqa: E402
+from fast_decode import (Downscaler, inference_shape, iter_downscaled_frames, iter_scaled_decode,  # noqa: E402
+                         scaled_decode_available)
+
+
+def time_strategy(video_path, frame_interval, strategy, decode_size=None):
+    """Return (seconds, sampled frame indices) for one pass over the video."""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise SystemExit(f'Cannot open video: {video_path}')
+    start = time.perf_counter()
+    if strategy == 'pyav':
+        frames = iter_scaled_decode(video_path, frame_interval, Downscaler(decode_size))
+    elif decode_size:
+        frames = iter_downscaled_frames(cap, frame_interval, Downscaler(decode_size), strategy)
+    else:
+        frames = iter_sampled_frames(cap, frame_interval, strategy)
+    indices = [idx for idx, _frame in frames]
+    elapsed = time.perf_counter() - start
+    cap.release()
+    return elapsed, indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark frame sampling strategies')
+    parser.add_argument('video', help='Path to video file')
+    parser.add_argument('--intervals', type=int, nargs='+', default=[1, 5, 15, 30, 60, 120])
+    parser.add_argument('--strategies', nargs='+', choices=SAMPLING_STRATEGIES,
+                        default=list(SAMPLING_STRATEGIES))
+    parser.add_argument('--decode-size', type=int, default=None,
+                        help='Also time each strategy shrinking frames to this long side')
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    print(f'Video: {args.video} ({width}x{height}, {total} frames)')
+    runs = [(strategy, None) for strategy in args.strategies]
+    if args.decode_size:
+        h, w = inference_shape((height, width), args.decode_size)
+        print(f'Frames handed on: {width}x{height} ({width * height * 3 / 1e6:.1f} MB each, newly '
+              f'allocated) or {w}x{h} ({w * h * 3 / 1e6:.2f} MB, reused buffers) with --decode-size')
+        runs += [(strategy, args.decode_size) for strategy in args.strategies]
+        if scaled_decode_available():
+            runs.append(('pyav', args.decode_size))
+    print()
+
+    labels = [strategy + (f'@{size}' if size else '') for strategy, size in runs]
+    header = f"{'interval':>8} {'sampled':>8}" + ''.join(f' {label + " (s)":>14}' for label in labels)
+    print(header)
+    print('-' * len(header))
+
+    for interval in args.intervals:
+        reference = None
+        row = ''
+        for (strategy, size), label in zip(runs, labels):
+            elapsed, indices = time_strategy(args.video, interval, strategy, size)
+            if reference is None:
+                reference = indices
+            elif indices != reference:
+                print(f'[WARN] {label} yielded different frames at interval {interval}')
+            row += f' {elapsed:>14.3f}'
+        print(f'{interval:>8} {len(reference):>8}' + row)
+
+
+if __name__ == '__main__':
+    main()
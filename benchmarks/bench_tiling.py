@@ -0,0 +1,161 @@
+"""
+Tiled Inference Benchmark
+=========================
+Measures the latency / recall trade-off of tiled inference (see
+backend/tiling.py) on the synthetic fixtures or a real video. For each
+frame size it runs:
+
+    full         - the plain detector on the whole frame (letterboxed down)
+    tiles        - overlapping tiles of --tile pixels
+    tiles+full   - the tiles plus the low-resolution full-frame pass
+    roi-tiles    - tiles over the camera's ROI only (with --camera)
+
+There are no ground-truth labels, so recall is relative: the share of the
+reference detections (tiles of half the --tile size plus the full-frame
+pass, the most expensive configuration) that a configuration also finds,
+same class at IoU >= 0.5. For roi-tiles only the reference detections
+inside the ROI count. Use a trained model on footage of the site for
+numbers that mean something; random or COCO weights on synthetic
+rectangles only exercise the code paths.
+
+Usage:
+    python benchmarks/bench_tiling.py [--fixtures hd fhd uhd] [--video clip.mp4]
+                                      [--model yolov8n.pt] [--backend torch] [--tile 640]
+                                      [--camera CAM-01] [--frames 20] [--interval 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from synthetic import DEFAULT_DIR, FIXTURES, fixture_path  # noqa: E402
+from inference_backends import BACKENDS, load_detector  # noqa: E402
+from roi import DEFAULT_ROI_CONFIG, RegionOfInterest, camera_roi  # noqa: E402
+from tiling import TiledDetector  # noqa: E402
+
+MATCH_IOU = 0.5
+
+
+def sample_frames(video, frames, interval):
+    """Every interval-th frame of the video, at most `frames` of them."""
+    cap = cv2.VideoCapture(video)
+    if not cap.isOpened():
+        raise SystemExit(f'Cannot open video: {video}')
+    images = []
+    idx = 0
+    while len(images) < frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if idx % interval == 0:
+            images.append(frame)
+        idx += 1
+    cap.release()
+    return images
+
+
+def matched(reference, found, iou_threshold=MATCH_IOU):
+    """Number of reference boxes with a same-class box in found at IoU >= threshold."""
+    if not len(reference.conf) or not len(found.conf):
+        return 0
+    a, b = reference.xyxy[:, None, :], found.xyxy[None, :, :]
+    w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = w * h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    iou = inter / np.maximum(area_a + area_b - inter, 1e-9)
+    same = reference.cls[:, None] == found.cls[None, :]
+    return int(((iou >= iou_threshold) & same).any(axis=1).sum())
+
+
+def run_config(detector, images, conf):
+    """Per-frame detections and latencies (seconds) of one configuration."""
+    detector.predict(images[:1], conf)  # warm-up
+    detections, latencies = [], []
+    for image in images:
+        start = time.perf_counter()
+        detections.append(detector.predict([image], conf)[0])
+        latencies.append(time.perf_counter() - start)
+    return detections, latencies
+
+
+def bench(label, images, model, args, roi):
+    h, w = images[0].shape[:2]
+    configs = [
+        ('full', model),
+        ('tiles', TiledDetector(model, args.tile, args.overlap)),
+        ('tiles+full', TiledDetector(model, args.tile, args.overlap, full_frame=True)),
+    ]
+    if roi is not None:
+        configs.append(('roi-tiles', TiledDetector(model, args.tile, args.overlap, roi=roi)))
+    reference = TiledDetector(model, max(32, args.tile // 2), args.overlap, full_frame=True)
+
+    ref_dets, _ = run_config(reference, images, args.conf)
+    ref_roi = None
+    if roi is not None:
+        ref_roi = []
+        for dets in ref_dets:
+            keep = roi.contains(dets, images[0].shape) if len(dets.conf) else np.zeros(0, dtype=bool)
+            ref_roi.append(type(dets)(dets.xyxy[keep], dets.conf[keep], dets.cls[keep]))
+
+    print(f'\n{label}: {w}x{h}, {len(images)} frames, '
+          f'{len(reference.regions(images[0].shape))} reference crops, '
+          f'{sum(len(d.conf) for d in ref_dets)} reference boxes')
+    print(f"{'config':<12} {'crops':>6} {'median (ms)':>12} {'p95 (ms)':>9} {'boxes':>6} {'recall':>7}")
+    print('-' * 57)
+    for name, detector in configs:
+        dets, latencies = run_config(detector, images, args.conf)
+        crops = len(detector.regions(images[0].shape)) if isinstance(detector, TiledDetector) else 1
+        truth = ref_roi if name == 'roi-tiles' else ref_dets
+        total = sum(len(d.conf) for d in truth)
+        hits = sum(matched(t, d) for t, d in zip(truth, dets))
+        recall = f'{hits / total:.3f}' if total else '-'
+        latencies.sort()
+        print(f"{name:<12} {crops:>6} {latencies[len(latencies) // 2] * 1000:>12.1f} "
+              f"{latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:>9.1f} "
+              f"{sum(len(d.conf) for d in dets):>6} {recall:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tiled inference: latency vs relative recall')
+    parser.add_argument('--fixtures', nargs='+', choices=FIXTURES, default=['hd', 'fhd', 'uhd'])
+    parser.add_argument('--video', default=None, help='Benchmark this video instead of the fixtures')
+    parser.add_argument('--dir', default=DEFAULT_DIR, help='Fixture directory')
+    parser.add_argument('--model', default='yolov8n.pt', help='Model weights')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch', help='Inference backend')
+    parser.add_argument('--threads', type=int, default=None, help='CPU threads (default: all)')
+    parser.add_argument('--tile', type=int, default=640, help='Tile size in pixels')
+    parser.add_argument('--overlap', type=float, default=0.2, help='Tile overlap fraction')
+    parser.add_argument('--camera', default=None, help='Also benchmark tiling only this camera\'s ROI')
+    parser.add_argument('--roi-config', default=DEFAULT_ROI_CONFIG, help='ROI config file')
+    parser.add_argument('--frames', type=int, default=20, help='Frames to time per video')
+    parser.add_argument('--interval', type=int, default=3, help='Take every N-th frame of the video')
+    parser.add_argument('--conf', type=float, default=0.25, help='Confidence threshold')
+    args = parser.parse_args()
+
+    roi = RegionOfInterest.from_config(camera_roi(args.camera, args.roi_config)) if args.camera else None
+    model = load_detector(args.model, args.backend, args.threads)
+    print(f'Model: {args.model}  tile {args.tile}px, overlap {args.overlap:.0%}, '
+          f'{os.cpu_count()} CPUs')
+
+    videos = [(args.video, args.video)] if args.video else [
+        (name, fixture_path(name, args.dir)) for name in args.fixtures]
+    for label, video in videos:
+        images = sample_frames(video, args.frames, args.interval)
+        if not images:
+            print(f'\n{label}: no frames read')
+            continue
+        bench(label, images, model, args, roi)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Training Image Store Benchmark
+==============================
+Measures what the preprocessed image store (see backend/image_store.py and
+train_yolo.build_image_store) saves per training epoch on the CPU. A small
+detection dataset is made from JPEG stills of a synthetic fixture (one box
+per image; the labels only need to be valid, not meaningful), then the same
+model is trained for a few epochs twice:
+
+    decode   - ultralytics decodes and resizes every JPEG every epoch
+    store    - images come from the memory-mapped store
+
+For each run it reports the median train-loop and validation time per
+epoch (the first epoch is left out when there are more, it includes
+dataloader start-up), plus the one-off cost of building the store and of
+re-checking it when nothing changed.
+
+Usage:
+    python benchmarks/bench_train_cache.py [--fixture fhd] [--images 64] [--epochs 3]
+                                           [--model yolov8n.yaml] [--imgsz 640] [--batch 8]
+                                           [--workers 2]
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import DEFAULT_DIR, FIXTURES, image_set  # noqa: E402
+from train_yolo import build_image_store, image_store_trainer  # noqa: E402
+
+
+def make_dataset(stills, directory, val_share=0.25):
+    """YOLO dataset (images, one-box labels, data.yaml) from a directory of stills."""
+    names = sorted(os.listdir(stills))
+    val_count = max(1, int(len(names) * val_share))
+    for index, name in enumerate(names):
+        split = 'val' if index % max(1, len(names) // val_count) == 0 else 'train'
+        for kind in ('images', 'labels'):
+            os.makedirs(os.path.join(directory, kind, split), exist_ok=True)
+        target = os.path.join(directory, 'images', split, name)
+        try:
+            os.link(os.path.join(stills, name), target)
+        except OSError:
+            shutil.copy2(os.path.join(stills, name), target)
+        with open(os.path.join(directory, 'labels', split, os.path.splitext(name)[0] + '.txt'), 'w') as f:
+            f.write(f'0 0.5 0.5 {0.2 + 0.05 * (index % 5):.2f} 0.3\n')
+    data_yaml = os.path.join(directory, 'data.yaml')
+    with open(data_yaml, 'w') as f:
+        f.write(f'path: {directory}\ntrain: images/train\nval: images/val\nnames:\n  0: object\n')
+    return data_yaml
+
+
+def train_epochs(args, data_yaml, project, store=None):
+    """(train seconds, val seconds) per epoch of one training run."""
+    from ultralytics import YOLO
+
+    model = YOLO(args.model)
+    marks = {}  # epoch -> {event: first time it fired}
+    for event in ('on_train_epoch_start', 'on_train_epoch_end', 'on_fit_epoch_end'):
+        model.add_callback(event, lambda trainer, event=event: marks.setdefault(trainer.epoch, {}).setdefault(
+            event, time.perf_counter()))
+    model.train(
+        trainer=image_store_trainer(store) if store else None,
+        data=data_yaml, epochs=args.epochs, imgsz=args.imgsz, batch=args.batch, workers=args.workers,
+        device='cpu', project=project, name='store' if store else 'decode', exist_ok=True,
+        plots=False, save=False, verbose=False, amp=False,
+    )
+    return [(m['on_train_epoch_end'] - m['on_train_epoch_start'], m['on_fit_epoch_end'] - m['on_train_epoch_end'])
+            for _, m in sorted(marks.items()) if len(m) == 3]  # the final validation is not an epoch
+
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark training epochs with and without the image store')
+    parser.add_argument('--fixture', choices=FIXTURES, default='fhd', help='Fixture the stills are taken from')
+    parser.add_argument('--dir', default=DEFAULT_DIR, help='Fixture directory')
+    parser.add_argument('--images', type=int, default=64, help='Images in the dataset (train + val)')
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--model', default='yolov8n.yaml', help='Model (a .yaml trains from scratch, no download)')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--batch', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2, help='Dataloader workers')
+    args = parser.parse_args()
+
+    stills = image_set(args.fixture, args.images, args.dir)
+    work = tempfile.mkdtemp(prefix='bench_train_cache_')
+    try:
+        data_yaml = make_dataset(stills, os.path.join(work, 'dataset'))
+        store_dir = os.path.join(work, 'image_store')
+
+        start = time.perf_counter()
+        store = build_image_store(data_yaml, args.imgsz, store_dir)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        build_image_store(data_yaml, args.imgsz, store_dir)
+        warm = time.perf_counter() - start
+
+        runs = {
+            'decode': train_epochs(args, data_yaml, os.path.join(work, 'runs')),
+            'store': train_epochs(args, data_yaml, os.path.join(work, 'runs'), store),
+        }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    width, height, _ = FIXTURES[args.fixture]
+    print(f'\n{args.images} images of {width}x{height} at {args.imgsz}px, {args.epochs} epochs of {args.model}, '
+          f'batch {args.batch}, {args.workers} workers, {os.cpu_count()} CPUs')
+    print(f'Store: built in {cold:.2f}s, re-checked unchanged in {warm:.3f}s')
+    print(f"{'run':<8} {'train/epoch (s)':>16} {'val/epoch (s)':>14} {'epoch (s)':>10}")
+    print('-' * 51)
+    epoch = {}
+    for name, epochs in runs.items():
+        steady = epochs[1:] or epochs
+        train, val = median([t for t, _ in steady]), median([v for _, v in steady])
+        epoch[name] = train + val
+        print(f'{name:<8} {train:>16.2f} {val:>14.2f} {epoch[name]:>10.2f}')
+    print(f"\nSpeed-up per epoch: {epoch['decode'] / epoch['store']:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Parallel Segment Scaling Benchmark
+==================================
+Runs analyze_video() on one video with --workers 1/2/4/8, reports wall time
+and speed-up over a single process, and checks that every run produces the
+same output as the single-process run.
+
+Usage:
+    python benchmarks/bench_workers.py <video_path> [--model yolov8n.pt] [--interval 30]
+                                                    [--workers 1 2 4 8]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+from analyze_video import analyze_video  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark analyze_video --workers scaling')
+    parser.add_argument('video', help='Path to video file')
+    parser.add_argument('--model', default='yolov8n.pt', help='YOLOv8 model path')
+    parser.add_argument('--interval', type=int, default=30, help='Analyze every N-th frame')
+    parser.add_argument('--conf', type=float, default=0.45, help='Confidence threshold')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    print(f'Video: {args.video}  (interval {args.interval}, {os.cpu_count()} CPUs)\n')
+    print(f"{'workers':>8} {'time (s)':>10} {'speed-up':>10} {'frames/s':>10}  output")
+    print('-' * 56)
+
+    baseline = baseline_time = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        result = analyze_video(args.video, args.model, args.interval, args.conf, workers=workers)
+        elapsed = time.perf_counter() - start
+        if 'error' in result:
+            raise SystemExit(result['error'])
+
+        encoded = json.dumps(result)
+        if baseline is None:
+            baseline, baseline_time = encoded, elapsed
+        status = 'identical' if encoded == baseline else 'DIFFERS'
+        print(f'{workers:>8} {elapsed:>10.2f} {baseline_time / elapsed:>9.2f}x '
+              f'{result["analyzedFrames"] / elapsed:>10.1f}  {status}')
+
+
+if __name__ == '__main__':
+    main()
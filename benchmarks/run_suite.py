@@ -0,0 +1,354 @@
+"""
+Benchmark Suite
+===============
+Runs the detection paths over the synthetic fixtures (see synthetic.py) and
+writes one JSON file per run, so two runs can be compared before and after a
+change:
+
+    analyze  - analyze_video() as the Node backend runs it (one result JSON)
+    detect   - the yolo_detect.py path per still: imread, predict, annotate, imwrite
+    webcam   - the webcam_detect.py loop fed from the fixture file: read,
+               predict, draw_detections + overlay (no window)
+
+Every scenario/fixture pair runs in a fresh Python process, so peak RSS and
+start-up costs are measured on their own. Per-stage latencies are reported
+as mean / p50 / p90 / p99 / max in milliseconds; for analyze the stages are
+"inference" (each predict() call) and "between" (everything between two
+predict() calls: seeking, decoding, collecting results). frames/s counts
+video frames covered for analyze (the sampled ones are a fraction) and
+frames or stills processed for the others.
+
+Usage:
+    python benchmarks/run_suite.py run [--fixtures small hd] [--scenarios analyze detect webcam]
+                                       [--model yolov8n.pt] [--backend torch] [--interval 30]
+                                       [--images 30] [--frames 150] [--output results.json]
+    python benchmarks/run_suite.py compare base.json new.json [--threshold 0.05]
+
+compare prints the frames/s, p50 stage latency and peak RSS changes per
+scenario/fixture and exits with status 1 when frames/s dropped by more than
+--threshold anywhere.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np  # noqa: E402
+
+from synthetic import DEFAULT_DIR, FIXTURES, fixture_path, image_set  # noqa: E402
+
+SCENARIOS = ('analyze', 'detect', 'webcam')
+
+
+# ─── Measurement helpers ─────────────────────────────────────────────────────
+
+class StageTimer:
+    """Collects per-call durations (seconds) for named stages."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        result = {}
+        for stage, values in self.samples.items():
+            ms = np.array(values) * 1000
+            result[stage] = {
+                'count': len(values),
+                'mean': round(float(ms.mean()), 3),
+                'p50': round(float(np.percentile(ms, 50)), 3),
+                'p90': round(float(np.percentile(ms, 90)), 3),
+                'p99': round(float(np.percentile(ms, 99)), 3),
+                'max': round(float(ms.max()), 3),
+            }
+        return result
+
+
+class TimedDetector:
+    """Wraps a detector to time every predict() call and the gaps between them."""
+
+    def __init__(self, detector, timer):
+        self.detector = detector
+        self.names = detector.names
+        self.timer = timer
+        self._last = None
+
+    def predict(self, frames, conf=0.25):
+        start = time.perf_counter()
+        if self._last is not None:
+            self.timer.add('between', start - self._last)
+        dets = self.detector.predict(frames, conf)
+        self._last = time.perf_counter()
+        self.timer.add('inference', self._last - start)
+        return dets
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(path) for f in files)
+
+
+# ─── Scenarios (run inside the child process) ────────────────────────────────
+
+def run_analyze(detector, fixture, args, timer):
+    from analyze_video import analyze_video
+
+    video = fixture_path(fixture, args.fixture_dir)
+    model = TimedDetector(detector, timer)
+    start = time.perf_counter()
+    result = analyze_video(video, model_path=args.model, frame_interval=args.interval,
+                           confidence=args.conf, model=model, backend=args.backend)
+    wall = time.perf_counter() - start
+    if 'error' in result:
+        raise SystemExit(result['error'])
+    return {
+        'frames': result['totalFrames'],
+        'analyzedFrames': result['analyzedFrames'],
+        'wall': wall,
+        'outputBytes': len(json.dumps(result)),
+    }
+
+
+def run_detect(detector, fixture, args, timer):
+    import cv2
+    from yolo_detect import annotate
+
+    images = image_set(fixture, args.images, args.fixture_dir)
+    paths = sorted(os.path.join(images, f) for f in os.listdir(images))
+    out_dir = tempfile.mkdtemp(prefix='bench_detect_')
+    try:
+        start = time.perf_counter()
+        for path in paths:
+            t0 = time.perf_counter()
+            image = cv2.imread(path)
+            t1 = time.perf_counter()
+            dets = detector.predict([image], args.conf)[0]
+            t2 = time.perf_counter()
+            annotated = annotate(image, dets, detector.names)
+            t3 = time.perf_counter()
+            cv2.imwrite(os.path.join(out_dir, os.path.basename(path)), annotated)
+            t4 = time.perf_counter()
+            for stage, seconds in (('decode', t1 - t0), ('inference', t2 - t1),
+                                   ('annotate', t3 - t2), ('write', t4 - t3)):
+                timer.add(stage, seconds)
+        wall = time.perf_counter() - start
+        output_bytes = dir_size(out_dir)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return {'frames': len(paths), 'wall': wall, 'outputBytes': output_bytes}
+
+
+def run_webcam(detector, fixture, args, timer):
+    import cv2
+    from webcam_detect import CONFIDENCE_THRESHOLD, draw_detections, draw_info_overlay
+
+    cap = cv2.VideoCapture(fixture_path(fixture, args.fixture_dir))
+    frames = 0
+    start = time.perf_counter()
+    while frames < args.frames:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        t1 = time.perf_counter()
+        dets = detector.predict([frame], CONFIDENCE_THRESHOLD)[0]
+        t2 = time.perf_counter()
+        annotated, count = draw_detections(frame, dets, detector.names)
+        draw_info_overlay(annotated, 0.0, count)
+        t3 = time.perf_counter()
+        for stage, seconds in (('capture', t1 - t0), ('inference', t2 - t1), ('draw', t3 - t2)):
+            timer.add(stage, seconds)
+        frames += 1
+    wall = time.perf_counter() - start
+    cap.release()
+    return {'frames': frames, 'wall': wall, 'outputBytes': None}
+
+
+SCENARIO_RUNNERS = {
+    'analyze': run_analyze,
+    'detect': run_detect,
+    'webcam': run_webcam,
+}
+
+
+def run_child(scenario, fixture, args):
+    """Measure one scenario on one fixture and print a JSON line."""
+    from inference_backends import load_detector
+
+    start = time.perf_counter()
+    detector = load_detector(args.model, args.backend)
+    load_time = time.perf_counter() - start
+
+    timer = StageTimer()
+    measured = SCENARIO_RUNNERS[scenario](detector, fixture, args, timer)
+    wall = measured.pop('wall')
+    print(json.dumps({
+        'scenario': scenario,
+        'fixture': fixture,
+        'load': round(load_time, 3),
+        'wall': round(wall, 3),
+        'fps': round(measured['frames'] / wall, 2) if wall else None,
+        **measured,
+        'stages': timer.summary(),
+        'peakRssMb': peak_rss_mb(),
+    }))
+
+
+# ─── Run / compare ───────────────────────────────────────────────────────────
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args):
+    import cv2
+
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'opencv': cv2.__version__,
+        'numpy': np.__version__,
+        'model': args.model,
+        'backend': args.backend,
+        'conf': args.conf,
+        'interval': args.interval,
+        'images': args.images,
+        'frames': args.frames,
+        'fixtures': {name: FIXTURES[name] for name in args.fixtures},
+    }
+    for name in args.fixtures:  # generate up front so the timed children never do
+        fixture_path(name, args.fixture_dir)
+        if 'detect' in args.scenarios:
+            image_set(name, args.images, args.fixture_dir)
+
+    print(f"{'scenario':<9} {'fixture':<7} {'frames':>6} {'frames/s':>9} {'infer p50':>10} "
+          f"{'peak RSS':>9} {'output':>9}")
+    print('-' * 66)
+    results = []
+    for scenario in args.scenarios:
+        for fixture in args.fixtures:
+            cmd = [sys.executable, os.path.abspath(__file__), 'run', '--child', scenario, fixture,
+                   '--model', args.model, '--backend', args.backend, '--conf', str(args.conf),
+                   '--interval', str(args.interval), '--images', str(args.images),
+                   '--frames', str(args.frames), '--fixture-dir', args.fixture_dir]
+            proc = subprocess.run(cmd, capture_output=True, text=True)
+            if proc.returncode != 0:
+                error = (proc.stderr.strip().splitlines() or ['failed'])[-1]
+                print(f'{scenario:<9} {fixture:<7} {error}')
+                results.append({'scenario': scenario, 'fixture': fixture, 'error': error})
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(row)
+            output = f"{row['outputBytes'] / 1024:.1f} KiB" if row['outputBytes'] is not None else '-'
+            print(f"{scenario:<9} {fixture:<7} {row['frames']:>6} {row['fps']:>9.1f} "
+                  f"{row['stages']['inference']['p50']:>8.1f}ms {row['peakRssMb']:>6.0f} MB {output:>9}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f'\nResults written to {args.output}')
+
+
+def _change(old, new):
+    if not old or new is None:
+        return '     n/a'
+    return f'{(new - old) / old * 100:+7.1f}%'
+
+
+def compare(args):
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+    for key in ('model', 'backend', 'cpus', 'interval'):
+        if base['meta'].get(key) != new['meta'].get(key):
+            print(f"[WARN] {key} differs: {base['meta'].get(key)} vs {new['meta'].get(key)}")
+
+    base_rows = {(r['scenario'], r['fixture']): r for r in base['results'] if 'error' not in r}
+    regressions = []
+    print(f"Base: {base['meta'].get('commit')} ({base['meta']['timestamp']})   "
+          f"New: {new['meta'].get('commit')} ({new['meta']['timestamp']})\n")
+    print(f"{'scenario':<9} {'fixture':<7} {'frames/s':>18} {'change':>8}   stage p50 changes")
+    print('-' * 78)
+    for row in new['results']:
+        key = (row['scenario'], row['fixture'])
+        old = base_rows.get(key)
+        if old is None or 'error' in row:
+            print(f"{key[0]:<9} {key[1]:<7} {'(no baseline)' if old is None else row['error']}")
+            continue
+        stages = '  '.join(
+            f"{stage} {_change(old['stages'][stage]['p50'], stats['p50']).strip()}"
+            for stage, stats in row['stages'].items() if stage in old['stages']
+        )
+        print(f"{key[0]:<9} {key[1]:<7} {old['fps']:>8.1f} -> {row['fps']:>6.1f} "
+              f"{_change(old['fps'], row['fps'])}   {stages}  "
+              f"rss {_change(old['peakRssMb'], row['peakRssMb']).strip()}")
+        if row['fps'] < old['fps'] * (1 - args.threshold):
+            regressions.append(key)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}: "
+              + ', '.join(f'{s}/{f}' for s, f in regressions))
+        sys.exit(1)
+    print(f'\nNo frames/s regression beyond {args.threshold:.0%}.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark suite on synthetic video fixtures')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    run = sub.add_parser('run', help='Run the suite and write a results JSON')
+    run.add_argument('--fixtures', nargs='+', choices=FIXTURES, default=['small', 'hd'])
+    run.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    run.add_argument('--model', default='yolov8n.pt', help='Model path')
+    run.add_argument('--backend', default='torch', help='Inference backend (see inference_backends)')
+    run.add_argument('--conf', type=float, default=0.45, help='Confidence threshold')
+    run.add_argument('--interval', type=int, default=30, help='analyze: every N-th frame')
+    run.add_argument('--images', type=int, default=30, help='detect: stills per fixture')
+    run.add_argument('--frames', type=int, default=150, help='webcam: frames per fixture')
+    run.add_argument('--fixture-dir', default=DEFAULT_DIR, help='Where fixtures are generated')
+    run.add_argument('--output', default='benchmark_results.json', help='Results JSON path')
+    run.add_argument('--child', nargs=2, metavar=('SCENARIO', 'FIXTURE'), help=argparse.SUPPRESS)
+
+    cmp_parser = sub.add_parser('compare', help='Compare two results JSON files')
+    cmp_parser.add_argument('base', help='Baseline results JSON')
+    cmp_parser.add_argument('new', help='New results JSON')
+    cmp_parser.add_argument('--threshold', type=float, default=0.05,
+                            help='Frames/s drop that counts as a regression (default: 0.05)')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        compare(args)
+    elif args.child:
+        run_child(*args.child, args)
+    else:
+        run_suite(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Synthetic Video Fixtures
+========================
+Generates deterministic test videos for the benchmark suite: coloured
+rectangles bouncing over a static textured background. The same name and
+seed always give the same frames, so results from different runs (and
+different machines) are measured on identical input without shipping
+video files in the repository.
+
+Fixtures (width x height, frames at 30 fps):
+    small   640 x 360,   150 frames
+    hd      1280 x 720,  300 frames
+    fhd     1920 x 1080, 300 frames
+    long    640 x 360,   1800 frames
+    uhd     3840 x 2160, 60 frames (small objects far from the camera, for tiling)
+
+Files are cached in the fixture directory under a name that encodes their
+parameters, so they are only generated once.
+
+Usage:
+    python benchmarks/synthetic.py [--fixtures small hd] [--dir benchmarks/fixtures]
+
+    from synthetic import fixture_path
+    video = fixture_path('hd')    # generated on first use
+"""
+
+import os
+import argparse
+
+import cv2
+import numpy as np
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FPS = 30
+OBJECTS = 6
+
+FIXTURES = {
+    'small': (640, 360, 150),
+    'hd':    (1280, 720, 300),
+    'fhd':   (1920, 1080, 300),
+    'long':  (640, 360, 1800),
+    'uhd':   (3840, 2160, 60),
+}
+
+
+def _bounce(position, span):
+    """Fold an unbounded coordinate back into [0, span] like a ball off two walls."""
+    folded = np.mod(position, 2 * span)
+    return np.where(folded > span, 2 * span - folded, folded)
+
+
+def render_frames(width, height, frames, seed=0, objects=OBJECTS):
+    """Yield `frames` BGR frames of rectangles moving over a static background."""
+    rng = np.random.default_rng(seed)
+
+    # Static background: smooth gradient plus fixed noise texture
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    background = np.stack([
+        60 + 60 * xs / width,
+        80 + 40 * ys / height,
+        100 + 30 * (xs + ys) / (width + height),
+    ], axis=2)
+    background += rng.normal(0, 6, background.shape)
+    background = background.clip(0, 255).astype(np.uint8)
+
+    sizes = rng.uniform(0.06, 0.22, (objects, 2)) * (width, height)
+    starts = rng.uniform(0, 1, (objects, 2)) * ((width, height) - sizes)
+    velocities = rng.uniform(-1, 1, (objects, 2)) * (width, height) / FPS * 0.3
+    colors = rng.integers(0, 256, (objects, 3))
+
+    for t in range(frames):
+        frame = background.copy()
+        positions = _bounce(starts + velocities * t, (width, height) - sizes)
+        for (x, y), (w, h), color in zip(positions, sizes, colors):
+            cv2.rectangle(frame, (int(x), int(y)), (int(x + w), int(y + h)),
+                          tuple(int(c) for c in color), cv2.FILLED)
+        yield frame
+
+
+def make_video(path, width, height, frames, seed=0):
+    """Write a synthetic video to path (mp4v); returns path."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp.mp4'
+    writer = cv2.VideoWriter(tmp, cv2.VideoWriter_fourcc(*'mp4v'), FPS, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f'Cannot write video: {path}')
+    for frame in render_frames(width, height, frames, seed):
+        writer.write(frame)
+    writer.release()
+    os.replace(tmp, path)
+    return path
+
+
+def fixture_path(name, directory=DEFAULT_DIR, seed=0):
+    """Path of fixture `name`, generating the video if it does not exist yet."""
+    if name not in FIXTURES:
+        raise ValueError(f'Unknown fixture: {name} (choose from {", ".join(FIXTURES)})')
+    width, height, frames = FIXTURES[name]
+    path = os.path.join(directory, f'{name}_{width}x{height}_{frames}f_s{seed}.mp4')
+    if not os.path.isfile(path):
+        make_video(path, width, height, frames, seed)
+    return path
+
+
+def image_set(name, count, directory=DEFAULT_DIR, seed=0):
+    """Directory of `count` JPEG stills evenly spread over fixture `name`."""
+    video = fixture_path(name, directory, seed)
+    out_dir = os.path.splitext(video)[0] + f'_{count}img'
+    if os.path.isdir(out_dir) and len(os.listdir(out_dir)) == count:
+        return out_dir
+    os.makedirs(out_dir, exist_ok=True)
+    width, height, frames = FIXTURES[name]
+    wanted = set(np.linspace(0, frames - 1, count).astype(int).tolist())
+    for idx, frame in enumerate(render_frames(width, height, frames, seed)):
+        if idx in wanted:
+            cv2.imwrite(os.path.join(out_dir, f'{idx:05d}.jpg'), frame)
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark videos')
+    parser.add_argument('--fixtures', nargs='+', choices=FIXTURES, default=list(FIXTURES))
+    parser.add_argument('--dir', default=DEFAULT_DIR, help='Fixture directory')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for name in args.fixtures:
+        path = fixture_path(name, args.dir, args.seed)
+        print(f'{name:<6} {path}  ({os.path.getsize(path) / 1e6:.1f} MB)')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,37 +1,90 @@
 """
 Prepare Dataset Script
 Copies images from 'image' folder to dataset structure and creates placeholder labels.
+
+Usage:
+    python prepare_dataset.py                  # full rebuild: shuffle, renumber, copy everything
+    python prepare_dataset.py --incremental    # only add the images that are new since the last run
+    python prepare_dataset.py --incremental --auto-label yolov8n.pt   # ... and pre-label them
+
+Incremental mode keeps dataset/manifest.json with the content hash of every
+image it has seen. Unchanged source files (same size and mtime) are not even
+re-read, and new ones are hashed on a thread pool. An image whose content
+is already in the dataset is skipped (exact duplicate), as is one whose
+perceptual hash is within --near-dup-threshold bits of an image already in
+the dataset (near duplicate: resized, re-encoded, screenshots of the same
+photo). New images are named after their hash (img_<hash>.jpg). They go to
+train or val from the hash alone, so an image never moves between splits.
+They are hardlinked (or reflinked) into the dataset when the filesystem
+allows it, else copied, in parallel. Existing label files are never
+overwritten, and images already in dataset/ (e.g. from a full rebuild) are
+adopted into the manifest on the first incremental run.
+
+--auto-label MODEL fills the label files of the images this run added
+with the detections of a pretrained (COCO) or previously trained model, in
+YOLO format. Other empty label files are left alone, as they may mark
+background images; --label-empty fills those too. Images are
+decoded ahead on a thread pool and inferred --label-batch at a time. Model
+classes map to the data.yaml classes by name. COCO classes that have no
+such name go through COCO_CLASS_MAP (knife, scissors and baseball bat
+become "weapon"). An image with at least --crowd-min people also gets one
+"crowd" box around them. Labels are cached in dataset/label_cache.json by
+image hash, model and settings, so an unchanged image is never inferred
+twice. Label files that already have content (hand-made annotations) are
+never touched.
 """
 
 import os
+import sys
+import json
+import time
 import shutil
 import random
+import hashlib
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 # Source and destination paths
 SOURCE_DIR = "image"
 DATASET_DIR = "dataset"
 TRAIN_SPLIT = 0.8  # 80% train, 20% val
 
-def prepare_dataset():
+# Incremental mode
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff', '.tif'}
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+NEAR_DUP_THRESHOLD = 6   # max differing bits of the 63-bit pHash for a near duplicate
+HASH_PREFIX = 12         # hex digits of the SHA-256 used in file names
+
+# Auto-labeling
+LABEL_CACHE_NAME = "label_cache.json"
+LABEL_CONFIDENCE = 0.4
+LABEL_BATCH = 8
+CROWD_MIN_PERSONS = 8    # people in one image that also make a "crowd" box
+# COCO classes that stand for one of our classes under another name
+COCO_CLASS_MAP = {
+    "knife": "weapon",
+    "scissors": "weapon",
+    "baseball bat": "weapon",
+}
+
+def prepare_dataset(source_dir=SOURCE_DIR, dataset_dir=DATASET_DIR):
     # Get all images from source
-    source_path = Path(SOURCE_DIR)
+    source_path = Path(source_dir)
     if not source_path.exists():
-        print(f"❌ Source folder '{SOURCE_DIR}' not found!")
+        print(f"❌ Source folder '{source_dir}' not found!")
         return
     
-    # Supported image formats
-    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tiff', '.tif'}
-    
     # Get all image files
     images = [f for f in source_path.iterdir() 
-              if f.suffix.lower() in image_extensions]
+              if f.suffix.lower() in IMAGE_EXTENSIONS]
     
     if not images:
-        print(f"❌ No images found in '{SOURCE_DIR}'!")
+        print(f"❌ No images found in '{source_dir}'!")
         return
     
-    print(f"📁 Found {len(images)} images in '{SOURCE_DIR}'")
+    print(f"📁 Found {len(images)} images in '{source_dir}'")
     
     # Shuffle images for random split
     random.shuffle(images)
@@ -45,10 +98,10 @@ def prepare_dataset():
     print(f"   Validation: {len(val_images)} images")
     
     # Create directories
-    train_img_dir = Path(DATASET_DIR) / "images" / "train"
-    val_img_dir = Path(DATASET_DIR) / "images" / "val"
-    train_lbl_dir = Path(DATASET_DIR) / "labels" / "train"
-    val_lbl_dir = Path(DATASET_DIR) / "labels" / "val"
+    train_img_dir = Path(dataset_dir) / "images" / "train"
+    val_img_dir = Path(dataset_dir) / "images" / "val"
+    train_lbl_dir = Path(dataset_dir) / "labels" / "train"
+    val_lbl_dir = Path(dataset_dir) / "labels" / "val"
     
     for d in [train_img_dir, val_img_dir, train_lbl_dir, val_lbl_dir]:
         d.mkdir(parents=True, exist_ok=True)
@@ -58,11 +111,14 @@ def prepare_dataset():
         ext = name.suffix.lower()
         return f"img_{idx:04d}{ext}"
     
+    copied = []
+
     def copy_images(image_list, img_dir, lbl_dir, start_idx=0):
         """Copy images and create empty label files"""
         for i, img_path in enumerate(image_list):
             # Create safe filename
             new_name = safe_filename(img_path, start_idx + i)
+            copied.append(new_name)
             new_img_path = img_dir / new_name
             
             # Copy image
@@ -87,15 +143,472 @@ def prepare_dataset():
     print("✅ Dataset preparation complete!")
     print("="*60)
     print(f"\nFolder structure:")
-    print(f"  dataset/images/train/ - {len(train_images)} images")
-    print(f"  dataset/images/val/   - {len(val_images)} images")
-    print(f"  dataset/labels/train/ - {len(train_images)} labels (empty)")
-    print(f"  dataset/labels/val/   - {len(val_images)} labels (empty)")
+    print(f"  {dataset_dir}/images/train/ - {len(train_images)} images")
+    print(f"  {dataset_dir}/images/val/   - {len(val_images)} images")
+    print(f"  {dataset_dir}/labels/train/ - {len(train_images)} labels (empty)")
+    print(f"  {dataset_dir}/labels/val/   - {len(val_images)} labels (empty)")
     print("\n⚠️  Note: Label files are empty. For actual training, you need to:")
     print("   1. Use a labeling tool (LabelImg, Roboflow, CVAT) to annotate")
-    print("   2. Or use auto-labeling with a pretrained model")
+    print("   2. Or use auto-labeling with a pretrained model: --auto-label yolov8n.pt")
     print("\n💡 For quick testing without labels, the model will still run")
     print("   but won't learn meaningful detections.")
+    return copied
+
+
+# ============================================================
+# Incremental mode
+# ============================================================
+
+def perceptual_hash(data):
+    """63-bit DCT perceptual hash of encoded image bytes, or None if they do not decode.
+
+    Grayscale at 32x32, the 63 low 8x8 DCT frequencies other than the DC
+    term, thresholded at their median.
+    """
+    import cv2
+    import numpy as np
+
+    buffer = np.frombuffer(data, np.uint8)
+    # JPEGs decode at 1/8 scale directly; 32x32 is all the hash looks at, and
+    # smaller images decode in full so the hash is not taken from an upscale
+    image = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if image is None or min(image.shape) < 32:
+        image = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+    small = cv2.resize(image, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()[1:]
+    bits = low > np.median(low)
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def sha256_file(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def hash_file(path):
+    """(sha256 hex, pHash or None) of one file; runs on the thread pool."""
+    data = path.read_bytes()
+    return hashlib.sha256(data).hexdigest(), perceptual_hash(data)
+
+
+def hash_split(sha):
+    """'train' or 'val' from the content hash alone, so the split never changes."""
+    return "train" if int(sha[:8], 16) / 0x100000000 < TRAIN_SPLIT else "val"
+
+
+class NearDuplicateIndex:
+    """Perceptual hashes of the dataset, searched by Hamming distance.
+
+    The hashes already in the manifest are compared as one numpy array;
+    the few added during a run are kept in a list next to it.
+    """
+
+    def __init__(self, threshold, entries=()):
+        import numpy as np
+        self.np = np
+        self.threshold = threshold
+        entries = list(entries)  # (phash, sha)
+        self.hashes = np.array([phash for phash, _ in entries], dtype=np.uint64)
+        self.owners = [sha for _, sha in entries]
+        self.added = []
+
+    def add(self, phash, sha):
+        self.added.append((phash, sha))
+
+    def find(self, phash):
+        """(sha, distance) of the closest image within the threshold, or None."""
+        if self.threshold < 0:
+            return None
+        best = None
+        if len(self.hashes):
+            diff = self.hashes ^ self.np.uint64(phash)
+            distances = self.np.unpackbits(diff.view(self.np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+            i = int(distances.argmin())
+            best = (self.owners[i], int(distances[i]))
+        for other, sha in self.added:
+            distance = (other ^ phash).bit_count()
+            if best is None or distance < best[1]:
+                best = (sha, distance)
+        return best if best is not None and best[1] <= self.threshold else None
+
+
+def link_or_copy(src, dst, mode="auto"):
+    """Put src at dst as a hardlink, reflink or copy; returns the method used.
+
+    auto tries a hardlink, then a reflink (copy-on-write clone, Linux
+    btrfs/XFS), then falls back to a plain copy.
+    """
+    if dst.exists():
+        dst.unlink()
+    if mode in ("auto", "hardlink"):
+        try:
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            if mode == "hardlink":
+                raise
+    if mode in ("auto", "reflink"):
+        try:
+            import fcntl
+            with open(src, "rb") as fin, open(dst, "wb") as fout:
+                fcntl.ioctl(fout.fileno(), 0x40049409, fin.fileno())  # FICLONE
+            shutil.copystat(src, dst)
+            return "reflink"
+        except (OSError, ImportError):
+            if dst.exists():
+                dst.unlink()
+            if mode == "reflink":
+                raise
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def load_manifest(path):
+    """The manifest dict, or an empty one if there is none yet."""
+    empty = {"version": MANIFEST_VERSION, "files": {}, "sources": {}}
+    if not path.exists():
+        return empty
+    with open(path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("version") != MANIFEST_VERSION:
+        print(f"⚠️  Ignoring {path}: unknown manifest version")
+        return empty
+    return manifest
+
+
+def save_json(data, path):
+    """Write a manifest or cache atomically so an interrupted run keeps the previous one."""
+    tmp = path.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def adopt_existing(manifest, dataset, pool):
+    """Register images already in dataset/images that the manifest does not know."""
+    known = {entry["name"] for entry in manifest["files"].values()}
+    found = [(split, path) for split in ("train", "val")
+             for path in sorted((dataset / "images" / split).glob("*"))
+             if path.suffix.lower() in IMAGE_EXTENSIONS and path.name not in known]
+    for (split, path), (sha, phash) in zip(found, pool.map(lambda item: hash_file(item[1]), found)):
+        manifest["files"].setdefault(sha, {"name": path.name, "split": split, "phash": phash, "source": None})
+    return len(found)
+
+
+def prepare_incremental(source_dir=SOURCE_DIR, dataset_dir=DATASET_DIR, workers=None,
+                        near_dup_threshold=NEAR_DUP_THRESHOLD, link_mode="auto"):
+    """Add only the new images of source_dir to dataset_dir (see module docstring)."""
+    started = time.perf_counter()
+    source, dataset = Path(source_dir), Path(dataset_dir)
+    if not source.exists():
+        print(f"❌ Source folder '{source_dir}' not found!")
+        return None
+    for split in ("train", "val"):
+        (dataset / "images" / split).mkdir(parents=True, exist_ok=True)
+        (dataset / "labels" / split).mkdir(parents=True, exist_ok=True)
+
+    manifest_path = dataset / MANIFEST_NAME
+    manifest = load_manifest(manifest_path)
+    files, sources = manifest["files"], manifest["sources"]
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        adopted = adopt_existing(manifest, dataset, pool)
+
+        # 1. Which source files are new or changed since the last run
+        images = sorted(f for f in source.iterdir() if f.is_file() and f.suffix.lower() in IMAGE_EXTENSIONS)
+        changed = []
+        for path in images:
+            stat = path.stat()
+            entry = sources.get(path.name)
+            if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+                changed.append((path, stat))
+        missing = sorted(set(sources) - {path.name for path in images})
+
+        # 2. Hash them in parallel; a file that was only touched keeps its record
+        hashed = []
+        for (path, stat), hashes in zip(changed, pool.map(lambda item: hash_file(item[0]), changed)):
+            entry = sources.get(path.name)
+            if entry is not None and entry["sha256"] == hashes[0]:
+                entry.update(size=stat.st_size, mtime=stat.st_mtime)  # same content
+            else:
+                hashed.append((path, stat, *hashes))
+        unchanged = len(images) - len(hashed)
+        print(f"📁 {len(images)} images in '{source_dir}': {len(hashed)} new or changed, {unchanged} unchanged")
+
+        # 3. Dedup and assign names / splits (in file name order, so runs are reproducible)
+        index = NearDuplicateIndex(near_dup_threshold, ((entry["phash"], sha) for sha, entry in files.items()
+                                                        if entry.get("phash") is not None))
+        added, exact, near = [], 0, 0
+        for path, stat, sha, phash in hashed:
+            record = {"size": stat.st_size, "mtime": stat.st_mtime, "sha256": sha}
+            match = None if sha in files or phash is None else index.find(phash)
+            if sha in files:
+                record["status"] = "duplicate"
+                record["of"] = sha
+                exact += 1
+            elif match is not None:
+                record["status"] = "near-duplicate"
+                record["of"], record["distance"] = match
+                near += 1
+            else:
+                record["status"] = "added"
+                files[sha] = {
+                    "name": f"img_{sha[:HASH_PREFIX]}{path.suffix.lower()}",
+                    "split": hash_split(sha),
+                    "phash": phash,
+                    "source": path.name,
+                }
+                if phash is not None:
+                    index.add(phash, sha)
+                added.append((path, files[sha]))
+            sources[path.name] = record
+
+        # 4. Link / copy the new images and create their (empty) labels
+        def place(item):
+            path, entry = item
+            split = entry["split"]
+            method = link_or_copy(path, dataset / "images" / split / entry["name"], link_mode)
+            label = dataset / "labels" / split / (Path(entry["name"]).stem + ".txt")
+            if not label.exists():
+                label.touch()
+            return method
+
+        methods = {}
+        try:
+            for (path, entry), method in zip(added, pool.map(place, added)):
+                methods[method] = methods.get(method, 0) + 1
+                print(f"   ✓ {path.name} -> {entry['split']}/{entry['name']} ({method})")
+        except OSError as exc:
+            # The manifest is left as it was, so the next run retries these files
+            print(f"❌ Cannot place images with --link {link_mode}: {exc}")
+            return None
+
+    save_json(manifest, manifest_path)
+
+    counts = {split: sum(1 for e in files.values() if e["split"] == split) for split in ("train", "val")}
+    print("\n" + "=" * 60)
+    print("✅ Incremental dataset update complete!")
+    print("=" * 60)
+    if adopted:
+        print(f"   Adopted {adopted} images already in '{dataset_dir}' into the manifest")
+    print(f"   Added: {len(added)} "
+          f"({', '.join(f'{n} {m}' for m, n in sorted(methods.items())) or 'nothing to copy'})")
+    near_rule = f"pHash within {near_dup_threshold} bits" if near_dup_threshold >= 0 else "check off"
+    print(f"   Skipped duplicates: {exact} exact, {near} near ({near_rule})")
+    if missing:
+        print(f"   ⚠️  {len(missing)} previously seen source files are gone; their dataset images are kept")
+    print(f"   Dataset: {counts['train']} train / {counts['val']} val images")
+    print(f"   Took {time.perf_counter() - started:.2f}s")
+    return {"added": len(added), "exact": exact, "near": near, "unchanged": unchanged,
+            "adopted": adopted, "missing": len(missing), "methods": methods,
+            "names": [entry["name"] for _, entry in added]}
+
+
+# ============================================================
+# Auto-labeling
+# ============================================================
+
+def load_class_names(data_yaml):
+    """Class names of data.yaml in id order."""
+    import yaml
+    with open(data_yaml, encoding="utf-8") as f:
+        names = yaml.safe_load(f)["names"]
+    if isinstance(names, dict):
+        return [names[i] for i in sorted(names)]
+    return list(names)
+
+
+def class_mapping(model_names, dataset_names):
+    """{model class id: dataset class id}: same name first, then COCO_CLASS_MAP."""
+    index = {name: i for i, name in enumerate(dataset_names)}
+    mapping = {}
+    for model_id, name in model_names.items():
+        target = name if name in index else COCO_CLASS_MAP.get(name)
+        if target in index:
+            mapping[model_id] = index[target]
+    return mapping
+
+
+def to_label_rows(dets, shape, mapping, dataset_names, model_names, crowd_min):
+    """YOLO label rows [class, cx, cy, w, h] (normalized) for one image's detections."""
+    h, w = shape[:2]
+    rows, people = [], []
+    for (x1, y1, x2, y2), cls in zip(dets.xyxy.tolist(), dets.cls.tolist()):
+        if cls in mapping:
+            rows.append([mapping[cls], (x1 + x2) / 2 / w, (y1 + y2) / 2 / h, (x2 - x1) / w, (y2 - y1) / h])
+        if model_names[cls] == "person":
+            people.append((x1, y1, x2, y2))
+    # A COCO model has no "crowd" class: derive one box from enough people
+    if ("crowd" in dataset_names and "crowd" not in model_names.values()
+            and crowd_min > 0 and len(people) >= crowd_min):
+        x1, y1 = min(p[0] for p in people), min(p[1] for p in people)
+        x2, y2 = max(p[2] for p in people), max(p[3] for p in people)
+        rows.append([dataset_names.index("crowd"), (x1 + x2) / 2 / w, (y1 + y2) / 2 / h,
+                     (x2 - x1) / w, (y2 - y1) / h])
+    return [[cls] + [round(v, 6) for v in box] for cls, *box in rows]
+
+
+def write_label(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(f"{cls} {cx:.6f} {cy:.6f} {bw:.6f} {bh:.6f}\n" for cls, cx, cy, bw, bh in rows)
+
+
+def auto_label(dataset_dir=DATASET_DIR, model_path="yolov8n.pt", backend="torch", data_yaml=None,
+               conf=LABEL_CONFIDENCE, batch_size=LABEL_BATCH, workers=None, crowd_min=CROWD_MIN_PERSONS,
+               images=None, label_empty=False):
+    """Label images of dataset_dir with model detections (see module docstring).
+
+    images restricts it to those image names (e.g. the ones a prepare step
+    just added), labeled if their label file is missing or empty. Without
+    it, only images that have no label file are labeled, plus those with an
+    empty one if label_empty is set: an empty label file can be a
+    deliberate background (negative) image.
+    """
+    started = time.perf_counter()
+    dataset = Path(dataset_dir)
+    data_yaml = Path(data_yaml) if data_yaml else dataset / "data.yaml"
+    if not data_yaml.exists():
+        print(f"❌ '{data_yaml}' not found! Run train_yolo.py once to create an example, or pass --data-yaml")
+        return None
+    dataset_names = load_class_names(data_yaml)
+
+    # Images whose label file is missing, or empty and one we may fill
+    wanted = set(images) if images is not None else None
+    todo = []
+    for split in ("train", "val"):
+        (dataset / "labels" / split).mkdir(parents=True, exist_ok=True)
+        for path in sorted((dataset / "images" / split).glob("*")):
+            if path.suffix.lower() not in IMAGE_EXTENSIONS:
+                continue
+            if wanted is not None and path.name not in wanted:
+                continue
+            label = dataset / "labels" / split / (path.stem + ".txt")
+            if not label.exists() or (label.stat().st_size == 0 and (wanted is not None or label_empty)):
+                todo.append((path, label))
+    print(f"\n🏷️  Auto-labeling {len(todo)} images without labels (model: {model_path})")
+    if not todo:
+        return {"labeled": 0, "cached": 0, "inferred": 0}
+
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+    import cv2
+    from frame_pipeline import prefetch
+    from inference_backends import load_detector
+    from result_cache import weights_fingerprint
+
+    workers = workers or min(32, (os.cpu_count() or 1) * 4)
+    known = {entry["name"]: sha for sha, entry in load_manifest(dataset / MANIFEST_NAME)["files"].items()}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        hashes = list(pool.map(lambda item: known.get(item[0].name) or sha256_file(item[0]), todo))
+
+    # The cache key covers everything that changes the labels of an image
+    settings = json.dumps([weights_fingerprint(model_path), backend, conf, dataset_names, crowd_min])
+    signature = hashlib.sha256(settings.encode()).hexdigest()[:16]
+    cache_path = dataset / LABEL_CACHE_NAME
+    cache = {"version": 1, "labels": {}}
+    if cache_path.exists():
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    labels = cache["labels"]
+
+    pending = []
+    cached = 0
+    for (path, label), sha in zip(todo, hashes):
+        key = f"{sha}:{signature}"
+        if key in labels:
+            write_label(label, labels[key])
+            cached += 1
+        else:
+            pending.append((path, label, key))
+    print(f"   {cached} from the label cache, {len(pending)} to infer")
+
+    inferred = boxes = 0
+    if pending:
+        model = load_detector(model_path, backend)
+        mapping = class_mapping(model.names, dataset_names)
+        mapped = sorted({model.names[i] for i in mapping})
+        print(f"   Mapping model classes {', '.join(mapped) or '(none)'} -> {', '.join(dataset_names)}")
+
+        def flush(batch):
+            nonlocal inferred, boxes
+            detections = model.predict([image for _, image in batch], conf)
+            for ((path, label, key), image), dets in zip(batch, detections):
+                rows = to_label_rows(dets, image.shape, mapping, dataset_names, model.names, crowd_min)
+                write_label(label, rows)
+                labels[key] = rows
+                inferred += 1
+                boxes += len(rows)
+            print(f"   ✓ {inferred}/{len(pending)} images labeled")
+
+        batch = []
+        try:
+            for item, image in prefetch(pending, lambda item: cv2.imread(str(item[0])),
+                                        workers, batch_size * 2):
+                if image is None:
+                    print(f"   ⚠️  Cannot read {item[0].name}, skipped")
+                    continue
+                batch.append((item, image))
+                if len(batch) >= batch_size:
+                    flush(batch)
+                    batch = []
+            if batch:
+                flush(batch)
+        finally:
+            # Keep what was inferred even if the run is interrupted
+            save_json(cache, cache_path)
+
+    print(f"✅ Auto-labeled {cached + inferred} images ({inferred} inferred, {boxes} boxes) "
+          f"in {time.perf_counter() - started:.2f}s")
+    print("   Review the labels in a labeling tool before training on them.")
+    return {"labeled": cached + inferred, "cached": cached, "inferred": inferred}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Copy images into the YOLO dataset structure")
+    parser.add_argument("--source", default=SOURCE_DIR, help=f"Image folder (default: {SOURCE_DIR})")
+    parser.add_argument("--dataset", default=DATASET_DIR, help=f"Dataset folder (default: {DATASET_DIR})")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only add new images, keeping names and the train/val split stable")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Incremental: threads for hashing and copying (default: 4 per CPU, max 32)")
+    parser.add_argument("--near-dup-threshold", type=int, default=NEAR_DUP_THRESHOLD,
+                        help="Incremental: max pHash bit difference for a near duplicate (-1 = off)")
+    parser.add_argument("--link", choices=("auto", "hardlink", "reflink", "copy"), default="auto",
+                        help="Incremental: how images get into the dataset (default: hardlink, "
+                             "then reflink, then copy)")
+    parser.add_argument("--auto-label", metavar="MODEL", default=None,
+                        help="Label the images this run adds with this model's detections (e.g. yolov8n.pt)")
+    parser.add_argument("--label-empty", action="store_true",
+                        help="Auto-label: also fill every other empty label file in the dataset "
+                             "(by default they are kept as background images)")
+    parser.add_argument("--backend", choices=("torch", "onnxruntime", "openvino"), default="torch",
+                        help="Auto-label: inference backend for MODEL (default: torch)")
+    parser.add_argument("--data-yaml", default=None,
+                        help="Auto-label: class names to map to (default: <dataset>/data.yaml)")
+    parser.add_argument("--label-conf", type=float, default=LABEL_CONFIDENCE,
+                        help=f"Auto-label: confidence threshold (default: {LABEL_CONFIDENCE})")
+    parser.add_argument("--label-batch", type=int, default=LABEL_BATCH,
+                        help=f"Auto-label: images per inference call (default: {LABEL_BATCH})")
+    parser.add_argument("--crowd-min", type=int, default=CROWD_MIN_PERSONS,
+                        help=f"Auto-label: people that make a crowd box (default: {CROWD_MIN_PERSONS}, 0 = off)")
+    return parser.parse_args()
+
 
 if __name__ == "__main__":
-    prepare_dataset()
+    args = parse_args()
+    if (args.workers is not None and args.workers < 1) or args.label_batch < 1:
+        print("❌ --workers and --label-batch must be >= 1")
+        sys.exit(1)
+    if args.incremental:
+        result = prepare_incremental(args.source, args.dataset, args.workers, args.near_dup_threshold,
+                                     args.link)
+        if result is None:
+            sys.exit(1)
+        added = result["names"]
+    else:
+        added = prepare_dataset(args.source, args.dataset) or []
+    if args.auto_label:
+        auto_label(args.dataset, args.auto_label, args.backend, args.data_yaml, args.label_conf,
+                   args.label_batch, args.workers, args.crowd_min,
+                   images=None if args.label_empty else added, label_empty=args.label_empty)
@@ -581,13 +581,13 @@ const Home = () => {
                   <div style={styles.statBox}>
                     <span style={styles.statLabel}>Objects Found</span>
                     <span style={styles.statValue}>
-                      {analysisResult.detections ? analysisResult.detections.length : 0}
+                      {analysisResult.detectionCount ?? (analysisResult.detections ? analysisResult.detections.length : 0)}
                     </span>
                   </div>
                   <div style={styles.statBox}>
                     <span style={styles.statLabel}>Alerts Generated</span>
                     <span style={{ ...styles.statValue, color: analysisResult.alerts?.length > 0 ? '#ef5350' : '#66bb6a' }}>
-                      {analysisResult.alerts ? analysisResult.alerts.length : 0}
+                      {analysisResult.alertCount ?? (analysisResult.alerts ? analysisResult.alerts.length : 0)}
                     </span>
                   </div>
                 </div>
@@ -0,0 +1,121 @@
+"""
+Shared fixtures: small local videos written with cv2.VideoWriter and a
+detector whose boxes depend only on frame content, so two code paths that
+hand the model the same pixels produce the same detections.
+"""
+
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+sys.path.insert(0, ROOT)
+
+from detection_utils import Detections, empty_detections  # noqa: E402
+
+
+def render_frame(index, width, height):
+    """Frame index of a test video: a gradient shade plus a moving block."""
+    frame = np.full((height, width, 3), (index * 7) % 180 + 20, np.uint8)
+    x = (index * 13) % max(1, width - width // 4)
+    y = (index * 5) % max(1, height - height // 4)
+    cv2.rectangle(frame, (x, y), (x + width // 4, y + height // 4), (255, 255, 255), cv2.FILLED)
+    return frame
+
+
+@pytest.fixture
+def make_video(tmp_path):
+    """make_video(width, height, frames, name='clip.mp4') -> path of an mp4v file in tmp_path.
+
+    hold > 1 repeats every rendered frame that many times (a static scene
+    that changes every `hold` frames).
+    """
+    def make(width=640, height=360, frames=60, name='clip.mp4', fps=30, hold=1):
+        path = str(tmp_path / name)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+        assert writer.isOpened()
+        for index in range(frames):
+            writer.write(render_frame(index // hold, width, height))
+        writer.release()
+        return path
+    return make
+
+
+class ContentDetector:
+    """Detector stand-in: one 'person' box around the white block of each frame.
+
+    The confidence is derived from the mean pixel value, so the output
+    changes whenever the frame passed in changes.
+    """
+
+    names = {0: 'person', 1: 'weapon'}
+
+    def __init__(self):
+        self.calls = []  # batch sizes
+
+    def predict(self, frames, conf=0.25, timings=None):
+        self.calls.append(len(frames))
+        results = []
+        for frame in frames:
+            ys, xs = np.nonzero(frame.min(axis=2) > 240)
+            if not len(xs):
+                results.append(empty_detections())
+                continue
+            score = 0.5 + float(frame.mean()) / 1000
+            results.append(Detections(
+                np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], np.float32),
+                np.array([score], np.float32),
+                np.array([0], np.int64)))
+        return results
+
+
+@pytest.fixture
+def detector():
+    return ContentDetector()
+
+
+ONNX_SIZE = 32  # input size of tiny_onnx_model()
+
+
+def tiny_onnx_model(path, batch=None):
+    """Write a tiny YOLOv8-shaped .onnx model to path and return path.
+
+    Input (batch, 3, 32, 32), fixed batch if given, else dynamic. Output
+    (batch, 4 + 2 classes, 16 anchors): one 8x8 box per image cell, scored
+    by the cell's mean blue (class 0, 'person') and green (class 1, 'weapon')
+    value, so detections follow the content like a real model's.
+    """
+    from onnx import TensorProto, helper, save
+
+    cells = (ONNX_SIZE // 8) ** 2
+    xs, ys = np.meshgrid(np.arange(4) * 8 + 4, np.arange(4) * 8 + 4)
+    boxes = np.stack([xs.ravel(), ys.ravel(), np.full(cells, 8), np.full(cells, 8)]).astype(np.float32)
+    nodes = [
+        helper.make_node('AveragePool', ['images'], ['pooled'], kernel_shape=[8, 8], strides=[8, 8]),
+        helper.make_node('Reshape', ['pooled', 'flat_shape'], ['flat']),
+        helper.make_node('Slice', ['flat', 'starts', 'ends', 'axes'], ['scores']),
+        helper.make_node('Shape', ['images'], ['input_shape'], end=1),
+        helper.make_node('Concat', ['input_shape', 'box_dims'], ['boxes_shape'], axis=0),
+        helper.make_node('Expand', ['box'], ['boxes'], name='expand_boxes'),
+        helper.make_node('Concat', ['boxes', 'scores'], ['output0'], axis=1),
+    ]
+    nodes[5].input.append('boxes_shape')
+    dim = batch or 'batch'
+    graph = helper.make_graph(
+        nodes, 'tiny_yolo',
+        [helper.make_tensor_value_info('images', TensorProto.FLOAT, [dim, 3, ONNX_SIZE, ONNX_SIZE])],
+        [helper.make_tensor_value_info('output0', TensorProto.FLOAT, [dim, 6, cells])],
+        [helper.make_tensor('flat_shape', TensorProto.INT64, [3], [0, 3, cells]),
+         helper.make_tensor('starts', TensorProto.INT64, [1], [1]),
+         helper.make_tensor('ends', TensorProto.INT64, [1], [3]),
+         helper.make_tensor('axes', TensorProto.INT64, [1], [1]),
+         helper.make_tensor('box_dims', TensorProto.INT64, [2], [4, cells]),
+         helper.make_tensor('box', TensorProto.FLOAT, [1, 4, cells], boxes.ravel())])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid('', 17)], ir_version=8)
+    helper.set_model_props(model, {'names': "{0: 'person', 1: 'weapon'}", 'imgsz': f'[{ONNX_SIZE}, {ONNX_SIZE}]'})
+    save(model, path)
+    return path
@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+
+from analyze_video import analyze_video
+from conftest import render_frame
+
+
+def inferences(detector):
+    return sum(detector.calls)
+
+
+def test_persistent_threat_costs_no_more_than_fixed_sampling(make_video, detector):
+    video = make_video(320, 180, 300)  # the block (a 'person') is in every frame
+
+    fixed = analyze_video(video, frame_interval=30, confidence=0.1, model=detector)
+    fixed_count = inferences(detector)
+    detector.calls.clear()
+    adaptive = analyze_video(video, frame_interval=30, confidence=0.1, model=detector, adaptive=True)
+
+    assert fixed_count == 10
+    # one dense window around the first hit, then the base interval
+    assert inferences(detector) <= fixed_count + 30 // 6
+    assert len(adaptive['detections']) <= len(fixed['detections']) + 30 // 6
+
+
+def test_new_threat_is_sampled_densely(tmp_path, detector):
+    path = str(tmp_path / 'arrival.mp4')
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 30, (320, 180))
+    for index in range(600):
+        frame = render_frame(index, 320, 180) if index >= 300 else np.full((180, 320, 3), 60, np.uint8)
+        writer.write(frame)
+    writer.release()
+
+    result = analyze_video(path, frame_interval=30, confidence=0.1, model=detector, adaptive=True)
+    frames = [d['frame'] for d in result['detections']]
+
+    # back-filled to the first min-grid frame with the threat, dense for one interval after it
+    assert frames[0] == 300
+    assert frames[:6] == [300, 306, 312, 318, 324, 330]
+    assert all(b - a == 30 for a, b in zip(frames[6:], frames[7:]))
+    # fixed sampling, plus at most one back-filled gap (max/min interval) and one dense window
+    assert inferences(detector) <= 600 // 30 + 120 // 6 + 30 // 6
@@ -0,0 +1,127 @@
+import pytest
+
+from analyze_video import analyze_video, cached_analyze_video
+from conftest import tiny_onnx_model
+from result_cache import ResultCache
+
+
+def streamed(video, **options):
+    """(records without progress, result) of a streaming analyze_video() run."""
+    records = []
+    result = analyze_video(video, on_event=records.append, **options)
+    result.pop('elapsed')
+    return [r for r in records if r['event'] != 'progress'], result
+
+
+@pytest.mark.parametrize('batch_size', [4, 8])
+def test_batched_output_equals_serial(make_video, detector, batch_size):
+    video = make_video(320, 180, 90)
+    serial = analyze_video(video, frame_interval=3, confidence=0.1, model=detector)
+    batched = analyze_video(video, frame_interval=3, confidence=0.1, model=detector, batch_size=batch_size)
+
+    assert batched == serial
+    assert serial['detections']
+    assert max(detector.calls) == batch_size
+    assert sum(detector.calls) == 2 * serial['analyzedFrames']
+
+
+def test_batched_stream_equals_serial(make_video, detector):
+    video = make_video(320, 180, 90)
+    assert (streamed(video, frame_interval=3, confidence=0.1, model=detector, batch_size=8)
+            == streamed(video, frame_interval=3, confidence=0.1, model=detector))
+
+
+def test_parallel_output_equals_serial(make_video, tmp_path):
+    pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    # Segment workers are separate processes that load the model from disk
+    video = make_video(320, 180, 90)
+    options = dict(model_path=tiny_onnx_model(str(tmp_path / 'tiny.onnx')), backend='onnxruntime',
+                   frame_interval=3, confidence=0.3)
+    serial = analyze_video(video, **options)
+    parallel = analyze_video(video, workers=3, **options)
+
+    assert parallel == serial
+    assert serial['detections'] and serial['analyzedFrames'] == 30
+
+
+def test_motion_gate_skips_static_frames(make_video, detector):
+    video = make_video(320, 180, 90, hold=30)  # three static scenes
+    serial = analyze_video(video, frame_interval=3, confidence=0.1, model=detector)
+    gated = analyze_video(video, frame_interval=3, confidence=0.1, model=detector,
+                          motion_threshold=0.01, motion_refresh=0)
+
+    assert (gated['inferredFrames'], gated['skippedFrames']) == (3, 27)
+    assert sum(detector.calls) == 30 + 3
+    assert gated['detections'] == [d for d in serial['detections'] if d['frame'] in (0, 30, 60)]
+
+
+def test_motion_gate_refresh_forces_inference(make_video, detector):
+    video = make_video(320, 180, 90, hold=90)  # one static scene
+    gated = analyze_video(video, frame_interval=3, confidence=0.1, model=detector,
+                          motion_threshold=0.01, motion_refresh=4)
+
+    assert (gated['inferredFrames'], gated['skippedFrames']) == (6, 24)  # every fifth sample
+    assert [d['frame'] for d in gated['detections']] == [0, 15, 30, 45, 60, 75]
+
+
+def test_cached_output_equals_uncached(make_video, detector, tmp_path):
+    video = make_video(320, 180, 60)
+    cache = ResultCache(str(tmp_path / 'cache'))
+    uncached = analyze_video(video, frame_interval=3, confidence=0.1, model=detector)
+
+    first = cached_analyze_video(cache, video, frame_interval=3, confidence=0.1, model=detector)
+    calls = len(detector.calls)
+    hit = cached_analyze_video(cache, video, frame_interval=3, confidence=0.1, model=detector)
+
+    assert first == uncached
+    assert hit == {**uncached, 'cached': True}
+    assert len(detector.calls) == calls  # the hit ran nothing
+    other = cached_analyze_video(cache, video, frame_interval=5, confidence=0.1, model=detector)
+    assert 'cached' not in other and len(detector.calls) > calls
+
+
+def test_cached_stream_replays_records(make_video, detector, tmp_path):
+    video = make_video(320, 180, 60)
+    cache = ResultCache(str(tmp_path / 'cache'))
+    expected, result = streamed(video, frame_interval=3, confidence=0.1, model=detector)
+
+    runs = []
+    for _ in range(2):
+        records = []
+        hit = cached_analyze_video(cache, video, on_event=records.append,
+                                   frame_interval=3, confidence=0.1, model=detector)
+        hit.pop('elapsed')
+        runs.append(([r for r in records if r['event'] != 'progress'], hit))
+
+    assert runs[0] == (expected, result)
+    assert runs[1] == (expected, {**result, 'cached': True})
+
+
+def test_timings_do_not_change_the_output(make_video, tmp_path):
+    pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    video = make_video(320, 180, 90)
+    options = dict(model_path=tiny_onnx_model(str(tmp_path / 'tiny.onnx')), backend='onnxruntime',
+                   frame_interval=3, confidence=0.3, batch_size=4)
+    plain = analyze_video(video, **options)
+    timed = analyze_video(video, timings=True, **options)
+    timings = timed.pop('timings')
+
+    assert timed == plain
+    assert list(timings['stages']) == ['decode', 'preprocess', 'forward', 'postprocess', 'boxes']
+    assert (timings['framesDecoded'], timings['framesInferred'], timings['framesSkipped']) == (30, 30, 0)
+    assert timings['inferenceCalls'] == 8
+    for stage in timings['stages'].values():
+        assert sum(stage['histogram']) == stage['frames']
+
+    parallel = analyze_video(video, timings=True, workers=2, **options)
+    assert parallel.pop('timings')['framesInferred'] == 30
+    assert parallel == plain
+
+
+def test_timings_count_gated_frames(make_video, detector):
+    video = make_video(320, 180, 90, hold=30)
+    timings = analyze_video(video, frame_interval=3, confidence=0.1, model=detector, timings=True,
+                            motion_threshold=0.01, motion_refresh=0)['timings']
+    assert (timings['framesDecoded'], timings['framesInferred'], timings['framesSkipped']) == (30, 3, 27)
@@ -0,0 +1,66 @@
+import os
+
+import pytest
+
+from analyze_video import analyze_video
+
+
+class Crash(Exception):
+    pass
+
+
+def crashing_sink(records, limit):
+    """on_event that keeps records and dies instead of taking detection record number `limit`."""
+    def on_event(record):
+        if record['event'] == 'progress':
+            return
+        if record['event'] == 'detection' and sum(r['event'] == 'detection' for r in records) + 1 >= limit:
+            raise Crash()
+        records.append(record)
+    return on_event
+
+
+def test_no_checkpoint_file_by_default(make_video, detector):
+    video = make_video(320, 180, 30)
+    analyze_video(video, frame_interval=5, confidence=0.1, model=detector)
+    assert not os.path.exists(video + '.checkpoint.json')
+
+
+def test_streaming_resume_repeats_at_most_one_interval(make_video, detector, tmp_path):
+    video = make_video(320, 180, 90)
+    options = dict(frame_interval=3, confidence=0.1, batch_size=2, model=detector,
+                   checkpoint=str(tmp_path / 'run.checkpoint.json'), checkpoint_every=1e-9)
+
+    expected = []
+    analyze_video(video, on_event=crashing_sink(expected, float('inf')), **options)
+
+    records = []
+    with pytest.raises(Crash):
+        analyze_video(video, on_event=crashing_sink(records, 7), **options)
+    resumed = []
+    analyze_video(video, on_event=crashing_sink(resumed, float('inf')), resume=True, **options)
+
+    assert resumed[0]['event'] == 'resume'
+    kept = resumed[0]['emitted']
+    assert 0 < kept <= len(records)
+    assert records[:kept] + resumed[1:] == expected
+
+
+def test_checkpoint_is_throttled_while_streaming(make_video, detector, tmp_path, monkeypatch):
+    import checkpoint
+
+    saves = []
+    monkeypatch.setattr(checkpoint.Checkpointer, 'save', lambda self, state: saves.append(state))
+    video = make_video(320, 180, 60)
+    analyze_video(video, frame_interval=3, confidence=0.1, model=detector, on_event=lambda record: None,
+                  checkpoint=str(tmp_path / 'run.checkpoint.json'), checkpoint_every=3600)
+    assert saves == []  # every batch emitted records, none was due
+
+
+def test_time_limit_stops_when_gate_rejects_every_frame(make_video, detector, tmp_path):
+    video = make_video(320, 180, 120)
+    result = analyze_video(video, frame_interval=1, confidence=0.1, batch_size=4, model=detector,
+                           motion_threshold=1.0, motion_refresh=10 ** 6, time_limit=1e-9,
+                           checkpoint=str(tmp_path / 'run.checkpoint.json'))
+    assert result['partial'] is True
+    assert result['analyzedFrames'] < 10  # stopped near the start, not after decoding the whole video
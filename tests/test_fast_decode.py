@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+import pytest
+
+from analyze_video import analyze_video
+from fast_decode import Downscaler, iter_downscaled_frames, iter_scaled_decode
+from frame_sampler import iter_sampled_frames
+
+
+def test_frames_at_decode_size_are_not_overwritten_by_later_reads(make_video):
+    video = make_video(640, 360, 20)
+    cap = cv2.VideoCapture(video)
+    expected = [frame for _, frame in iter_sampled_frames(cap, 2)]
+    cap.release()
+
+    cap = cv2.VideoCapture(video)
+    downscaler = Downscaler(640, buffers=len(expected) + 1)
+    held = [frame for _, frame in iter_downscaled_frames(cap, 2, downscaler)]
+    cap.release()
+
+    assert downscaler.scale is None
+    assert len(held) == len(expected)
+    for got, want in zip(held, expected):
+        assert np.array_equal(got, want)
+
+
+def test_decode_size_batches_match_baseline(make_video, detector):
+    video = make_video(640, 360, 60)
+    options = dict(frame_interval=3, confidence=0.1, model=detector)
+    baseline = analyze_video(video, batch_size=1, **options)
+    for batch_size in (1, 4):
+        result = analyze_video(video, batch_size=batch_size, decode_size=640, **options)
+        assert result['detections'] == baseline['detections']
+    assert max(detector.calls) == 4
+
+
+def test_decode_size_downscales_and_maps_boxes_back(make_video, detector):
+    video = make_video(1280, 720, 30)
+    result = analyze_video(video, frame_interval=5, confidence=0.1, batch_size=3,
+                           decode_size=640, model=detector)
+    baseline = analyze_video(video, frame_interval=5, confidence=0.1, batch_size=1, model=detector)
+    assert len(result['detections']) == len(baseline['detections'])
+    for got, want in zip(result['detections'], baseline['detections']):
+        assert got['frame'] == want['frame']
+        assert np.allclose(got['bbox'], want['bbox'], atol=4)
+
+
+def test_scaled_decode_matches_opencv_decode(make_video):
+    pytest.importorskip('av')
+    video = make_video(1280, 720, 40)
+    cap = cv2.VideoCapture(video)
+    expected = [(idx, frame.copy()) for idx, frame in iter_downscaled_frames(cap, 3, Downscaler(640))]
+    cap.release()
+
+    downscaler = Downscaler(640, buffers=len(expected))
+    scaled = list(iter_scaled_decode(video, 3, downscaler))
+
+    assert [idx for idx, _ in scaled] == [idx for idx, _ in expected]
+    for (_, got), (_, want) in zip(scaled, expected):
+        assert downscaler.owns(got)
+        assert got.shape == want.shape == (360, 640, 3)
+        assert np.abs(got.astype(int) - want).mean() < 2
+
+
+def test_scaled_decode_seeks_to_start(make_video):
+    pytest.importorskip('av')
+    video = make_video(1280, 720, 90)
+    whole = {idx: frame.copy() for idx, frame in iter_scaled_decode(video, 3, Downscaler(640))}
+    part = [(idx, frame.copy()) for idx, frame in iter_scaled_decode(video, 3, Downscaler(640), 45, 75)]
+
+    assert [idx for idx, _ in part] == list(range(45, 75, 3))
+    for idx, frame in part:
+        assert np.array_equal(frame, whole[idx])
@@ -0,0 +1,7 @@
+from frame_pipeline import prefetch
+
+
+def test_prefetch_keeps_order_and_none_items():
+    items = [3, None, 0, None, 7, 1]
+    loaded = list(prefetch(items, lambda item: -1 if item is None else item * 2, workers=3, lookahead=2))
+    assert loaded == [(3, 6), (None, -1), (0, 0), (None, -1), (7, 14), (1, 2)]
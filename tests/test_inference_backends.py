@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('onnx')
+pytest.importorskip('onnxruntime')
+
+from conftest import ONNX_SIZE, tiny_onnx_model  # noqa: E402
+from inference_backends import OnnxDetector  # noqa: E402
+
+
+def frame(index):
+    rng = np.random.default_rng(index)
+    return rng.integers(0, 256, (ONNX_SIZE, ONNX_SIZE, 3), np.uint8)
+
+
+def test_fixed_batch_export_takes_any_number_of_frames(tmp_path):
+    detector = OnnxDetector(tiny_onnx_model(str(tmp_path / 'fixed.onnx'), batch=4))
+    assert detector.batch == 4
+    frames = [frame(i) for i in range(7)]  # a full batch and a short one
+
+    batched = detector.predict(frames, conf=0.3)
+    single = [detector.predict([f], conf=0.3)[0] for f in frames]
+
+    assert len(batched) == len(frames)
+    assert sum(len(d.conf) for d in batched) > 0
+    for a, b in zip(batched, single):
+        np.testing.assert_array_equal(a.xyxy, b.xyxy)
+        np.testing.assert_array_equal(a.conf, b.conf)
+        np.testing.assert_array_equal(a.cls, b.cls)
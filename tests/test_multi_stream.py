@@ -0,0 +1,74 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from multi_stream import MultiStreamMonitor
+
+
+def decoded_frames(path):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_monitor(monitor, timeout=10.0):
+    """Every (stream, frame, dets) the monitor returns until all files are done."""
+    results = []
+    deadline = time.perf_counter() + timeout
+    monitor.start()
+    try:
+        while not monitor.finished and time.perf_counter() < deadline:
+            results.extend(monitor.step(timeout=0.05))
+        results.extend(monitor.step(timeout=0.05))
+    finally:
+        monitor.stop()
+    assert monitor.finished
+    return results
+
+
+def test_batched_streams_match_per_frame_detection(make_video, detector):
+    videos = [make_video(320, 180, 30, name='a.mp4'), make_video(480, 270, 45, name='b.mp4')]
+    monitor = MultiStreamMonitor(detector, videos, conf=0.1)
+    results = run_monitor(monitor)
+
+    originals = {stream: decoded_frames(video) for stream, video in zip(monitor.streams, videos)}
+    assert {stream for stream, *_ in results} == set(monitor.streams)
+    for stream, frame, dets, _ in results:
+        # the frame is one the plain decode loop reads, and batching does not change its boxes
+        assert any(np.array_equal(frame, original) for original in originals[stream])
+        (expected,) = detector.predict([frame], 0.1)
+        assert np.array_equal(dets.xyxy, expected.xyxy)
+        assert np.array_equal(dets.conf, expected.conf)
+        assert np.array_equal(dets.cls, expected.cls)
+
+    for stream, video in zip(monitor.streams, videos):
+        stats = stream.stats()
+        assert stats['captured'] == len(originals[stream])
+        assert stats['inferred'] > 0
+        assert stats['inferred'] + stats['dropped'] >= stats['captured'] - 1
+
+
+def test_max_batch_caps_every_model_call(make_video, detector):
+    videos = [make_video(320, 180, 20, name=f'{i}.mp4') for i in range(3)]
+    monitor = MultiStreamMonitor(detector, videos, conf=0.1, max_batch=1)
+    run_monitor(monitor)
+    assert detector.calls and max(detector.calls) == 1
+    assert all(stream.inferred > 0 for stream in monitor.streams)
+
+
+def test_failed_source_stops_started_streams(make_video, detector, tmp_path):
+    video = make_video(320, 180, 30)
+    monitor = MultiStreamMonitor(detector, [video, str(tmp_path / 'missing.mp4')], loop=True)
+    with pytest.raises(RuntimeError):
+        monitor.start()
+    first = monitor.streams[0]
+    assert not first._thread.is_alive()
+    assert first.finished
@@ -0,0 +1,158 @@
+import json
+import os
+
+import shutil
+
+import cv2
+
+from conftest import render_frame
+from prepare_dataset import LABEL_CACHE_NAME, MANIFEST_NAME, auto_label, prepare_incremental
+
+
+def write_images(directory, indices, size=(160, 120)):
+    directory.mkdir(exist_ok=True)
+    paths = []
+    for index in indices:
+        path = directory / f'photo_{index}.jpg'
+        cv2.imwrite(str(path), render_frame(index * 11, *size))
+        paths.append(path)
+    return paths
+
+
+def manifest(dataset):
+    with open(dataset / MANIFEST_NAME, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_touched_source_is_unchanged_not_a_duplicate(tmp_path):
+    source, dataset = tmp_path / 'image', tmp_path / 'dataset'
+    first, _ = write_images(source, [1, 2])
+    prepare_incremental(source, dataset, workers=2)
+
+    stat = first.stat()
+    os.utime(first, (stat.st_atime, stat.st_mtime + 60))
+    result = prepare_incremental(source, dataset, workers=2)
+
+    assert (result['added'], result['exact'], result['unchanged']) == (0, 0, 2)
+    record = manifest(dataset)['sources'][first.name]
+    assert record['status'] == 'added'
+    assert record['mtime'] == first.stat().st_mtime
+
+
+def test_manifest_dedups_exact_and_near_duplicates(tmp_path):
+    source, dataset = tmp_path / 'image', tmp_path / 'dataset'
+    first, second = write_images(source, [1, 2])
+    shutil.copy(first, source / 'photo_1_copy.jpg')
+    image = cv2.imread(str(second))
+    cv2.imwrite(str(source / 'photo_2_small.jpg'), cv2.resize(image, (80, 60), interpolation=cv2.INTER_AREA))
+
+    result = prepare_incremental(source, dataset, workers=2)
+
+    assert (result['added'], result['exact'], result['near']) == (2, 1, 1)
+    sources = manifest(dataset)['sources']
+    assert sources['photo_1_copy.jpg']['status'] == 'duplicate'
+    assert sources['photo_1_copy.jpg']['of'] == sources[first.name]['sha256']
+    assert sources['photo_2_small.jpg']['status'] == 'near-duplicate'
+    assert sources['photo_2_small.jpg']['of'] == sources[second.name]['sha256']
+    assert len(list((dataset / 'images').glob('*/*.jpg'))) == 2
+
+
+def test_near_dedup_can_be_turned_off(tmp_path):
+    source, dataset = tmp_path / 'image', tmp_path / 'dataset'
+    (first,) = write_images(source, [1])
+    cv2.imwrite(str(source / 'photo_1_small.jpg'), cv2.resize(cv2.imread(str(first)), (80, 60)))
+
+    result = prepare_incremental(source, dataset, workers=2, near_dup_threshold=-1)
+    assert (result['added'], result['near']) == (2, 0)
+
+
+def test_second_run_only_adds_new_images(tmp_path):
+    source, dataset = tmp_path / 'image', tmp_path / 'dataset'
+    write_images(source, [1, 2])
+    first = prepare_incremental(source, dataset, workers=2)
+    write_images(source, [3])
+    second = prepare_incremental(source, dataset, workers=2)
+
+    assert (second['added'], second['unchanged'], second['exact']) == (1, 2, 0)
+    files = manifest(dataset)['files']
+    assert sorted(entry['name'] for entry in files.values()) == sorted(first['names'] + second['names'])
+
+
+def labeled_dataset(tmp_path, monkeypatch, detector):
+    """A dataset with one hand-made background image (empty label) and the detector as the model."""
+    import inference_backends
+
+    source, dataset = tmp_path / 'image', tmp_path / 'dataset'
+    for kind in ('images', 'labels'):
+        (dataset / kind / 'train').mkdir(parents=True)
+    cv2.imwrite(str(dataset / 'images' / 'train' / 'background.jpg'), render_frame(3, 160, 120))
+    (dataset / 'labels' / 'train' / 'background.txt').touch()
+    (dataset / 'data.yaml').write_text('names:\n  0: person\n  1: weapon\n')
+    write_images(source, [1, 2])
+    monkeypatch.setattr(inference_backends, 'load_detector', lambda model_path, backend='torch': detector)
+    return source, dataset
+
+
+def label_path(dataset, name):
+    entry = next(e for e in manifest(dataset)['files'].values() if e['name'] == name)
+    return dataset / 'labels' / entry['split'] / (os.path.splitext(name)[0] + '.txt')
+
+
+def label_text(dataset, name):
+    return label_path(dataset, name).read_text()
+
+
+def test_auto_label_only_labels_added_images(tmp_path, monkeypatch, detector):
+    source, dataset = labeled_dataset(tmp_path, monkeypatch, detector)
+    added = prepare_incremental(source, dataset, workers=2)['names']
+
+    result = auto_label(dataset, 'model.pt', images=added, workers=2)
+
+    assert result['labeled'] == 2
+    assert all(label_text(dataset, name).startswith('0 ') for name in added)
+    assert label_text(dataset, 'background.jpg') == ''
+
+
+def test_label_empty_fills_background_labels(tmp_path, monkeypatch, detector):
+    source, dataset = labeled_dataset(tmp_path, monkeypatch, detector)
+    prepare_incremental(source, dataset, workers=2)
+
+    assert auto_label(dataset, 'model.pt', workers=2)['labeled'] == 0  # nothing without a label file
+    assert auto_label(dataset, 'model.pt', label_empty=True, workers=2)['labeled'] == 3
+    assert label_text(dataset, 'background.jpg').startswith('0 ')
+
+
+def test_batched_labels_equal_single_image_labels(tmp_path, monkeypatch, detector):
+    source, dataset = labeled_dataset(tmp_path, monkeypatch, detector)
+    write_images(source, range(3, 8))
+    added = prepare_incremental(source, dataset, workers=2)['names']
+
+    auto_label(dataset, 'model.pt', images=added, batch_size=1, workers=2)
+    single = {name: label_text(dataset, name) for name in added}
+    (dataset / LABEL_CACHE_NAME).unlink()
+    for name in added:
+        label_path(dataset, name).write_text('')
+    auto_label(dataset, 'model.pt', images=added, batch_size=4, workers=2)
+
+    assert {name: label_text(dataset, name) for name in added} == single
+    assert detector.calls == [1] * len(added) + [4, 3]
+
+
+def test_label_cache_is_reused(tmp_path, monkeypatch, detector):
+    source, dataset = labeled_dataset(tmp_path, monkeypatch, detector)
+    added = prepare_incremental(source, dataset, workers=2)['names']
+    auto_label(dataset, 'model.pt', images=added, workers=2)
+    labels = {name: label_text(dataset, name) for name in added}
+    calls = len(detector.calls)
+
+    for name in added:  # e.g. a dataset rebuilt from scratch
+        label_path(dataset, name).unlink()
+    result = auto_label(dataset, 'model.pt', workers=2)
+
+    assert (result['cached'], result['inferred']) == (2, 0)
+    assert len(detector.calls) == calls
+    assert {name: label_text(dataset, name) for name in added} == labels
+
+    for name in added:  # other settings, other labels
+        label_path(dataset, name).unlink()
+    assert auto_label(dataset, 'model.pt', conf=0.5, workers=2)['inferred'] == 2
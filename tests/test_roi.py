@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+from analyze_video import analyze_video
+from detection_utils import Detections
+from roi import RegionOfInterest, RoiDetector, points_in_polygon
+
+
+class FixedDetector:
+    """Returns the same boxes (in the coordinates of the frame it is given) for every frame."""
+
+    names = {0: 'person', 1: 'weapon'}
+
+    def __init__(self, boxes):
+        self.boxes = np.array(boxes, np.float32)
+        self.shapes = []
+
+    def predict(self, frames, conf=0.25, timings=None):
+        self.shapes.extend(frame.shape for frame in frames)
+        count = len(self.boxes)
+        return [Detections(self.boxes.copy(), np.full(count, 0.9, np.float32), np.zeros(count, np.int64))
+                for _ in frames]
+
+
+def test_points_in_concave_polygon():
+    # an L shape: the top-right quarter of the square is outside
+    polygon = np.array([[0, 0], [5, 0], [5, 5], [10, 5], [10, 10], [0, 10]], np.float64)
+    points = np.array([[2, 2], [7, 2], [7, 7], [2, 7], [12, 5]], np.float64)
+    assert points_in_polygon(points, polygon).tolist() == [True, False, True, True, False]
+
+
+def test_roi_detector_crops_and_drops_outside_centres():
+    # bottom half of a 200x100 frame; the crop box is y 45..100 with the 10% margin
+    roi = RegionOfInterest([[[0, 0.5], [1, 0.5], [1, 1], [0, 1]]], margin=0.1)
+    inner = FixedDetector([[10, 20, 30, 40],     # centre y 30 + 45 = 75: inside
+                           [50, 0, 70, 8]])      # centre y 4 + 45 = 49: in the margin, outside
+    detector = RoiDetector(inner, roi)
+    (dets,) = detector.predict([np.zeros((100, 200, 3), np.uint8)])
+
+    assert inner.shapes == [(55, 200, 3)]
+    assert dets.xyxy.tolist() == [[10, 65, 30, 85]]
+    assert dets.conf.tolist() == pytest.approx([0.9])
+
+
+def test_pixel_roi_follows_resized_frames():
+    roi = RegionOfInterest([[[100, 50], [200, 50], [200, 100], [100, 100]]], units='pixels', margin=0)
+    half = roi.normalized((100, 200)).resolve((50, 100))
+    assert half[1] == (50, 25, 100, 50)
+
+
+def test_analysis_only_keeps_detections_inside_the_roi(make_video, detector):
+    video = make_video(320, 180, 90)
+    polygon = [[0, 0], [0.5, 0], [0.5, 1], [0, 1]]  # left half
+    full = analyze_video(video, frame_interval=3, confidence=0.1, model=detector)
+    masked = analyze_video(video, frame_interval=3, confidence=0.1, model=detector,
+                           roi={'polygons': [polygon], 'margin': 0})
+
+    centres = [(b[0] + b[2]) / 2 for b in (d['bbox'] for d in masked['detections'])]
+    assert masked['detections'] and all(x < 160 for x in centres)
+    assert len(masked['detections']) < len(full['detections'])
+    # a block wholly inside the ROI is found at the same place (the score follows the crop)
+    inside = {(d['frame'], *d['bbox']) for d in full['detections'] if d['bbox'][2] <= 160}
+    assert inside and inside <= {(d['frame'], *d['bbox']) for d in masked['detections']}
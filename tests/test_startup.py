@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT, tiny_onnx_model
+
+HEAVY_MODULES = ('torch', 'ultralytics', 'onnxruntime', 'openvino')
+
+
+def loaded_modules(code):
+    """Heavy modules loaded by running code in a fresh interpreter."""
+    check = f'{code}\nimport sys\nprint("loaded:" + ",".join(m for m in {HEAVY_MODULES!r} if m in sys.modules))'
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join([ROOT, os.path.join(ROOT, 'backend')])}
+    out = subprocess.run([sys.executable, '-c', check], env=env, cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return out.splitlines()[-1][len('loaded:'):]
+
+
+@pytest.mark.parametrize('module', ['analyze_video', 'webcam_detect', 'yolo_detect'])
+def test_import_does_not_load_a_backend(module):
+    assert loaded_modules(f'import {module}') == ''
+
+
+def test_help_does_not_load_a_backend():
+    code = ('import sys, analyze_video\nsys.argv = ["analyze_video.py", "--help"]\n'
+            'try:\n    analyze_video.main()\nexcept SystemExit:\n    pass')
+    assert loaded_modules(code) == ''
+
+
+def test_startup_profile_stages(tmp_path):
+    pytest.importorskip('onnx')
+    pytest.importorskip('onnxruntime')
+    from startup_profile import StartupProfile
+
+    profile = StartupProfile(imports=0.5)
+    detector = profile.load_detector(tiny_onnx_model(str(tmp_path / 'tiny.onnx')), 'onnxruntime',
+                                     warmup_shape=(90, 160))
+    assert detector.names == {0: 'person', 1: 'weapon'}
+    stages = profile.to_dict()
+    assert list(stages) == ['imports', 'backend import', 'model load', 'warm-up', 'total']
+    assert stages['total'] == pytest.approx(sum(profile.stages.values()), abs=1e-3)
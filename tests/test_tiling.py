@@ -0,0 +1,46 @@
+import cv2
+import numpy as np
+import pytest
+
+from detection_utils import Detections
+from tiling import TiledDetector, merge_detections, tile_grid
+
+
+def dets(boxes, confs, classes=None):
+    return Detections(np.array(boxes, np.float32), np.array(confs, np.float32),
+                      np.array(classes or [0] * len(boxes), np.int64))
+
+
+def test_tile_grid_covers_the_region_with_overlap():
+    tiles = tile_grid((0, 0, 400, 200), tile_size=128, overlap=0.25)
+    assert sorted({x1 for x1, _, _, _ in tiles}) == [0, 96, 192, 272]
+    assert sorted({y1 for _, y1, _, _ in tiles}) == [0, 72]
+    assert all(x2 - x1 == 128 and y2 - y1 == 128 for x1, y1, x2, y2 in tiles)
+    assert tile_grid((10, 20, 100, 90), tile_size=128) == [(10, 20, 100, 90)]
+
+
+def test_merge_suppresses_duplicates_from_overlapping_tiles():
+    # IoU 0.61 with the better box, but not contained in it: dropped, not merged
+    merged = merge_detections([dets([[100, 100, 150, 150]], [0.9]),
+                               dets([[112, 100, 162, 150]], [0.8]),
+                               dets([[112, 100, 162, 150]], [0.7], [1])])  # another class stays
+    assert merged.xyxy.tolist() == [[100, 100, 150, 150], [112, 100, 162, 150]]
+    assert merged.conf.tolist() == pytest.approx([0.9, 0.7])
+    assert merged.cls.tolist() == [0, 1]
+
+
+def test_merge_joins_a_box_cut_by_a_tile_edge():
+    # the cut-off part (low IoU with the whole box) lies inside it and is absorbed
+    merged = merge_detections([dets([[100, 60, 128, 140]], [0.95]), dets([[100, 60, 220, 140]], [0.6])])
+    assert merged.xyxy.tolist() == [[100, 60, 220, 140]]
+    assert merged.conf.tolist() == pytest.approx([0.95])
+
+
+def test_object_across_tiles_is_detected_once(detector):
+    frame = np.zeros((200, 400, 3), np.uint8)
+    cv2.rectangle(frame, (100, 60), (219, 139), (255, 255, 255), cv2.FILLED)
+    tiled = TiledDetector(detector, tile_size=128, overlap=0.25)
+
+    (result,) = tiled.predict([frame, frame[::-1]])[:1]
+    assert detector.calls == [16]  # 8 tiles per frame, one batch
+    assert result.xyxy.tolist() == [[100, 60, 220, 140]]
@@ -0,0 +1,68 @@
+import numpy as np
+
+from analyze_video import analyze_video
+from tracker import IoUTracker
+
+
+def step(tracker, frame_idx, boxes, classes=None):
+    """Feed one frame; returns (confirmed ids, finished ids)."""
+    xyxy = np.array(boxes, np.float32).reshape(-1, 4)
+    cls = np.array(classes or [0] * len(xyxy), np.int64)
+    confirmed, finished = tracker.update(frame_idx, xyxy, np.full(len(xyxy), 0.8, np.float32), cls)
+    return [t.id for t in confirmed], [t.id for t in finished]
+
+
+def ids_by_box(tracker):
+    return {tuple(t.box.astype(int).tolist()): t.id for t in tracker.active}
+
+
+def test_ids_stay_stable_across_frames_and_a_gap():
+    tracker = IoUTracker(max_gap=40)
+    # two people walking apart, 20 px per sampled frame
+    for frame_idx in range(0, 50, 10):
+        shift = frame_idx * 2
+        step(tracker, frame_idx, [[300 + shift, 100, 360 + shift, 220], [200 - shift, 100, 260 - shift, 220]])
+        assert ids_by_box(tracker) == {(300 + shift, 100, 360 + shift, 220): 1,
+                                       (200 - shift, 100, 260 - shift, 220): 2}
+    # missed for two samples, then 60 px further on: the velocity estimate bridges the gap
+    assert step(tracker, 70, [[440, 100, 500, 220], [60, 100, 120, 220]]) == ([], [])
+    assert ids_by_box(tracker) == {(440, 100, 500, 220): 1, (60, 100, 120, 220): 2}
+    assert tracker.next_id == 3
+
+
+def test_classes_are_tracked_apart():
+    tracker = IoUTracker()
+    step(tracker, 0, [[0, 0, 50, 50]], [0])
+    assert step(tracker, 10, [[0, 0, 50, 50], [2, 2, 50, 50]], [0, 1]) == ([2], [])
+    assert sorted((t.id, t.cls, t.hits) for t in tracker.active) == [(1, 0, 2), (2, 1, 1)]
+
+
+def test_track_ends_after_max_gap():
+    tracker = IoUTracker(max_gap=20)
+    assert step(tracker, 0, [[0, 0, 50, 50]]) == ([1], [])
+    assert step(tracker, 20, [[0, 0, 50, 50]]) == ([], [])
+    assert step(tracker, 41, [[0, 0, 50, 50]]) == ([2], [1])  # 21 frames unmatched
+    assert [t.id for t in tracker.finish()] == [2]
+
+
+def test_unconfirmed_tracks_are_dropped():
+    tracker = IoUTracker(max_gap=10, min_hits=2)
+    assert step(tracker, 0, [[0, 0, 50, 50], [200, 0, 250, 50]]) == ([], [])
+    assert step(tracker, 5, [[0, 0, 50, 50]]) == ([1], [])
+    assert step(tracker, 20, []) == ([], [1])  # the one-hit track 2 never counted
+
+
+def test_tracks_cover_every_detection(make_video, detector):
+    video = make_video(320, 180, 90)
+    detections = analyze_video(video, frame_interval=1, confidence=0.1, model=detector)['detections']
+    tracked = analyze_video(video, frame_interval=1, confidence=0.1, model=detector, track=True)
+
+    tracks = tracked['tracks']
+    assert tracked['detectionCount'] == len(detections) == sum(t['detections'] for t in tracks)
+    assert [t['id'] for t in tracks] == list(range(1, len(tracks) + 1))
+    # one track per straight run of the block: a new ID exactly where it jumps back (see render_frame)
+    jumps = [i for i in range(1, 90)
+             if (i * 13) % 240 < ((i - 1) * 13) % 240 or (i * 5) % 135 < ((i - 1) * 5) % 135]
+    assert [t['firstFrame'] for t in tracks] == [0] + jumps
+    assert [t['lastFrame'] for t in tracks] == [i - 1 for i in jumps] + [89]
+    assert len(tracked['alerts']) == len(tracks)  # one per person track
@@ -0,0 +1,68 @@
+import threading
+
+from analyze_video import AnalysisWorker
+
+
+class BlockingDetector:
+    """Detector whose predict() waits until released, like a job stuck on a long video."""
+
+    names = {0: 'person'}
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def predict(self, frames, conf=0.25, timings=None):
+        self.started.set()
+        self.release.wait(10)
+        return self.detector.predict(frames, conf)
+
+
+def test_cancel_stops_running_job_and_frees_the_queue(make_video, detector):
+    video = make_video(320, 180, 30)
+    worker = AnalysisWorker(max_concurrency=1)
+    blocking = BlockingDetector(detector)
+    worker.pool.acquire = lambda model_path, backend='torch': blocking
+    worker.pool.release = lambda model_path, model, backend='torch': None
+    replies = {}
+    done = threading.Event()
+
+    def send(message):
+        if message.get('type') in ('result', 'error'):
+            replies[message['id']] = message
+            if len(replies) == 2:
+                done.set()
+
+    worker.handle({'op': 'analyze', 'id': 'hung', 'video': video, 'interval': 5, 'stream': True}, send)
+    worker.handle({'op': 'analyze', 'id': 'next', 'video': video, 'interval': 5}, send)
+    assert blocking.started.wait(10)
+    worker.handle({'op': 'cancel', 'id': 'hung'}, send)
+    blocking.release.set()  # the running inference call returns, the next one sees the cancel
+
+    assert done.wait(10)
+    worker.close()
+    assert replies['hung'] == {'id': 'hung', 'type': 'error', 'error': 'Cancelled'}
+    assert replies['next']['type'] == 'result'
+    assert replies['next']['result']['analyzedFrames'] == 6
+
+
+def test_cancel_drops_queued_job(make_video, detector):
+    video = make_video(320, 180, 30)
+    worker = AnalysisWorker(max_concurrency=1)
+    blocking = BlockingDetector(detector)
+    worker.pool.acquire = lambda model_path, backend='torch': blocking
+    worker.pool.release = lambda model_path, model, backend='torch': None
+    replies = []
+
+    worker.handle({'op': 'analyze', 'id': 'first', 'video': video, 'interval': 5}, replies.append)
+    worker.handle({'op': 'analyze', 'id': 'queued', 'video': video, 'interval': 5}, replies.append)
+    assert blocking.started.wait(10)
+    worker.handle({'op': 'cancel', 'id': 'queued'}, replies.append)
+    blocking.release.set()
+    worker.close()
+
+    final = {reply['id']: reply for reply in replies if reply['type'] in ('result', 'error')}
+    assert final['first']['type'] == 'result'
+    assert final['queued'] == {'id': 'queued', 'type': 'error', 'error': 'Cancelled'}
+    assert blocking.detector.calls == [1] * 6  # the queued job never ran
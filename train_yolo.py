@@ -19,8 +19,11 @@ Each .txt file should have one line per object:
 All values are normalized (0-1) relative to image dimensions.
 """
 
-from ultralytics import YOLO
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from detection_utils import result_to_arrays  # noqa: E402
 
 # ============================================================
 # STEP 1: Configuration
@@ -44,6 +47,17 @@ DEVICE = "cpu"        # GPU device (0, 1, 2...) or 'cpu'
 PROJECT = "runs/train"
 NAME = "monument_protection"
 
+# Preprocessed image store: decode + resize every image once instead of every epoch
+USE_IMAGE_STORE = True
+IMAGE_STORE_DIR = "dataset/image_store"
+
+# Post-training INT8 quantization (needs: pip install onnxruntime onnx)
+QUANTIZE_INT8 = False       # Quantize the exported ONNX model after training
+CALIB_DIR = "dataset/images/val"
+CALIB_IMAGES = 100          # Calibration images sampled from CALIB_DIR
+LATENCY_RUNS = 50           # Timed inferences per model for the report
+MAX_MAP_DROP = 0.01         # Largest mAP50-95 loss that still counts as shippable
+
 # ============================================================
 # STEP 2: Create data.yaml if it doesn't exist (example)
 # ============================================================
@@ -90,14 +104,95 @@ names:
 
 
 # ============================================================
-# STEP 3: Train the Model
+# STEP 3: Build the Preprocessed Image Store
 # ============================================================
 
-def train_model():
+def dataset_images(data_yaml=DATA_YAML):
+    """
+    Image paths of the train and val splits named in data_yaml, resolved
+    the way ultralytics resolves them (split directories only).
+    """
+    import yaml
+    from image_store import image_files
+
+    with open(data_yaml) as f:
+        data = yaml.safe_load(f)
+    root = data.get("path") or os.path.dirname(data_yaml)
+    if not os.path.isabs(root) and not os.path.isdir(root):
+        root = os.path.join(os.path.dirname(data_yaml), root)
+
+    paths = []
+    for split in ("train", "val"):
+        entries = data.get(split) or []
+        for entry in entries if isinstance(entries, list) else [entries]:
+            directory = os.path.realpath(os.path.join(root, entry))
+            if os.path.isdir(directory):
+                paths.extend(image_files(directory))
+            else:
+                print(f"⚠️ {split}: {entry} is not a directory; its images are decoded every epoch")
+    return sorted(set(paths))
+
+
+def build_image_store(data_yaml=DATA_YAML, imgsz=IMG_SIZE, store_dir=IMAGE_STORE_DIR):
+    """
+    Decodes and resizes the dataset images to imgsz once, into a
+    memory-mapped store that training and validation read instead of the
+    JPEGs. Only new or changed images (by SHA-256) are decoded again.
+    """
+    import time
+    from image_store import ImageStore
+
+    print("\n" + "="*60)
+    print("🗃️ BUILDING PREPROCESSED IMAGE STORE")
+    print("="*60)
+
+    start = time.perf_counter()
+    store = ImageStore(store_dir, imgsz)
+    stats = store.build(dataset_images(data_yaml))
+    print(f"   {len(store)} images at {imgsz}px in {store_dir} "
+          f"({stats['decoded']} decoded, {stats['reused']} reused, {stats['removed']} removed) "
+          f"in {time.perf_counter() - start:.1f}s")
+    if stats["unreadable"]:
+        print(f"⚠️ {stats['unreadable']} unreadable images left out of the store")
+    return store
+
+
+def image_store_trainer(store):
+    """DetectionTrainer whose train/val datasets read their images from store."""
+    from ultralytics.models.yolo.detect import DetectionTrainer
+    from image_store import use_image_store
+
+    class ImageStoreTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode="train", batch=None):
+            return use_image_store(super().build_dataset(img_path, mode, batch), store)
+
+    return ImageStoreTrainer
+
+
+def image_store_validator(store):
+    """DetectionValidator whose dataset reads its images from store."""
+    from ultralytics.models.yolo.detect import DetectionValidator
+    from image_store import use_image_store
+
+    class ImageStoreValidator(DetectionValidator):
+        def build_dataset(self, img_path, mode="val", batch=None):
+            return use_image_store(super().build_dataset(img_path, mode, batch), store)
+
+    return ImageStoreValidator
+
+
+# ============================================================
+# STEP 4: Train the Model
+# ============================================================
+
+def train_model(store=None):
     """
     Trains the YOLOv8 model on the custom dataset.
+    Images are read from store (see build_image_store) when given.
     Returns the training results.
     """
+    from ultralytics import YOLO  # imported here so helper-only use of this file stays light
+
     print("\n" + "="*60)
     print("🚀 STARTING YOLOV8 TRAINING")
     print("="*60)
@@ -114,6 +209,7 @@ def train_model():
     print(f"   Dataset: {DATA_YAML}")
     
     results = model.train(
+        trainer=image_store_trainer(store) if store else None,
         data=DATA_YAML,           # Path to data.yaml
         epochs=EPOCHS,            # Number of epochs
         imgsz=IMG_SIZE,           # Image size
@@ -157,12 +253,13 @@ def train_model():
 
 
 # ============================================================
-# STEP 4: Validate the Trained Model
+# STEP 5: Validate the Trained Model
 # ============================================================
 
-def validate_model(model):
+def validate_model(model, store=None):
     """
     Validates the trained model on the validation set.
+    Images are read from store (see build_image_store) when given.
     """
     print("\n" + "="*60)
     print("📊 VALIDATING MODEL")
@@ -170,6 +267,7 @@ def validate_model(model):
     
     # Run validation
     metrics = model.val(
+        validator=image_store_validator(store) if store else None,
         data=DATA_YAML,
         imgsz=IMG_SIZE,
         batch=BATCH_SIZE,
@@ -189,7 +287,7 @@ def validate_model(model):
 
 
 # ============================================================
-# STEP 5: Run Inference on Test Images
+# STEP 6: Run Inference on Test Images
 # ============================================================
 
 def predict_on_image(model, image_path, save_dir="runs/predict"):
@@ -235,12 +333,10 @@ def predict_on_image(model, image_path, save_dir="runs/predict"):
         print(f"\n   Image {i+1}: {result.path}")
         print(f"   Detections: {len(result.boxes)}")
         
-        # Print each detection
-        for box in result.boxes:
-            cls_id = int(box.cls[0])
+        # Print each detection (one host transfer for all boxes)
+        dets = result_to_arrays(result)
+        for cls_id, conf, xyxy in zip(dets.cls.tolist(), dets.conf.tolist(), dets.xyxy.tolist()):
             cls_name = result.names[cls_id]
-            conf = float(box.conf[0])
-            xyxy = box.xyxy[0].tolist()
             print(f"      - {cls_name}: {conf:.2%} at [{xyxy[0]:.0f}, {xyxy[1]:.0f}, {xyxy[2]:.0f}, {xyxy[3]:.0f}]")
     
     print(f"\n   Results saved to: {save_dir}/results")
@@ -249,7 +345,7 @@ def predict_on_image(model, image_path, save_dir="runs/predict"):
 
 
 # ============================================================
-# STEP 6: Export Model to Different Formats
+# STEP 7: Export Model to Different Formats
 # ============================================================
 
 def export_model(model, format="onnx"):
@@ -283,13 +379,15 @@ def export_model(model, format="onnx"):
 
 
 # ============================================================
-# STEP 7: Load Best Weights and Use for Inference
+# STEP 8: Load Best Weights and Use for Inference
 # ============================================================
 
 def load_best_model():
     """
     Loads the best trained model from the runs directory.
     """
+    from ultralytics import YOLO
+
     best_weights = f"{PROJECT}/{NAME}/weights/best.pt"
     
     if os.path.exists(best_weights):
@@ -302,6 +400,180 @@ def load_best_model():
         return None
 
 
+# ============================================================
+# STEP 9: INT8 Quantization with Accuracy/Speed Report
+# ============================================================
+
+def _sample_images(image_dir, count, seed=0):
+    """Returns up to `count` image paths from image_dir (fixed random sample)."""
+    import random
+    exts = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+    paths = sorted(
+        os.path.join(image_dir, f) for f in os.listdir(image_dir) if f.lower().endswith(exts)
+    )
+    random.Random(seed).shuffle(paths)
+    return paths[:count]
+
+
+def _preprocess(image_path, imgsz):
+    """Letterboxed (1, 3, H, W) float32 blob, exactly as the onnxruntime backend feeds it."""
+    import cv2
+    from inference_backends import letterbox
+
+    image, _ = letterbox(cv2.imread(image_path), imgsz)
+    return cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True)
+
+
+def _head_nodes_to_exclude(onnx_path):
+    """
+    Nodes of the detection head's decode step (DFL, box/score concat).
+
+    Boxes (0-640 px) and class scores (0-1) share one output tensor, so
+    quantizing the decode step to a single INT8 scale wipes out the scores.
+    The head's convolutions are still quantized.
+    """
+    import onnx
+
+    graph = onnx.load(onnx_path).graph
+    output_names = {o.name for o in graph.output}
+    last = next(n for n in graph.node if output_names & set(n.output))
+    prefix = last.name.rsplit("/", 1)[0] + "/"      # e.g. "/model.22/"
+    return [n.name for n in graph.node if n.name.startswith(prefix) and n.op_type != "Conv"]
+
+
+def quantize_model(onnx_path, calib_dir=CALIB_DIR, num_images=CALIB_IMAGES):
+    """
+    Post-training static INT8 quantization of an exported ONNX model.
+
+    Activations are calibrated on a sample of calib_dir; weights are
+    quantized per channel. Returns the path of the INT8 model.
+    """
+    print("\n" + "="*60)
+    print("🗜️ QUANTIZING MODEL TO INT8")
+    print("="*60)
+
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static,
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+    import onnxruntime as ort
+
+    session = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    imgsz = tuple(model_input.shape[2:])
+    images = _sample_images(calib_dir, num_images)
+    if not images:
+        raise FileNotFoundError(f"No calibration images in {calib_dir}")
+    print(f"   Calibrating on {len(images)} images from {calib_dir}")
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self):
+            self.paths = iter(images)
+
+        def get_next(self):
+            path = next(self.paths, None)
+            return None if path is None else {model_input.name: _preprocess(path, imgsz)}
+
+    base = os.path.splitext(onnx_path)[0]
+    prepared_path = f"{base}_prep.onnx"
+    int8_path = f"{base}_int8.onnx"
+    quant_pre_process(onnx_path, prepared_path)
+    quantize_static(
+        prepared_path,
+        int8_path,
+        ImageReader(),
+        quant_format=QuantFormat.QDQ,             # portable; fused to INT8 kernels by onnxruntime
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=_head_nodes_to_exclude(prepared_path),
+    )
+    os.remove(prepared_path)
+
+    print(f"   Quantized model: {int8_path}")
+    return int8_path
+
+
+def measure_latency(onnx_path, image_paths, runs=LATENCY_RUNS):
+    """Median and p95 single-image latency (ms) of an ONNX model on the CPU."""
+    import time
+    import cv2
+    from inference_backends import load_detector
+
+    detector = load_detector(onnx_path, "onnxruntime")
+    frames = [cv2.imread(p) for p in image_paths]
+    detector.predict(frames[:1])                    # warm-up
+    timings = []
+    for i in range(runs):
+        start = time.perf_counter()
+        detector.predict([frames[i % len(frames)]])
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2], timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+
+
+def quantize_and_report(fp32_onnx, report_path=None):
+    """
+    Quantizes fp32_onnx to INT8, validates both models with validate_model()
+    and writes a JSON report comparing size, latency and accuracy.
+    """
+    import json
+    from ultralytics import YOLO
+
+    try:
+        int8_onnx = quantize_model(fp32_onnx)
+    except ImportError as exc:
+        print(f"❌ {exc.name or 'onnxruntime'} is not installed; skipping INT8 quantization.")
+        print("   Install it with:  pip install onnxruntime onnx")
+        return None
+
+    latency_images = _sample_images(CALIB_DIR, 10, seed=1)
+    report = {}
+    for label, path in (("fp32", fp32_onnx), ("int8", int8_onnx)):
+        metrics = validate_model(YOLO(path, task="detect"))
+        median, p95 = measure_latency(path, latency_images)
+        report[label] = {
+            "path": path,
+            "size_mb": round(os.path.getsize(path) / 1e6, 2),
+            "latency_ms_median": round(median, 2),
+            "latency_ms_p95": round(p95, 2),
+            "mAP50": round(float(metrics.box.map50), 4),
+            "mAP50-95": round(float(metrics.box.map), 4),
+            "precision": round(float(metrics.box.mp), 4),
+            "recall": round(float(metrics.box.mr), 4),
+        }
+
+    fp32, int8 = report["fp32"], report["int8"]
+    map_drop = fp32["mAP50-95"] - int8["mAP50-95"]
+    report["comparison"] = {
+        "size_ratio": round(int8["size_mb"] / fp32["size_mb"], 3),
+        "speedup": round(fp32["latency_ms_median"] / int8["latency_ms_median"], 2),
+        "mAP50-95_drop": round(map_drop, 4),
+        "max_allowed_drop": MAX_MAP_DROP,
+        "shippable": map_drop <= MAX_MAP_DROP,
+    }
+
+    report_path = report_path or os.path.join(os.path.dirname(fp32_onnx), "quantization_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("\n" + "="*60)
+    print("📋 INT8 vs FP32")
+    print("="*60)
+    print(f"   {'':<18} {'FP32':>10} {'INT8':>10}")
+    for key in ("size_mb", "latency_ms_median", "latency_ms_p95", "mAP50", "mAP50-95", "precision", "recall"):
+        print(f"   {key:<18} {fp32[key]:>10} {int8[key]:>10}")
+    comparison = report["comparison"]
+    print(f"\n   Speed-up: {comparison['speedup']}x | Size: {comparison['size_ratio']:.0%} of FP32 | "
+          f"mAP50-95 drop: {comparison['mAP50-95_drop']:.4f}")
+    verdict = "✅ within" if comparison["shippable"] else "❌ exceeds"
+    print(f"   {verdict} the allowed drop of {MAX_MAP_DROP}")
+    print(f"   Report saved to: {report_path}")
+
+    return report
+
+
 # ============================================================
 # MAIN EXECUTION
 # ============================================================
@@ -317,11 +589,14 @@ if __name__ == "__main__":
         print("   Then update data.yaml with your class names.")
         exit(1)
     
+    # Decode + resize the images once for all epochs
+    store = build_image_store() if USE_IMAGE_STORE else None
+
     # Train the model
-    model, results = train_model()
+    model, results = train_model(store)
     
     # Validate the model
-    validate_model(model)
+    validate_model(model, store)
     
     # Print where the best model is saved
     best_path = f"{PROJECT}/{NAME}/weights/best.pt"
@@ -337,6 +612,17 @@ if __name__ == "__main__":
     
     # Example: Export model to ONNX
     # export_model(model, format="onnx")
+
+    # Post-training INT8 quantization, compared against the FP32 ONNX model
+    if QUANTIZE_INT8:
+        from ultralytics import YOLO
+        try:
+            fp32_onnx = export_model(YOLO(best_path), format="onnx")
+        except ImportError as exc:
+            print(f"❌ {exc.name or 'onnx'} is not installed; skipping ONNX export and INT8 quantization.")
+            print("   Install it with:  pip install onnxruntime onnx")
+        else:
+            quantize_and_report(fp32_onnx)
     
     print("\n" + "="*60)
     print("🎉 ALL DONE!")
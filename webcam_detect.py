@@ -4,15 +4,42 @@ Real-Time Object Detection using YOLOv8 and OpenCV
 Captures webcam feed and runs YOLOv8 inference frame-by-frame,
 drawing bounding boxes and labels on detected objects.
 
+Usage:
+    python webcam_detect.py                    # run YOLO on every frame
+    python webcam_detect.py --motion-gate      # skip YOLO while the scene is static
+    python webcam_detect.py --pipelined        # capture / inference / display on separate threads
+    python webcam_detect.py --sources 0 1 rtsp://cam3/stream lobby.mp4   # many cameras, one model
+    python webcam_detect.py --model yolov8n.onnx --backend onnxruntime
+    python webcam_detect.py --profile-startup  # time imports, model load and warm-up
+    python webcam_detect.py --infer-size 640   # shrink frames to the model's input size before inference
+
 Controls:
     q  - Quit
     s  - Save current frame
 """
 
-import cv2
 import time
+_IMPORT_START = time.perf_counter()
+
+import os
+import math
+import cv2
+import numpy as np
 import sys
-from ultralytics import YOLO
+import argparse
+import threading
+from collections import deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from detection_utils import empty_detections  # noqa: E402
+from frame_pipeline import LatestValue, RateMeter  # noqa: E402
+from multi_stream import MultiStreamMonitor  # noqa: E402
+from inference_backends import BACKENDS, load_detector  # noqa: E402
+from fast_decode import DownscaledDetector  # noqa: E402
+from motion_gate import MOTION_METHODS, MotionGate  # noqa: E402
+from startup_profile import StartupProfile  # noqa: E402
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
 
 # ─── Configuration ───────────────────────────────────────────────────────────
 MODEL_PATH = "yolov8n.pt"          # YOLOv8 nano model (auto-downloads if missing)
@@ -20,6 +47,14 @@ CONFIDENCE_THRESHOLD = 0.5         # Minimum detection confidence
 WEBCAM_INDEX = 0                   # Default webcam
 WINDOW_NAME = "YOLOv8 Real-Time Detection"
 
+# Motion gate (fixed cameras): only run YOLO when the scene changes
+MOTION_THRESHOLD = 0.005           # Fraction of changed pixels that counts as motion
+MOTION_REFRESH = 30                # Force inference after this many skipped frames
+
+# Multi-stream mode: size of each camera's tile in the mosaic window
+TILE_SIZE = (640, 360)
+STATS_INTERVAL = 2.0               # Seconds between stats lines without a display
+
 # Bounding box styling
 BOX_COLOR = (0, 255, 0)           # Green
 BOX_THICKNESS = 2
@@ -29,10 +64,17 @@ LABEL_COLOR = (255, 255, 255)     # White text
 LABEL_BG_COLOR = (0, 255, 0)     # Green background
 
 
-def load_model(model_path: str) -> YOLO:
-    """Load the YOLOv8 model."""
-    print(f"[INFO] Loading model: {model_path}")
-    model = YOLO(model_path)
+def load_model(model_path: str, backend: str = "torch", profile: StartupProfile = None):
+    """Load the YOLOv8 model with the given inference backend.
+
+    With a StartupProfile the backend import, load and a warm-up inference
+    are timed separately.
+    """
+    print(f"[INFO] Loading model: {model_path} ({backend})")
+    if profile is not None:
+        model = profile.load_detector(model_path, backend)
+    else:
+        model = load_detector(model_path, backend)
     print(f"[INFO] Model loaded successfully ({len(model.names)} classes)")
     return model
 
@@ -56,66 +98,60 @@ def open_webcam(index: int = 0) -> cv2.VideoCapture:
     return cap
 
 
-def draw_detections(frame, results):
+def draw_detections(frame, dets, names):
     """Draw bounding boxes and labels on the frame.
 
     Args:
-        frame:   The BGR image (numpy array).
-        results: YOLOv8 Results object for the frame.
+        frame: The BGR image (numpy array).
+        dets:  Detections arrays (xyxy, conf, cls) for the frame.
+        names: Class id -> class name mapping of the model.
 
     Returns:
         Annotated frame and count of detections.
     """
     detections = 0
 
-    for result in results:
-        boxes = result.boxes
-        if boxes is None:
-            continue
+    keep = dets.conf >= CONFIDENCE_THRESHOLD
+    boxes = dets.xyxy[keep].astype(int).tolist()
+    confidences = dets.conf[keep].tolist()
+    class_ids = dets.cls[keep].tolist()
 
-        for box in boxes:
-            # Extract coordinates and metadata
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            confidence = float(box.conf[0])
-            class_id = int(box.cls[0])
-            class_name = result.names[class_id]
+    for (x1, y1, x2, y2), confidence, class_id in zip(boxes, confidences, class_ids):
+        class_name = names[class_id]
+        detections += 1
+        label = f"{class_name} {confidence:.2f}"
 
-            if confidence < CONFIDENCE_THRESHOLD:
-                continue
+        # Draw bounding box
+        cv2.rectangle(frame, (x1, y1), (x2, y2), BOX_COLOR, BOX_THICKNESS)
 
-            detections += 1
-            label = f"{class_name} {confidence:.2f}"
-
-            # Draw bounding box
-            cv2.rectangle(frame, (x1, y1), (x2, y2), BOX_COLOR, BOX_THICKNESS)
-
-            # Draw label background
-            (text_w, text_h), baseline = cv2.getTextSize(
-                label, LABEL_FONT, LABEL_SCALE, 1
-            )
-            cv2.rectangle(
-                frame,
-                (x1, y1 - text_h - baseline - 4),
-                (x1 + text_w, y1),
-                LABEL_BG_COLOR,
-                cv2.FILLED,
-            )
-
-            # Draw label text
-            cv2.putText(
-                frame, label,
-                (x1, y1 - baseline - 2),
-                LABEL_FONT, LABEL_SCALE, LABEL_COLOR, 1, cv2.LINE_AA,
-            )
+        # Draw label background
+        (text_w, text_h), baseline = cv2.getTextSize(
+            label, LABEL_FONT, LABEL_SCALE, 1
+        )
+        cv2.rectangle(
+            frame,
+            (x1, y1 - text_h - baseline - 4),
+            (x1 + text_w, y1),
+            LABEL_BG_COLOR,
+            cv2.FILLED,
+        )
+
+        # Draw label text
+        cv2.putText(
+            frame, label,
+            (x1, y1 - baseline - 2),
+            LABEL_FONT, LABEL_SCALE, LABEL_COLOR, 1, cv2.LINE_AA,
+        )
 
     return frame, detections
 
 
-def draw_info_overlay(frame, fps: float, detections: int):
-    """Draw FPS counter and detection count on top-left corner."""
+def draw_info_overlay(frame, fps: float, detections: int, extra_lines=()):
+    """Draw FPS counter, detection count and any extra lines on top-left corner."""
     info_lines = [
         f"FPS: {fps:.1f}",
         f"Objects: {detections}",
+        *extra_lines,
     ]
     y_offset = 30
     for line in info_lines:
@@ -135,53 +171,294 @@ def draw_info_overlay(frame, fps: float, detections: int):
     )
 
 
-def main():
-    """Main loop: capture frames, run detection, display results."""
-    model = load_model(MODEL_PATH)
-    cap = open_webcam(WEBCAM_INDEX)
-
-    print("[INFO] Starting real-time detection... Press 'q' to quit.")
+def parse_args():
+    """Parse command-line options (defaults come from the configuration above)."""
+    parser = argparse.ArgumentParser(description="YOLOv8 real-time webcam detection")
+    parser.add_argument("--model", default=MODEL_PATH,
+                        help=f"Model path: .pt for torch, exported model for other backends (default: {MODEL_PATH})")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="Inference backend (default: torch)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="Run capture, inference and display on separate threads (newest frame only)")
+    parser.add_argument("--sources", nargs="+", default=None,
+                        help="Monitor several sources (device indices, video files, RTSP URLs) with one model")
+    parser.add_argument("--max-batch", type=int, default=None,
+                        help="Multi-stream: most frames per inference step (default: one per source)")
+    parser.add_argument("--loop", action="store_true",
+                        help="Multi-stream: restart video file sources when they end")
+    parser.add_argument("--no-display", action="store_true",
+                        help="Multi-stream: print per-stream stats instead of opening a window")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Multi-stream: stop after this many seconds")
+    parser.add_argument("--motion-gate", action="store_true",
+                        help="Skip inference while the scene is static (reuses the last detections)")
+    parser.add_argument("--motion-threshold", type=float, default=MOTION_THRESHOLD,
+                        help=f"Fraction of changed pixels that counts as motion (default: {MOTION_THRESHOLD})")
+    parser.add_argument("--motion-refresh", type=int, default=MOTION_REFRESH,
+                        help=f"Force inference after N skipped frames (default: {MOTION_REFRESH})")
+    parser.add_argument("--motion-method", choices=MOTION_METHODS, default="diff",
+                        help="Frame differencing or MOG2 background subtraction (default: diff)")
+    parser.add_argument("--infer-size", type=int, default=None,
+                        help="Shrink frames to N pixels on the long side before inference, e.g. the "
+                             "model's input size (boxes are still drawn on the full frame)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import, model-load and warm-up times before detection starts")
+    args = parser.parse_args()
+    if args.infer_size is not None and args.infer_size < 32:
+        parser.error("--infer-size must be >= 32")
+    return args
+
+
+def handle_key(frame) -> bool:
+    """Poll the keyboard; saves a snapshot on 's'. Returns True on 'q'."""
+    key = cv2.waitKey(1) & 0xFF
+    if key == ord("q"):
+        print("[INFO] Quit key pressed. Exiting...")
+        return True
+    if key == ord("s"):
+        filename = f"snapshot_{int(time.time())}.jpg"
+        cv2.imwrite(filename, frame)
+        print(f"[INFO] Frame saved: {filename}")
+    return False
+
+
+def run_serial(model, cap, gate):
+    """Capture, infer, draw and display one frame after another on this thread."""
     frame_count = 0
     fps = 0.0
     prev_time = time.time()
+    dets = empty_detections()
 
-    try:
-        while True:
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            print("[WARN] Failed to read frame. Retrying...")
+            continue
+
+        # Run YOLOv8 inference; with the motion gate, static frames
+        # reuse the previous detections
+        if gate is None or gate.check(frame):
+            dets = model.predict([frame], CONFIDENCE_THRESHOLD)[0]
+
+        # Draw detections on frame
+        annotated_frame, detections = draw_detections(frame, dets, model.names)
+
+        # Calculate FPS
+        frame_count += 1
+        current_time = time.time()
+        elapsed = current_time - prev_time
+        if elapsed >= 1.0:
+            fps = frame_count / elapsed
+            frame_count = 0
+            prev_time = current_time
+
+        # Draw overlay info
+        extra_lines = []
+        if gate is not None:
+            extra_lines.append(f"Inferred: {gate.inferred} | Skipped: {gate.skipped}")
+        draw_info_overlay(annotated_frame, fps, detections, extra_lines)
+
+        # Display the frame
+        cv2.imshow(WINDOW_NAME, annotated_frame)
+        if handle_key(annotated_frame):
+            break
+
+
+def run_pipelined(model, cap, gate):
+    """Capture, inference and display on separate threads.
+
+    capture thread   -> newest frame slot -> inference thread
+    inference thread -> newest result slot -> display (this thread; HighGUI
+                                              must stay on the main thread)
+
+    Both slots hold a single item and replace it when the consumer is behind,
+    so no stage ever works on a stale buffered frame. Latency is measured
+    from the moment a frame left cap.read() until it is shown.
+    """
+    frames = LatestValue()     # (frame, capture_time)
+    results = LatestValue()    # (frame, dets, capture_time)
+    stop = threading.Event()
+    capture_rate, inference_rate, display_rate = RateMeter(), RateMeter(), RateMeter()
+    latencies = deque(maxlen=30)
+
+    def capture_loop():
+        while not stop.is_set():
             ret, frame = cap.read()
             if not ret:
                 print("[WARN] Failed to read frame. Retrying...")
+                time.sleep(0.01)
+                continue
+            frames.put((frame, time.perf_counter()))
+            capture_rate.tick()
+        frames.close()
+
+    def inference_loop():
+        dets = empty_detections()
+        while not stop.is_set():
+            item = frames.get(timeout=0.1)
+            if item is None:
                 continue
+            frame, captured = item
+            if gate is None or gate.check(frame):
+                dets = model.predict([frame], CONFIDENCE_THRESHOLD)[0]
+            results.put((frame, dets, captured))
+            inference_rate.tick()
+        results.close()
+
+    workers = [
+        threading.Thread(target=capture_loop, name="capture", daemon=True),
+        threading.Thread(target=inference_loop, name="inference", daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
 
-            # Run YOLOv8 inference (verbose=False suppresses per-frame logs)
-            results = model(frame, verbose=False)
+    try:
+        while True:
+            item = results.get(timeout=0.01)
+            if item is None:
+                # Keep the window responsive while waiting for a result
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    print("[INFO] Quit key pressed. Exiting...")
+                    break
+                continue
+
+            frame, dets, captured = item
+            annotated_frame, detections = draw_detections(frame, dets, model.names)
+            extra_lines = [
+                f"Capture: {capture_rate.rate:.1f} FPS | Inference: {inference_rate.rate:.1f} FPS",
+                f"Latency: {sum(latencies) / max(len(latencies), 1):.0f} ms",
+                f"Dropped: {frames.dropped} capture, {results.dropped} display",
+            ]
+            if gate is not None:
+                extra_lines.append(f"Inferred: {gate.inferred} | Skipped: {gate.skipped}")
+            draw_info_overlay(annotated_frame, display_rate.rate, detections, extra_lines)
+
+            cv2.imshow(WINDOW_NAME, annotated_frame)
+            latencies.append((time.perf_counter() - captured) * 1000)
+            display_rate.tick()
+            if handle_key(annotated_frame):
+                break
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join(timeout=2.0)
+        print(f"[INFO] Pipeline: {frames.put_count} frames captured, {frames.dropped} dropped before "
+              f"inference, {results.dropped} dropped before display")
+
+
+def draw_tile(frame, dets, names, stream):
+    """Annotated, resized tile for one stream of the mosaic."""
+    annotated, detections = draw_detections(frame.copy(), dets, names)
+    tile = cv2.resize(annotated, TILE_SIZE, interpolation=cv2.INTER_AREA)
+    stats = stream.stats()
+    lines = [
+        stream.name,
+        f"Capture {stats['captureFps']:.1f} | Infer {stats['inferenceFps']:.1f} FPS | Objects {detections}",
+        f"Dropped {stats['dropped']} | Latency {stats['latencyMs'] or 0:.0f} ms",
+    ]
+    for i, line in enumerate(lines):
+        cv2.putText(tile, line, (8, 22 + 22 * i), LABEL_FONT, 0.55, (0, 0, 255), 2, cv2.LINE_AA)
+    return tile
 
-            # Draw detections on frame
-            annotated_frame, detections = draw_detections(frame, results)
 
-            # Calculate FPS
-            frame_count += 1
-            current_time = time.time()
-            elapsed = current_time - prev_time
-            if elapsed >= 1.0:
-                fps = frame_count / elapsed
-                frame_count = 0
-                prev_time = current_time
+def mosaic(tiles):
+    """Arrange equally sized tiles in a near-square grid."""
+    cols = math.ceil(math.sqrt(len(tiles)))
+    blank = np.zeros_like(tiles[0])
+    rows = [tiles[i:i + cols] for i in range(0, len(tiles), cols)]
+    rows[-1] = rows[-1] + [blank] * (cols - len(rows[-1]))
+    return np.vstack([np.hstack(row) for row in rows])
 
-            # Draw overlay info
-            draw_info_overlay(annotated_frame, fps, detections)
 
-            # Display the frame
-            cv2.imshow(WINDOW_NAME, annotated_frame)
+def print_stream_stats(monitor):
+    stats = monitor.stats()
+    print(f"[INFO] steps {stats['steps']} | fairness {stats['fairness']:.3f}")
+    for name, s in stats["streams"].items():
+        print(f"       {name}: captured {s['captured']}, inferred {s['inferred']}, gated {s['gated']}, "
+              f"dropped {s['dropped']}, share {s['share']:.2f}, latency {s['latencyMs']} ms")
+
 
-            # Key handling
-            key = cv2.waitKey(1) & 0xFF
-            if key == ord("q"):
-                print("[INFO] Quit key pressed. Exiting...")
+def run_multi(model, args, gate_factory=None):
+    """Monitor args.sources with one shared model (see backend/multi_stream.py)."""
+    monitor = MultiStreamMonitor(model, args.sources, CONFIDENCE_THRESHOLD, args.max_batch,
+                                 args.loop, gate_factory)
+    monitor.start()
+    print(f"[INFO] Monitoring {len(monitor.streams)} sources, batch up to {monitor.max_batch}")
+
+    tiles = {stream: np.zeros((TILE_SIZE[1], TILE_SIZE[0], 3), np.uint8) for stream in monitor.streams}
+    started = last_stats = time.time()
+    try:
+        while not monitor.finished:
+            if args.duration is not None and time.time() - started >= args.duration:
+                break
+            for stream, frame, dets, _ in monitor.step():
+                if not args.no_display:
+                    tiles[stream] = draw_tile(frame, dets, model.names, stream)
+
+            if args.no_display:
+                if time.time() - last_stats >= STATS_INTERVAL:
+                    print_stream_stats(monitor)
+                    last_stats = time.time()
+                continue
+            view = mosaic(list(tiles.values()))
+            cv2.imshow(WINDOW_NAME, view)
+            if handle_key(view):
                 break
-            elif key == ord("s"):
-                filename = f"snapshot_{int(time.time())}.jpg"
-                cv2.imwrite(filename, annotated_frame)
-                print(f"[INFO] Frame saved: {filename}")
+    finally:
+        monitor.stop()
+        print_stream_stats(monitor)
+
+
+def downscale_model(model, infer_size):
+    """Wrap the model so frames are shrunk to infer_size before inference (None: unchanged)."""
+    if infer_size is None:
+        return model
+    print(f"[INFO] Inferring at {infer_size}px on the long side (reused buffers)")
+    return DownscaledDetector(model, infer_size)
+
+
+def main():
+    """Main loop: capture frames, run detection, display results."""
+    args = parse_args()
+    profile = StartupProfile(imports=IMPORT_SECONDS) if args.profile_startup else None
+
+    if args.sources:
+        model = load_model(args.model, args.backend, profile)
+        if profile is not None:
+            profile.report()
+        model = downscale_model(model, args.infer_size)
+        gate_factory = None
+        if args.motion_gate:
+            def gate_factory():
+                return MotionGate(args.motion_threshold, args.motion_refresh, args.motion_method)
+        try:
+            run_multi(model, args, gate_factory)
+        except KeyboardInterrupt:
+            print("\n[INFO] Interrupted by user.")
+        finally:
+            cv2.destroyAllWindows()
+        return
+
+    # Fail on a missing camera before paying for the model
+    cap = open_webcam(WEBCAM_INDEX)
+    model = load_model(args.model, args.backend, profile)
+    if profile is not None:
+        profile.report()
+    model = downscale_model(model, args.infer_size)
+
+    gate = None
+    if args.motion_gate:
+        gate = MotionGate(args.motion_threshold, args.motion_refresh, args.motion_method)
+        print(f"[INFO] Motion gate on (threshold {args.motion_threshold}, refresh {args.motion_refresh})")
+
+    print("[INFO] Starting real-time detection... Press 'q' to quit.")
+
+    try:
+        if args.pipelined:
+            print("[INFO] Pipelined mode: capture, inference and display run concurrently")
+            run_pipelined(model, cap, gate)
+        else:
+            run_serial(model, cap, gate)
 
     except KeyboardInterrupt:
         print("\n[INFO] Interrupted by user.")
@@ -189,6 +466,8 @@ def main():
     finally:
         cap.release()
         cv2.destroyAllWindows()
+        if gate is not None:
+            print(f"[INFO] Motion gate: {gate.inferred} frames inferred, {gate.skipped} skipped")
         print("[INFO] Webcam released. Goodbye!")
 
 
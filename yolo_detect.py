@@ -1,104 +1,488 @@
 """
 YOLOv8 Object Detection Script
 ================================
-Detect objects in an image using a pretrained YOLOv8 model (Ultralytics).
+Detect objects in an image using a pretrained YOLOv8 model (Ultralytics),
+or run a whole directory / glob of images through it headlessly.
 
 Installation:
     pip install ultralytics opencv-python
+    pip install onnxruntime                    # optional, for --backend onnxruntime
+    pip install openvino                       # optional, for --backend openvino
+    pip install pyarrow                        # optional, for --results *.parquet
 
 Usage:
     python yolo_detect.py                      # uses default 'input.jpg'
     python yolo_detect.py --source photo.png   # specify any image path
+    python yolo_detect.py --model yolov8n.onnx --backend onnxruntime
+    python yolo_detect.py --profile-startup    # time imports, model load and warm-up
+    python yolo_detect.py --source wall_4k.jpg --tile 640 --tile-full-frame   # small, distant objects
+    python yolo_detect.py --source cam01.jpg --camera CAM-01   # only inside CAM-01's ROI
+
+Batch mode (a directory or glob as --source; never opens a window):
+    python yolo_detect.py --source archive/ --recursive --results detections.csv
+    python yolo_detect.py --source "stills/*.jpg" --results detections.parquet \\
+                          --output-dir annotated/ --batch-size 16 --workers 8
+
+    Images are decoded by a thread pool ahead of inference and sent to the
+    model --batch-size at a time; annotated images and result rows are
+    written by a background thread. Results (.csv, .jsonl or .parquet) hold
+    one row per detection, plus one row with empty detection fields for
+    each image without detections:
+        image, width, height, class_id, class, confidence, x1, y1, x2, y2
 """
 
+import time
+_IMPORT_START = time.perf_counter()
+
 import sys
 import os
+import csv
+import glob
+import json
+import queue
 import argparse
+import threading
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+from inference_backends import BACKENDS, load_detector  # noqa: E402
+from frame_pipeline import prefetch  # noqa: E402
+from startup_profile import StartupProfile  # noqa: E402
+from roi import DEFAULT_ROI_CONFIG, RegionOfInterest, RoiDetector, camera_roi  # noqa: E402
+from tiling import TiledDetector  # noqa: E402
+
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_START
+
+INSTALL_HINTS = {
+    "torch": "pip install ultralytics opencv-python",
+    "onnxruntime": "pip install onnxruntime opencv-python",
+    "openvino": "pip install openvino opencv-python",
+}
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff")
+RESULT_FIELDS = ["image", "width", "height", "class_id", "class", "confidence", "x1", "y1", "x2", "y2"]
+PREFETCH_BATCHES = 2        # batches decoded ahead of inference
+WRITE_QUEUE_SIZE = 64       # annotated images waiting for the writer before inference pauses
+
 
 # ── Argument parsing ──────────────────────────────────────────────────────────
-parser = argparse.ArgumentParser(description="YOLOv8 Object Detection")
-parser.add_argument(
-    "--source",
-    type=str,
-    default="input.jpg",
-    help="Path to the input image (default: input.jpg)",
-)
-parser.add_argument(
-    "--model",
-    type=str,
-    default="yolov8n.pt",
-    help="YOLOv8 model name or path (default: yolov8n.pt)",
-)
-parser.add_argument(
-    "--conf",
-    type=float,
-    default=0.25,
-    help="Minimum confidence threshold (default: 0.25)",
-)
-parser.add_argument(
-    "--output",
-    type=str,
-    default="result.jpg",
-    help="Path to save the output image (default: result.jpg)",
-)
-args = parser.parse_args()
-
-# ── Validate input image ─────────────────────────────────────────────────────
-if not os.path.isfile(args.source):
-    print(f"[ERROR] Image not found: '{args.source}'")
-    print("Please provide a valid image path using --source <path>")
-    sys.exit(1)
-
-# ── Import Ultralytics (with helpful error if not installed) ──────────────────
-try:
-    from ultralytics import YOLO
-except ImportError:
-    print("[ERROR] Ultralytics is not installed.")
-    print("Install it with:  pip install ultralytics opencv-python")
-    sys.exit(1)
+def parse_args():
+    parser = argparse.ArgumentParser(description="YOLOv8 Object Detection")
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="input.jpg",
+        help="Input image, or a directory / glob for batch mode (default: input.jpg)",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="yolov8n.pt",
+        help="YOLOv8 model name or path (default: yolov8n.pt)",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        choices=BACKENDS,
+        default="torch",
+        help="Inference backend; onnxruntime/openvino need an exported model (default: torch)",
+    )
+    parser.add_argument(
+        "--conf",
+        type=float,
+        default=0.25,
+        help="Minimum confidence threshold (default: 0.25)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="result.jpg",
+        help="Path to save the output image (default: result.jpg)",
+    )
+    parser.add_argument(
+        "--no-show",
+        action="store_true",
+        help="Single image: save the result without opening a window",
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        default="detections.csv",
+        help="Batch mode: results file, .csv, .jsonl or .parquet (default: detections.csv)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Batch mode: also save annotated images here (default: results only)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=8,
+        help="Batch mode: images per inference call (default: 8)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Batch mode: image decoding threads (default: 4)",
+    )
+    parser.add_argument(
+        "--recursive",
+        action="store_true",
+        help="Batch mode: include images in subdirectories",
+    )
+    parser.add_argument(
+        "--tile",
+        type=int,
+        default=None,
+        metavar="SIZE",
+        help="Tiled inference with SIZE-pixel tiles, for small objects in high-res images",
+    )
+    parser.add_argument(
+        "--tile-overlap",
+        type=float,
+        default=0.2,
+        help="Fraction of a tile shared with its neighbour (default: 0.2)",
+    )
+    parser.add_argument(
+        "--tile-full-frame",
+        action="store_true",
+        help="Also run a low-resolution pass over the whole image with the tiles",
+    )
+    parser.add_argument(
+        "--camera",
+        type=str,
+        default=None,
+        help="Only detect inside this camera's ROI polygons (see backend/roi.py)",
+    )
+    parser.add_argument(
+        "--roi-config",
+        type=str,
+        default=DEFAULT_ROI_CONFIG,
+        help="ROI config file with per-camera polygons",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import, model-load and warm-up times",
+    )
+    return parser.parse_args()
+
+
+def is_batch_source(source):
+    return os.path.isdir(source) or any(c in source for c in "*?[")
+
+
+# ── Load the YOLOv8 model (with helpful error if the backend is missing) ─────
+def load_model(model_path, backend, profile=None):
+    # On first run .pt weights are downloaded automatically (~6 MB for yolov8n).
+    print(f"[INFO] Loading model: {model_path} ({backend})")
+    try:
+        if profile is not None:
+            return profile.load_detector(model_path, backend)
+        return load_detector(model_path, backend)
+    except ImportError as exc:
+        print(f"[ERROR] {exc.name or 'A required package'} is not installed.")
+        print(f"Install it with:  {INSTALL_HINTS[backend]}")
+        sys.exit(1)
+
+
+def load_roi(args):
+    """The --camera ROI from --roi-config, or None; exits on a missing or malformed entry."""
+    if not args.camera:
+        return None
+    try:
+        return RegionOfInterest.from_config(camera_roi(args.camera, args.roi_config))
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        print(f"[ERROR] Invalid ROI for camera '{args.camera}': {exc}")
+        sys.exit(1)
+
+
+def wrap_model(model, args, roi=None):
+    """Apply the ROI (crop and filter) and --tile (tiled inference) to the detector."""
+    if roi is not None:
+        print(f"[INFO] Restricting detection to the ROI of {args.camera}")
+    if args.tile:
+        mode = " + low-res full frame" if args.tile_full_frame else ""
+        print(f"[INFO] Tiled inference: {args.tile}px tiles, {args.tile_overlap:.0%} overlap{mode}")
+        return TiledDetector(model, args.tile, args.tile_overlap, args.tile_full_frame, roi)
+    if roi is not None:
+        return RoiDetector(model, roi)
+    return model
+
+
+# ── Drawing ───────────────────────────────────────────────────────────────────
+def annotate(image, dets, names):
+    """Copy of image with boxes and "class conf" labels, one colour per class."""
+    annotated = image.copy()
+    for (x1, y1, x2, y2), confidence, class_id in zip(
+        dets.xyxy.astype(int).tolist(), dets.conf.tolist(), dets.cls.tolist()
+    ):
+        color = tuple(int(c) for c in cv2.applyColorMap(
+            np.uint8([[class_id * 47 % 256]]), cv2.COLORMAP_HSV)[0, 0])
+        label = f"{names[class_id]} {confidence:.2f}"
+        cv2.rectangle(annotated, (x1, y1), (x2, y2), color, 2)
+        (text_w, text_h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 1)
+        cv2.rectangle(annotated, (x1, y1 - text_h - baseline - 4), (x1 + text_w, y1), color, cv2.FILLED)
+        cv2.putText(annotated, label, (x1, y1 - baseline - 2),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1, cv2.LINE_AA)
+    return annotated
+
+
+# ── Single image ──────────────────────────────────────────────────────────────
+def detect_single(model, args):
+    print(f"[INFO] Running detection on: {args.source}")
+    image = cv2.imread(args.source)
+    if image is None:
+        print(f"[ERROR] Cannot read image: '{args.source}'")
+        sys.exit(1)
+
+    # One Detections tuple per image: xyxy (N, 4), conf (N,), cls (N,)
+    dets = model.predict([image], conf=args.conf)[0]
+
+    # Print detection results
+    if len(dets.conf) == 0:
+        print("[INFO] No objects detected.")
+    else:
+        print(f"\n{'#':<4} {'Class':<20} {'Confidence':<12} {'BBox (x1 y1 x2 y2)'}")
+        print("-" * 65)
+
+        rows = zip(dets.cls.tolist(), dets.conf.tolist(), dets.xyxy.tolist())
+        for i, (class_id, confidence, (x1, y1, x2, y2)) in enumerate(rows):
+            class_name = model.names[class_id]        # human-readable name
+
+            print(f"{i+1:<4} {class_name:<20} {confidence:<12.4f} "
+                  f"({x1:.0f}, {y1:.0f}, {x2:.0f}, {y2:.0f})")
+
+        print(f"\nTotal objects detected: {len(dets.conf)}")
+
+    # Save the annotated image
+    annotated = annotate(image, dets, model.names)
+    cv2.imwrite(args.output, annotated)
+    print(f"[INFO] Output saved to: {args.output}")
+
+    # Display the image (press any key to close)
+    if not args.no_show:
+        cv2.imshow("YOLOv8 Detection", annotated)
+        print("[INFO] Press any key on the image window to close.")
+        cv2.waitKey(0)
+        cv2.destroyAllWindows()
+
+
+# ── Batch mode ────────────────────────────────────────────────────────────────
+def collect_images(source, recursive=False):
+    """Sorted image paths of a directory or glob pattern."""
+    if os.path.isdir(source):
+        pattern = os.path.join(source, "**", "*") if recursive else os.path.join(source, "*")
+    else:
+        pattern = source
+    return sorted(
+        p for p in glob.glob(pattern, recursive=recursive)
+        if p.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(p)
+    )
+
+
+class ResultsSink:
+    """Appends result rows to a .csv, .jsonl or .parquet file as batches finish."""
+
+    def __init__(self, path, names):
+        self.path = path
+        self.names = names
+        self.format = os.path.splitext(path)[1].lower().lstrip(".")
+        if self.format not in ("csv", "jsonl", "parquet"):
+            raise ValueError(f"Unsupported results format: {path} (use .csv, .jsonl or .parquet)")
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._pa = pa
+            self._schema = pa.schema([
+                ("image", pa.string()), ("width", pa.int32()), ("height", pa.int32()),
+                ("class_id", pa.int32()), ("class", pa.string()), ("confidence", pa.float32()),
+                ("x1", pa.float32()), ("y1", pa.float32()), ("x2", pa.float32()), ("y2", pa.float32()),
+            ])
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._file = open(path, "w", newline="", encoding="utf-8")
+            if self.format == "csv":
+                self._csv = csv.writer(self._file)
+                self._csv.writerow(RESULT_FIELDS)
+
+    def rows(self, path, image, dets):
+        """Result rows of one image (a single empty-detection row if nothing was found)."""
+        height, width = image.shape[:2]
+        if len(dets.conf) == 0:
+            return [[path, width, height, None, None, None, None, None, None, None]]
+        return [
+            [path, width, height, class_id, self.names[class_id], round(confidence, 4),
+             *[round(v, 1) for v in box]]
+            for class_id, confidence, box in zip(dets.cls.tolist(), dets.conf.tolist(), dets.xyxy.tolist())
+        ]
+
+    def write(self, rows):
+        if self.format == "csv":
+            self._csv.writerows(rows)
+        elif self.format == "jsonl":
+            self._file.writelines(json.dumps(dict(zip(RESULT_FIELDS, row))) + "\n" for row in rows)
+        else:
+            columns = list(zip(*rows))
+            self._writer.write_table(self._pa.Table.from_arrays(
+                [self._pa.array(col, type=field.type) for col, field in zip(columns, self._schema)],
+                schema=self._schema,
+            ))
+
+    def close(self):
+        if self.format == "parquet":
+            self._writer.close()
+        else:
+            self._file.close()
+
+
+class BackgroundWriter(threading.Thread):
+    """Writes annotated images and result rows off the inference thread.
+
+    The queue is bounded, so inference pauses instead of piling up images in
+    memory when the disk is slower than the model.
+    """
+
+    def __init__(self, sink, output_dir=None, source_root=None):
+        super().__init__(name="writer", daemon=True)
+        self.sink = sink
+        self.output_dir = output_dir
+        self.source_root = source_root
+        self.queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.error = None
+        self.images_written = 0
+
+    def submit(self, rows, path=None, annotated=None):
+        if self.error is not None:
+            raise self.error
+        self.queue.put((rows, path, annotated))
+
+    def _output_path(self, path):
+        if self.source_root:
+            relative = os.path.relpath(path, self.source_root)
+        else:
+            relative = os.path.basename(path)
+        return os.path.join(self.output_dir, relative)
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                continue  # drain after a failure so submit() never blocks forever
+            rows, path, annotated = item
+            try:
+                self.sink.write(rows)
+                if annotated is not None:
+                    out_path = self._output_path(path)
+                    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                    cv2.imwrite(out_path, annotated)
+                    self.images_written += 1
+            except Exception as exc:
+                self.error = exc
+
+    def close(self):
+        self.queue.put(None)
+        self.join()
+        self.sink.close()
+        if self.error is not None:
+            raise self.error
+
+
+def detect_batch(model, args):
+    paths = collect_images(args.source, args.recursive)
+    if not paths:
+        print(f"[ERROR] No images found for: '{args.source}'")
+        sys.exit(1)
+    print(f"[INFO] Batch mode: {len(paths)} images, batch size {args.batch_size}, "
+          f"{args.workers} decode threads")
+
+    try:
+        sink = ResultsSink(args.results, model.names)
+    except ImportError:
+        print("[ERROR] pyarrow is not installed (needed for .parquet results).")
+        print("Install it with:  pip install pyarrow")
+        sys.exit(1)
+    source_root = args.source if os.path.isdir(args.source) else None
+    writer = BackgroundWriter(sink, args.output_dir, source_root)
+    writer.start()
+
+    started = time.perf_counter()
+    done = detections = unreadable = 0
+    batch = []
+
+    def flush():
+        nonlocal done, detections
+        for (path, image), dets in zip(batch, model.predict([img for _, img in batch], args.conf)):
+            annotated = annotate(image, dets, model.names) if args.output_dir else None
+            writer.submit(sink.rows(path, image, dets), path, annotated)
+            detections += len(dets.conf)
+        done += len(batch)
+        batch.clear()
+        elapsed = time.perf_counter() - started
+        print(f"\r[INFO] {done}/{len(paths)} images  {done / elapsed:.1f} img/s  "
+              f"{detections} detections", end="", flush=True)
+
+    try:
+        lookahead = args.batch_size * PREFETCH_BATCHES
+        for path, image in prefetch(paths, cv2.imread, args.workers, lookahead):
+            if image is None:
+                unreadable += 1
+                print(f"\n[WARN] Cannot read image: '{path}'")
+                continue
+            batch.append((path, image))
+            if len(batch) >= args.batch_size:
+                flush()
+        if batch:
+            flush()
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"\n[INFO] Processed {done} images in {elapsed:.1f}s ({done / max(elapsed, 1e-9):.1f} img/s), "
+          f"{detections} detections, {unreadable} unreadable")
+    print(f"[INFO] Results saved to: {args.results}")
+    if args.output_dir:
+        print(f"[INFO] Annotated images saved to: {args.output_dir}")
+
+
+def main():
+    args = parse_args()
+    batch_mode = is_batch_source(args.source)
+
+    # Validate the input before paying for the model
+    if not batch_mode and not os.path.isfile(args.source):
+        print(f"[ERROR] Image not found: '{args.source}'")
+        print("Please provide a valid image path, directory or glob using --source <path>")
+        sys.exit(1)
+    if batch_mode and not args.results.lower().endswith((".csv", ".jsonl", ".parquet")):
+        print(f"[ERROR] Unsupported results format: '{args.results}' (use .csv, .jsonl or .parquet)")
+        sys.exit(1)
+    if args.batch_size < 1 or args.workers < 1:
+        print("[ERROR] --batch-size and --workers must be >= 1")
+        sys.exit(1)
+    if (args.tile is not None and args.tile < 32) or not 0 <= args.tile_overlap < 1:
+        print("[ERROR] --tile must be >= 32 and --tile-overlap in [0, 1)")
+        sys.exit(1)
+    roi = load_roi(args)
+
+    profile = StartupProfile(imports=IMPORT_SECONDS) if args.profile_startup else None
+    model = load_model(args.model, args.backend, profile)
+    if profile is not None:
+        profile.report()
+    model = wrap_model(model, args, roi)
+    if batch_mode:
+        detect_batch(model, args)
+    else:
+        detect_single(model, args)
 
-import cv2
 
-# ── Load the pretrained YOLOv8 model ─────────────────────────────────────────
-# On first run the weights are downloaded automatically (~6 MB for yolov8n).
-print(f"[INFO] Loading model: {args.model}")
-model = YOLO(args.model)
-
-# ── Run inference on the image ────────────────────────────────────────────────
-print(f"[INFO] Running detection on: {args.source}")
-results = model(args.source, conf=args.conf)
-
-# `results` is a list; one entry per image. We only have one image.
-result = results[0]
-
-# ── Print detection results ──────────────────────────────────────────────────
-boxes = result.boxes  # Boxes object with xyxy, conf, cls, etc.
-
-if len(boxes) == 0:
-    print("[INFO] No objects detected.")
-else:
-    print(f"\n{'#':<4} {'Class':<20} {'Confidence':<12} {'BBox (x1 y1 x2 y2)'}")
-    print("-" * 65)
-
-    for i, box in enumerate(boxes):
-        class_id = int(box.cls[0])               # numeric class id
-        class_name = model.names[class_id]        # human-readable name
-        confidence = float(box.conf[0])           # confidence score
-        x1, y1, x2, y2 = box.xyxy[0].tolist()    # bounding-box coordinates
-
-        print(f"{i+1:<4} {class_name:<20} {confidence:<12.4f} "
-              f"({x1:.0f}, {y1:.0f}, {x2:.0f}, {y2:.0f})")
-
-    print(f"\nTotal objects detected: {len(boxes)}")
-
-# ── Save the annotated image ─────────────────────────────────────────────────
-# result.plot() returns a BGR numpy array with bounding boxes drawn.
-annotated = result.plot()
-cv2.imwrite(args.output, annotated)
-print(f"[INFO] Output saved to: {args.output}")
-
-# ── Display the image (press any key to close) ───────────────────────────────
-cv2.imshow("YOLOv8 Detection", annotated)
-print("[INFO] Press any key on the image window to close.")
-cv2.waitKey(0)
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()